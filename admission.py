@@ -0,0 +1,236 @@
+# admission.py
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from metrics import ADMISSIONS, ADMISSION_WAITING, ADMISSION_RUNNING, STAGE_LATENCY
+from responses import is_interaction, send_response, defer_response
+
+logger = logging.getLogger('cannabis_clinic_bot.admission')
+
+# Token interakcji pozwala wysyłać followupy przez 15 minut od jej utworzenia
+INTERACTION_TOKEN_LIFETIME = 15 * 60
+# Czas (s) zostawiany przed wygaśnięciem tokenu na zbudowanie i wysłanie listy po wpuszczeniu komendy
+DEFAULT_SEND_RESERVE = 120.0
+
+BUSY_MESSAGE = "Bot jest teraz zajęty wyświetlaniem innych list. Spróbuj ponownie za chwilę."
+
+class AdmissionRejected(Exception):
+    """Raised when a command is not admitted: the wait queue is full or its deadline passed."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class _Slots:
+    """
+    Counting semaphore that admits waiters strictly in arrival order on every supported Python:
+    a released slot is handed to the oldest waiter instead of being put back, so a newcomer can't
+    take it first (asyncio.Semaphore only guarantees that from Python 3.11). Futures are created
+    in the running loop when a caller has to wait, so it can be built before the loop starts.
+    """
+    __slots__ = ("free", "_waiters")
+
+    def __init__(self, limit):
+        self.free = limit
+        self._waiters = deque()
+
+    def locked(self):
+        """True when a new acquire() would have to wait: no free slot, or others already waiting."""
+        return self.free <= 0 or bool(self._waiters)
+
+    async def acquire(self):
+        if not self.locked():
+            self.free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except BaseException:
+            if future.cancelled():
+                if future in self._waiters:
+                    self._waiters.remove(future)
+            else:
+                # The slot was handed over just as the wait was cancelled, so pass it on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+class _GuildSlots:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit):
+        self.semaphore = _Slots(limit)
+        self.users = 0
+
+class AdmissionController:
+    """
+    Limits how many expensive commands (the lists, which build and send many embeds) run at once:
+    at most `guild_limit` per guild and `global_limit` in total. A command takes its guild's slot
+    before queueing for a global one, so one busy guild never holds more than `guild_limit` places
+    in the global queue and can't starve the others.
+
+    A command that can't start right away waits in a bounded queue: once `max_waiting` commands
+    wait, new ones are rejected at once, and a waiting command gives up at its deadline (at most
+    `max_wait` seconds, and never later than the caller's deadline, see interaction_deadline).
+    Waiting commands are admitted in arrival order. Rejected commands get a short "busy" reply
+    instead of adding to the backlog.
+
+    Used from the event loop only. Decisions are counted in bot_admissions_total.
+
+    Args:
+        global_limit (int): Commands running at once in total.
+        guild_limit (int): Commands running at once per guild (direct messages count as one guild).
+        max_waiting (int): Commands allowed to wait for a slot.
+        max_wait (float): Seconds a command waits for a slot at most.
+    """
+
+    def __init__(self, global_limit=4, guild_limit=2, max_waiting=20, max_wait=120.0):
+        self.global_limit = global_limit
+        self.guild_limit = guild_limit
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._global = _Slots(global_limit)
+        self._guilds = {}
+
+    def _guild_slots(self, guild_id):
+        slots = self._guilds.get(guild_id)
+        if slots is None:
+            slots = self._guilds[guild_id] = _GuildSlots(self.guild_limit)
+        slots.users += 1
+        return slots
+
+    def _forget_guild(self, guild_id, slots):
+        slots.users -= 1
+        if not slots.users and self._guilds.get(guild_id) is slots:
+            del self._guilds[guild_id]
+
+    async def _acquire_slots(self, slots):
+        await slots.semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            slots.semaphore.release()
+            raise
+
+    async def acquire(self, command, guild_id=None, deadline=None, on_wait=None):
+        """
+        Waits for a slot for the command and returns a ticket to pass to release().
+
+        Args:
+            command (str): Label of the command in the metrics.
+            guild_id: Guild the command runs in (None for direct messages).
+            deadline (float): time.time() after which waiting is pointless (None: only max_wait applies).
+            on_wait: Coroutine function awaited once if the command has to wait (e.g. to defer the interaction).
+
+        Raises:
+            AdmissionRejected: The wait queue is full, or no slot freed up before the deadline.
+        """
+        slots = self._guild_slots(guild_id)
+        try:
+            # locked() is also true while others are waiting, so newcomers don't jump the queue
+            if not slots.semaphore.locked() and not self._global.locked():
+                await self._acquire_slots(slots)
+                ADMISSIONS.inc(command, "admitted")
+            else:
+                await self._wait(command, slots, deadline, on_wait)
+        except BaseException:
+            self._forget_guild(guild_id, slots)
+            raise
+        ADMISSION_RUNNING.inc()
+        return (guild_id, slots)
+
+    async def _wait(self, command, slots, deadline, on_wait):
+        if self.waiting >= self.max_waiting:
+            ADMISSIONS.inc(command, "rejected_full")
+            raise AdmissionRejected("queue_full")
+        timeout = self.max_wait if deadline is None else min(self.max_wait, deadline - time.time())
+        if timeout <= 0:
+            ADMISSIONS.inc(command, "rejected_deadline")
+            raise AdmissionRejected("deadline")
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.waiting += 1
+        ADMISSION_WAITING.inc()
+        try:
+            if on_wait is not None:
+                await on_wait()
+            await asyncio.wait_for(self._acquire_slots(slots), max(timeout - (loop.time() - start), 0))
+        except asyncio.TimeoutError:
+            ADMISSIONS.inc(command, "rejected_deadline")
+            raise AdmissionRejected("deadline") from None
+        finally:
+            self.waiting -= 1
+            ADMISSION_WAITING.dec()
+            STAGE_LATENCY.observe(loop.time() - start, "admission_wait")
+        ADMISSIONS.inc(command, "queued")
+
+    def release(self, ticket):
+        """Frees the slots taken by acquire()."""
+        guild_id, slots = ticket
+        ADMISSION_RUNNING.dec()
+        self._global.release()
+        slots.semaphore.release()
+        self._forget_guild(guild_id, slots)
+
+_controller = AdmissionController()
+
+def configure_admission(global_limit=4, guild_limit=2, max_waiting=20, max_wait=120.0):
+    """Replaces the shared admission controller with one using the given limits (call before the bot starts)."""
+    global _controller
+    _controller = AdmissionController(global_limit=global_limit, guild_limit=guild_limit,
+                                      max_waiting=max_waiting, max_wait=max_wait)
+    return _controller
+
+def get_admission_controller():
+    return _controller
+
+def interaction_deadline(ctx_or_interaction, reserve=DEFAULT_SEND_RESERVE):
+    """
+    Latest time.time() until which a command may wait for admission: the interaction token expires
+    15 minutes after the interaction was created, minus `reserve` seconds to build and send the answer.
+    None for a Context, which has no token.
+    """
+    if not is_interaction(ctx_or_interaction):
+        return None
+    return ctx_or_interaction.created_at.timestamp() + INTERACTION_TOKEN_LIFETIME - reserve
+
+async def run_admitted(ctx_or_interaction, command, func, ephemeral=False):
+    """
+    Uruchamia kosztowną komendę (await func()) po wpuszczeniu przez kontroler dopuszczeń.
+
+    An interaction that has to wait is deferred first, so it doesn't time out while queued.
+    A rejected command gets a short "busy" reply and func is not run. Returns func's result (None if rejected).
+    """
+    interaction = is_interaction(ctx_or_interaction)
+    if interaction:
+        guild_id = ctx_or_interaction.guild_id
+    else:
+        guild = getattr(ctx_or_interaction, "guild", None)
+        guild_id = guild.id if guild else None
+
+    controller = _controller
+    try:
+        ticket = await controller.acquire(
+            command, guild_id, deadline=interaction_deadline(ctx_or_interaction),
+            on_wait=functools.partial(defer_response, ctx_or_interaction, ephemeral=ephemeral) if interaction else None)
+    except AdmissionRejected as e:
+        logger.info(f"{command} rejected ({e.reason})", extra={"command": command, "guild": guild_id})
+        await send_response(ctx_or_interaction, ephemeral=True, content=BUSY_MESSAGE)
+        return None
+
+    try:
+        return await func()
+    finally:
+        controller.release(ticket)
@@ -0,0 +1,58 @@
+# autocomplete.py
+from bisect import bisect_left
+
+# Discord shows at most 25 suggestions, each at most 100 characters long
+MAX_SUGGESTIONS = 25
+MAX_CHOICE_LENGTH = 100
+
+class PrefixIndex:
+    """
+    Sorted prefix array for autocomplete.
+
+    Every option is stored under its normalized key and under the key suffix starting at
+    each later word, so "glue" also suggests "Gorilla Glue #4". A lookup is a binary search
+    followed by a scan of at most `limit` matching entries, independent of the data size.
+
+    Args:
+        options (iterable): (display text, normalized key) pairs. Duplicate display texts
+            are suggested once.
+    """
+
+    def __init__(self, options):
+        full_keys = {}
+        word_keys = {}
+        for display, key in options:
+            if not display or not key:
+                continue
+            full_keys.setdefault(key, display)
+            words = key.split()
+            for start in range(1, len(words)):
+                word_keys.setdefault(" ".join(words[start:]), display)
+
+        self._full = sorted(full_keys.items())
+        self._full_keys = [key for key, _ in self._full]
+        self._words = sorted(word_keys.items())
+        self._word_keys = [key for key, _ in self._words]
+
+    def __len__(self):
+        return len(self._full)
+
+    @staticmethod
+    def _scan(keys, entries, prefix, limit, seen, results):
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+            display = entries[position][1]
+            if display not in seen:
+                seen.add(display)
+                results.append(display)
+            position += 1
+
+    def suggest(self, prefix, limit=MAX_SUGGESTIONS):
+        """Returns up to `limit` display texts whose key (or a later word of it) starts with the normalized prefix."""
+        results = []
+        seen = set()
+        # Whole-name matches first, then matches on a later word
+        self._scan(self._full_keys, self._full, prefix, limit, seen, results)
+        if prefix:
+            self._scan(self._word_keys, self._words, prefix, limit, seen, results)
+        return results
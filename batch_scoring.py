@@ -0,0 +1,161 @@
+# batch_scoring.py
+from collections import Counter
+from fuzzywuzzy import fuzz
+from fuzzywuzzy.utils import full_process
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, without it every choice is scored
+    np = None
+
+class BatchScorer:
+    """
+    Scores one query against a fixed array of choices in a single call.
+
+    The score of a choice is max(token_set_ratio, partial_ratio) / 100, the same
+    formula the fuzzy fallbacks used per record. Choices are deduplicated when the
+    scorer is built: every distinct string is scored at most once per query and the
+    scores are gathered back to all positions through an array of codes.
+
+    With NumPy available each distinct choice is also kept as a row of character
+    counts. Both scorers are ratios of matched characters, so the multiset overlap
+    with the query gives an upper bound on the score for all choices at once, and
+    choices that cannot reach the threshold are never passed to fuzzywuzzy.
+
+    Args:
+        choices (list): Candidate strings, one per record.
+        processor (callable): Optional function applied to the query and every choice
+            before scoring (e.g. fuzzywuzzy's full_process, as process.extractOne does).
+    """
+
+    def __init__(self, choices, processor=None):
+        self.processor = processor
+
+        unique = {}
+        codes = [unique.setdefault(choice or "", len(unique)) for choice in choices]
+        self.size = len(codes)
+
+        self.processed = [processor(choice) if processor else choice for choice in unique]
+        # token_set_ratio always runs full_process(force_ascii=True) internally, do it once here
+        self.token_keys = [full_process(choice, force_ascii=True) for choice in self.processed]
+
+        if np is None:
+            self.codes = codes
+            return
+
+        self.codes = np.asarray(codes, dtype=np.int64)
+
+        # Choices sharing a token with the query can score high on token_set_ratio
+        # whatever their characters, so they are found through postings instead of the bound
+        self.token_postings = {}
+        for position, key in enumerate(self.token_keys):
+            for token in set(key.split()):
+                self.token_postings.setdefault(token, []).append(position)
+
+        # Without a shared token, token_set_ratio compares the sorted unique tokens of both sides
+        token_strings = [" ".join(sorted(set(key.split()))) for key in self.token_keys]
+
+        self.alphabet = {}
+        for string in self.processed + token_strings:
+            for char in string:
+                self.alphabet.setdefault(char, len(self.alphabet))
+        self.char_counts, self.lengths = self._count_matrix(self.processed)
+        self.token_char_counts, self.token_lengths = self._count_matrix(token_strings)
+        self.nonempty = np.asarray([bool(choice) for choice in self.processed])
+
+    def __len__(self):
+        return self.size
+
+    def _count_matrix(self, strings):
+        counts = np.zeros((len(strings), max(len(self.alphabet), 1)), dtype=np.uint16)
+        for row, string in enumerate(strings):
+            for char, count in Counter(string).items():
+                counts[row, self.alphabet[char]] = count
+        return counts, np.asarray([len(string) for string in strings], dtype=np.float64)
+
+    def _query_counts(self, string, counts):
+        query_counts = np.zeros(counts.shape[1], dtype=np.uint16)
+        for char, count in Counter(string).items():
+            column = self.alphabet.get(char)
+            if column is not None:
+                query_counts[column] = count
+        # Characters shared with each choice, counted with multiplicity
+        return np.minimum(counts, query_counts).sum(axis=1, dtype=np.float64)
+
+    def _candidates(self, query, query_tokens, threshold):
+        """Positions of distinct choices whose score may reach the threshold."""
+        if threshold <= 0:
+            return range(len(self.processed))
+
+        # partial_ratio: best window is 2M / (len(shorter) + len(window)) with M <= shared chars
+        shared = self._query_counts(query, self.char_counts)
+        shorter = np.minimum(self.lengths, len(query))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bound = np.where(shared > 0, 2 * shared / (shorter + shared), 0.0)
+
+        # token_set_ratio with no common token: ratio of the two sorted token strings
+        token_set = sorted(set(query_tokens.split()))
+        query_token_string = " ".join(token_set)
+        shared = self._query_counts(query_token_string, self.token_char_counts)
+        total = self.token_lengths + len(query_token_string)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bound = np.maximum(bound, np.where(total > 0, 2 * shared / total, 0.0))
+
+        # fuzzywuzzy rounds to whole percents, so keep anything that could round up to the threshold
+        mask = (bound * 100 >= threshold * 100 - 0.5 - 1e-9) & self.nonempty
+        for token in token_set:
+            mask[self.token_postings.get(token, [])] = True
+        return np.flatnonzero(mask & self.nonempty)
+
+    def _score_unique(self, query, threshold):
+        query = self.processor(query) if self.processor else query
+        query_tokens = full_process(query, force_ascii=True)
+
+        candidates = range(len(self.processed)) if np is None else self._candidates(query, query_tokens, threshold)
+
+        scores = [0] * len(self.processed)
+        for position in candidates:
+            choice = self.processed[position]
+            if not choice:
+                continue
+            score = fuzz.partial_ratio(query, choice)
+            choice_tokens = self.token_keys[position]
+            if score < 100 and query_tokens and choice_tokens:
+                score = max(score, fuzz.token_set_ratio(query_tokens, choice_tokens, full_process=False))
+            scores[position] = score
+        return scores
+
+    def scores(self, query, threshold=0.0):
+        """
+        Returns the similarity (0-1) of the query to every choice, aligned with the choices.
+        Choices that provably score below threshold may be reported as 0.
+        """
+        unique_scores = self._score_unique(query, threshold)
+        if np is not None:
+            return np.asarray(unique_scores, dtype=np.float64)[self.codes] / 100.0
+        return [unique_scores[code] / 100.0 for code in self.codes]
+
+    def top_k(self, query, k=10, threshold=0.0):
+        """Returns up to k (position, similarity) pairs with similarity >= threshold, best first."""
+        return top_k(self.scores(query, threshold), k=k, threshold=threshold)
+
+def top_k(scores, k=10, threshold=0.0):
+    """
+    Selects up to k (position, score) pairs with score >= threshold from an array of scores,
+    highest first. Equal scores keep their original order.
+    """
+    if np is not None:
+        scores = np.asarray(scores, dtype=np.float64)
+        positions = np.flatnonzero(scores >= threshold)
+        order = np.argsort(-scores[positions], kind="stable")[:k]
+        return [(int(position), float(scores[position])) for position in positions[order]]
+
+    matches = [(position, score) for position, score in enumerate(scores) if score >= threshold]
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[:k]
+
+def max_scores(*score_arrays):
+    """Element-wise maximum of several aligned score arrays."""
+    if np is not None:
+        return np.maximum.reduce([np.asarray(scores, dtype=np.float64) for scores in score_arrays])
+    return [max(scores) for scores in zip(*score_arrays)]
@@ -0,0 +1,54 @@
+# benchmarks/batch_scoring_benchmark.py
+"""
+Per-query latency of BatchScorer against the per-record scoring loop it replaced.
+
+Usage: python benchmarks/batch_scoring_benchmark.py [size ...]   (default: 1000 10000 100000)
+"""
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore", message="Using slow pure-python SequenceMatcher")
+
+from fuzzywuzzy import fuzz
+from batch_scoring import BatchScorer
+
+WORDS = ["gorilla", "glue", "blue", "dream", "pink", "kush", "ghost", "train", "haze", "lemon",
+         "skunk", "wedding", "cake", "jack", "herer", "master", "amnesia", "white", "widow", "og"]
+QUERIES = ["gorila glue", "pink kush", "ghost trian haze", "zzzz"]
+
+def make_names(size, seed=0):
+    rng = random.Random(seed)
+    return [f"{' '.join(rng.sample(WORDS, rng.randint(1, 3)))} {rng.randint(1, size)}" for _ in range(size)]
+
+def loop_top_k(query, names, threshold=0.8, k=10):
+    matches = []
+    for position, name in enumerate(names):
+        similarity = max(fuzz.token_set_ratio(query, name) / 100.0, fuzz.partial_ratio(query, name) / 100.0)
+        if similarity >= threshold:
+            matches.append((position, similarity))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[:k]
+
+def time_per_query(func):
+    start = time.perf_counter()
+    for query in QUERIES:
+        func(query)
+    return (time.perf_counter() - start) / len(QUERIES) * 1000
+
+def main(sizes):
+    print(f"{'candidates':>10} {'build ms':>10} {'batch ms/q':>11} {'loop ms/q':>10}")
+    for size in sizes:
+        names = make_names(size)
+        start = time.perf_counter()
+        scorer = BatchScorer(names)
+        build_ms = (time.perf_counter() - start) * 1000
+        batch_ms = time_per_query(lambda query: scorer.top_k(query, k=10, threshold=0.8))
+        loop_ms = time_per_query(lambda query: loop_top_k(query, names))
+        print(f"{size:>10} {build_ms:>10.1f} {batch_ms:>11.1f} {loop_ms:>10.1f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,191 @@
+# benchmarks/hot_paths_benchmark.py
+"""
+Latency of the matching and listing hot paths on synthetic datasets, written to a JSON
+report that can be compared between commits.
+
+For every dataset size, times find_matching_strains, find_matching_clinics, get_best_match
+and detect_producer on exact, typo, ascii (typed without Polish characters), loose (also
+without punctuation) and miss queries, and the embed building behind /listaodmian (unfiltered and for one producer) and
+/listaklinik. For the matchers the
+report also records how many queries were answered by the exact stage.
+
+Usage: python benchmarks/hot_paths_benchmark.py [--sizes 100 1000 ...] [--queries N]
+       [--output report.json] [--compare old_report.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore", message="Using slow pure-python SequenceMatcher")
+
+from synthetic_data import CITIES, make_strains, make_clinics
+from utils import get_best_match
+from strains_utils import StrainIndex, find_matching_strains, detect_producer, build_strain_list_embeds
+from clinic_utils import ClinicIndex, find_matching_clinics, build_clinic_list_embeds
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+MISS_QUERIES = ["xyzzy", "qwerty asdf", "zzzz 000", "brak takiej odmiany"]
+# Slowdown (new / old) above which --compare flags a result
+REGRESSION_RATIO = 1.2
+
+ASCII_FOLD = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+
+def make_typo(rng, text):
+    """Drops, doubles or swaps one letter of the text."""
+    if len(text) < 4:
+        return text + text[-1:]
+    position = rng.randrange(1, len(text) - 2)
+    kind = rng.choice(["drop", "double", "swap"])
+    if kind == "drop":
+        return text[:position] + text[position + 1:]
+    if kind == "double":
+        return text[:position] + text[position] + text[position:]
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+def make_queries(rng, names, count):
+    """Exact, typo, ascii, loose and miss queries built from existing names."""
+    picked = [rng.choice(names) for _ in range(count)]
+    return {
+        "exact": picked,
+        "typo": [make_typo(rng, name) for name in picked],
+        "ascii": [name.translate(ASCII_FOLD).lower() for name in picked],
+        "loose": [" ".join(re.sub(r"[^\w\s]", " ", name.translate(ASCII_FOLD).lower()).split()) for name in picked],
+        "miss": (MISS_QUERIES * count)[:count],
+    }
+
+def time_calls(func, args_list):
+    """Runs func once per argument. Returns ({"median_ms", "mean_ms"}, results)."""
+    timings = []
+    results = []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(func(*args))
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "mean_ms": statistics.fmean(timings)}, results
+
+def time_once(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return {"median_ms": (time.perf_counter() - start) * 1000}
+
+def bench_matcher(matcher, index, queries):
+    results = {}
+    for kind, kind_queries in queries.items():
+        timing, outcomes = time_calls(lambda query: matcher(query, index), [(query,) for query in kind_queries])
+        timing["exact_hit_rate"] = sum(1 for _, is_exact in outcomes if is_exact) / len(outcomes)
+        timing["found_rate"] = sum(1 for matches, _ in outcomes if matches) / len(outcomes)
+        results[kind] = timing
+    return results
+
+def bench_size(size, query_count, seed=0):
+    rng = random.Random(seed)
+    strains_data = make_strains(size, seed)
+    clinics_data = make_clinics(size, seed)
+    report = {}
+
+    start = time.perf_counter()
+    strain_index = StrainIndex(strains_data)
+    report["build_strain_index"] = {"median_ms": (time.perf_counter() - start) * 1000}
+    start = time.perf_counter()
+    clinic_index = ClinicIndex(clinics_data)
+    report["build_clinic_index"] = {"median_ms": (time.perf_counter() - start) * 1000}
+
+    strain_queries = make_queries(rng, [strain["strain_name"] for strain in strains_data], query_count)
+    clinic_queries = make_queries(rng, CITIES, query_count)
+
+    report["find_matching_strains"] = bench_matcher(find_matching_strains, strain_index, strain_queries)
+    report["find_matching_clinics"] = bench_matcher(find_matching_clinics, clinic_index, clinic_queries)
+
+    report["get_best_match"] = {}
+    for kind, kind_queries in strain_queries.items():
+        report["get_best_match"][kind], _ = time_calls(
+            lambda query: get_best_match(query, strain_index.choices, ngram_index=strain_index.choice_index),
+            [(query,) for query in kind_queries])
+
+    product_names = [strain["product_name"] for strain in strains_data]
+    start = time.perf_counter()
+    for product_name in product_names:
+        detect_producer(product_name)
+    report["detect_producer"] = {"mean_us": (time.perf_counter() - start) / len(product_names) * 1e6}
+
+    report["build_strain_list_embeds"] = time_once(build_strain_list_embeds, strain_index)
+    report["build_strain_list_embeds_one_producer"] = time_once(build_strain_list_embeds, strain_index, [], ["Tilray"])
+    report["build_clinic_list_embeds"] = time_once(build_clinic_list_embeds, clinic_index)
+    return report
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(report, prefix=""):
+    """Yields (metric path, value) for every timing in a report."""
+    for key, value in report.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif key.endswith("_ms") or key.endswith("_us"):
+            yield path, value
+
+def compare(new_results, old_results):
+    """Prints new/old ratios of every timing present in both reports and returns the regressed metrics."""
+    old = dict(flatten(old_results))
+    regressions = []
+    print(f"{'metric':<70} {'old':>10} {'new':>10} {'ratio':>7}")
+    for path, value in flatten(new_results):
+        if path not in old or not old[path]:
+            continue
+        ratio = value / old[path]
+        flag = " !" if ratio > REGRESSION_RATIO else ""
+        if flag:
+            regressions.append(path)
+        print(f"{path:<70} {old[path]:>10.3f} {value:>10.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the matching and listing hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--queries", type=int, default=20, help="Queries of each kind per dataset size")
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--compare", help="Earlier report to compare the results with")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"Benchmarking {size} records...")
+        results[str(size)] = bench_size(size, args.queries)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "queries": args.queries,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old_report = json.load(f)
+        regressions = compare(results, old_report["results"])
+        if regressions:
+            print(f"{len(regressions)} timings slower by more than {REGRESSION_RATIO}x")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
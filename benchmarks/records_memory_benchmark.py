@@ -0,0 +1,83 @@
+# benchmarks/records_memory_benchmark.py
+"""
+Memory per strain record as a JSON dict vs a StrainRecord, and bytes allocated per
+fuzzy query when results are returned as copied dicts vs (position, score) pairs.
+
+Usage: python benchmarks/records_memory_benchmark.py [size ...]   (default: 10000 100000)
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore", message="Using slow pure-python SequenceMatcher")
+
+from records import StrainRecord
+from strains_utils import StrainIndex
+
+PRODUCERS = ["Tilray", "Aurora", "S-LAB", "Four20 Pharma", "Cantourage", "Medezin"]
+NAMES = ["Gorilla Glue #4", "Blue Dream", "Pink Kush", "Ghost Train Haze", "Lemon Skunk", "Wedding Cake"]
+
+def make_json(size, seed=0):
+    rng = random.Random(seed)
+    strains = []
+    for number in range(size):
+        name = f"{rng.choice(NAMES)} {number}"
+        strains.append({
+            "strain_name": name,
+            "product_name": f"{rng.choice(PRODUCERS)} {name} 10g",
+            "strain_type": rng.choice(["Indica", "Sativa", "Hybryda"]),
+            "thc_content": rng.choice(["18%", "20%", "22%", "<1%"]),
+            "cbd_content": rng.choice(["<1%", "1%", "10%"]),
+            "availability": rng.choice(["Wysoka", "Niska", "Brak", "Wycofany"]),
+            "strain_url": f"https://example.com/{number}",
+        })
+    return json.dumps(strains)
+
+def measure(build):
+    """Bytes still allocated by the object returned from build()."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+def query_allocations(func):
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main(sizes):
+    print(f"{'records':>8} {'dict B/rec':>11} {'slots B/rec':>12} {'copy-dicts B/q':>15} {'pairs B/q':>10}")
+    for size in sizes:
+        raw = make_json(size)
+        dicts, dict_bytes = measure(lambda: json.loads(raw))
+        records, record_bytes = measure(lambda: [StrainRecord.from_dict(strain) for strain in json.loads(raw)])
+
+        # Results of the last fuzzy stage, which used to copy every matched dict to add "similarity"
+        index = StrainIndex(records)
+        matches = index.name_scorer.top_k("blue dream", k=10, threshold=0.5)
+
+        def copied_dicts():
+            results = []
+            for position, similarity in matches:
+                strain_copy = dicts[position].copy()
+                strain_copy["similarity"] = similarity
+                results.append(strain_copy)
+            return results
+
+        copy_bytes = query_allocations(copied_dicts)
+        pair_bytes = query_allocations(lambda: list(matches))
+        print(f"{size:>8} {dict_bytes / size:>11.0f} {record_bytes / size:>12.0f} {copy_bytes:>15} {pair_bytes:>10}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
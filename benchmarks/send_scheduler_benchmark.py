@@ -0,0 +1,90 @@
+# benchmarks/send_scheduler_benchmark.py
+"""
+Bursts of messages sent through SendScheduler against sending them directly, over the local fake
+of Discord's HTTP layer from tests/fake_http.py (a rate-limit bucket of LIMIT requests per WINDOW
+seconds per channel).
+
+Usage: python benchmarks/send_scheduler_benchmark.py [burst ...]   (default: 10 50 200)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+
+import discord
+from send_scheduler import SendScheduler, retry_after_of
+from fake_http import FakeHTTP
+
+LIMIT = 5
+WINDOW = 0.25
+LATENCY = 0.01
+CHANNELS = 4
+# Messages arrive on each channel every ARRIVAL seconds; every fourth is an embed
+# (embeds and text are never merged), the rest are text lines
+ARRIVAL = 0.005
+EMBED_EVERY = 4
+
+def burst(size):
+    messages = []
+    for i in range(size):
+        if i % EMBED_EVERY == EMBED_EVERY - 1:
+            message = {"embeds": [discord.Embed(title=f"Odmiana {i}", description="x" * 200)]}
+        else:
+            message = {"content": f"linia {i} " + "x" * 190}
+        messages.append(message)
+    return messages
+
+async def arriving(delay, send):
+    await asyncio.sleep(delay)
+    return await send()
+
+async def send_directly(http, channel, message):
+    # What every caller does on its own without the scheduler: retry after each 429
+    while True:
+        try:
+            return await http.send(channel, **message)
+        except discord.HTTPException as e:
+            await asyncio.sleep(retry_after_of(e))
+
+async def run_direct(size):
+    http = FakeHTTP(LIMIT, WINDOW, LATENCY)
+    start = time.perf_counter()
+    await asyncio.gather(*(arriving(i * ARRIVAL, lambda channel=channel, message=message: send_directly(http, channel, message))
+                           for channel in range(CHANNELS) for i, message in enumerate(burst(size))))
+    return http, time.perf_counter() - start, 0
+
+async def run_scheduled(size):
+    http = FakeHTTP(LIMIT, WINDOW, LATENCY)
+    scheduler = SendScheduler()
+    max_depth = 0
+
+    async def watch_depth():
+        nonlocal max_depth
+        while True:
+            max_depth = max(max_depth, *(scheduler.depth(("channel", channel)) for channel in range(CHANNELS)))
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.ensure_future(watch_depth())
+    start = time.perf_counter()
+    await asyncio.gather(*(arriving(i * ARRIVAL, lambda channel=channel, message=message: scheduler.submit(
+                               ("channel", channel), lambda **message: http.send(channel, **message), message,
+                               target=channel))
+                           for channel in range(CHANNELS) for i, message in enumerate(burst(size))))
+    elapsed = time.perf_counter() - start
+    watcher.cancel()
+    return http, elapsed, max_depth
+
+def main(sizes):
+    print(f"{CHANNELS} channels, bucket {LIMIT} requests / {WINDOW}s, {LATENCY * 1000:.0f} ms per request")
+    print(f"{'burst':>6} {'mode':>10} {'elapsed s':>10} {'requests':>9} {'429s':>6} {'delivered':>11} {'max depth':>10}")
+    for size in sizes:
+        for mode, run in (("direct", run_direct), ("scheduler", run_scheduled)):
+            http, elapsed, max_depth = asyncio.run(run(size))
+            print(f"{size:>6} {mode:>10} {elapsed:>10.2f} {http.requests:>9} {http.rate_limited:>6} "
+                  f"{http.delivered:>5}/{size * CHANNELS:<5} {max_depth:>10}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 50, 200])
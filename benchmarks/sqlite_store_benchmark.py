@@ -0,0 +1,51 @@
+# benchmarks/sqlite_store_benchmark.py
+"""
+Load time of the JSON and SQLite backends (first import and restart with unchanged files),
+and a check that both backends give the same fuzzy candidates.
+
+Usage: python benchmarks/sqlite_store_benchmark.py [size ...]   (default: 1000 10000 50000)
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore", message="Using slow pure-python SequenceMatcher")
+logging.disable(logging.INFO)
+
+from synthetic_data import write_dataset
+from data_manager import DataManager
+from sqlite_store import CatalogueStore
+
+QUERIES = ["gorila glue", "pink kush", "ghost trian haze", "lemon skunk 12", "zzzz"]
+
+def timed_load(strains_path, clinics_path, store=None):
+    start = time.perf_counter()
+    manager = DataManager(strains_path, clinics_path, store=store)
+    manager.load()
+    return manager, time.perf_counter() - start
+
+def shortlists(manager):
+    choice_index = manager.snapshot.strain_index.choice_index
+    return [choice_index.shortlist(query) for query in QUERIES]
+
+def main(sizes):
+    print(f"{'records':>8} {'json s':>7} {'import s':>9} {'restart s':>10} {'db MB':>6} {'same':>5}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            strains_path, clinics_path = write_dataset(size, directory)
+            db_path = os.path.join(directory, "catalogue.sqlite")
+            manager, json_s = timed_load(strains_path, clinics_path)
+            _, import_s = timed_load(strains_path, clinics_path, CatalogueStore(db_path))
+            stored, restart_s = timed_load(strains_path, clinics_path, CatalogueStore(db_path))
+            # Until a checkpoint, part of the data is still in the write-ahead log
+            db_mb = sum(os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path)) / 1e6
+            same = shortlists(manager) == shortlists(stored)
+            print(f"{size:>8} {json_s:>7.2f} {import_s:>9.2f} {restart_s:>10.2f} {db_mb:>6.1f} {str(same):>5}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
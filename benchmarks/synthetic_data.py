@@ -0,0 +1,93 @@
+# benchmarks/synthetic_data.py
+"""
+Synthetic strains_alt.json / clinic_data.json datasets for the benchmarks.
+
+Strains are spread over the producers from PRODUCER_KEYWORDS (plus a few unknown ones),
+clinics over Polish cities with the address formats found in the real data.
+
+Usage: python benchmarks/synthetic_data.py size output_dir [seed]
+"""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strains_utils import PRODUCER_KEYWORDS
+
+UNKNOWN_PRODUCERS = ["Greenfield", "Medicanna", "Bedrocan"]
+STRAIN_WORDS = ["Gorilla", "Glue", "Blue", "Dream", "Pink", "Kush", "Ghost", "Train", "Haze", "Lemon",
+                "Skunk", "Wedding", "Cake", "Jack", "Herer", "Master", "Amnesia", "White", "Widow", "OG",
+                "Northern", "Lights", "Sour", "Diesel", "Gelato", "Runtz", "Zkittlez", "Critical"]
+STRAIN_TYPES = ["Indica", "Sativa", "Hybryda"]
+AVAILABILITY = ["wysoka", "średnia", "niska", "brak", "wycofany", "Brak informacji"]
+
+CITIES = ["Warszawa", "Kraków", "Łódź", "Wrocław", "Poznań", "Gdańsk", "Szczecin", "Bydgoszcz",
+          "Lublin", "Białystok", "Katowice", "Gdynia", "Częstochowa", "Radom", "Toruń", "Sosnowiec",
+          "Kielce", "Rzeszów", "Gliwice", "Zabrze", "Olsztyn", "Bielsko-Biała", "Bytom", "Zielona Góra",
+          "Rybnik", "Ruda Śląska", "Opole", "Tychy", "Gorzów Wielkopolski", "Elbląg", "Płock", "Wałbrzych"]
+STREETS = ["Marszałkowska", "Długa", "Piotrkowska", "Świętokrzyska", "Grunwaldzka", "Mickiewicza",
+           "Słowackiego", "Kościuszki", "Żeromskiego", "3 Maja", "Jana Pawła II", "Wojska Polskiego"]
+NETWORKS = ["Kanna", "Medi", "Konopny Doktor", "Cannabis Clinic", "Zielona Przychodnia", "Medyczna Marihuana"]
+
+def make_strain(rng, number):
+    name = f"{' '.join(rng.sample(STRAIN_WORDS, rng.randint(1, 3)))}"
+    if rng.random() < 0.3:
+        name += f" #{rng.randint(1, 9)}"
+    name += f" {number}"
+    producer = rng.choice(list(PRODUCER_KEYWORDS) + UNKNOWN_PRODUCERS)
+    thc = rng.randint(10, 30)
+    return {
+        "strain_name": name,
+        "product_name": f"{producer} {name} {thc}/1",
+        "strain_type": rng.choice(STRAIN_TYPES),
+        "thc_content": f"{thc}%",
+        "cbd_content": f"{rng.choice(['<1', '1', '2'])}%",
+        "availability": rng.choice(AVAILABILITY),
+        "strain_url": f"https://example.com/strain/{number}",
+    }
+
+def make_clinic(rng, number):
+    city = rng.choice(CITIES)
+    street = f"ul. {rng.choice(STREETS)} {rng.randint(1, 200)}"
+    # Both address formats found in the real data: "City, street" and "street, postcode City"
+    if rng.random() < 0.7:
+        address = f"{city}, {street}"
+    else:
+        address = f"{street}, {rng.randint(10, 99)}-{rng.randint(100, 999)} {city}"
+    return {
+        "title": f"{rng.choice(NETWORKS)} – {city}" if rng.random() < 0.9 else f"Gabinet {number}",
+        "address": address,
+        "phone": f"+48 {rng.randint(100, 999)} {rng.randint(100, 999)} {rng.randint(100, 999)}",
+        "clinic_url": f"https://example.com/clinic/{number}",
+        "description": "Konsultacje w zakresie terapii medyczną marihuaną.",
+        "doctors": [f"lek. Lekarz {number}-{i}" for i in range(rng.randint(0, 3))],
+    }
+
+def make_strains(size, seed=0):
+    rng = random.Random(seed)
+    return [make_strain(rng, number) for number in range(size)]
+
+def make_clinics(size, seed=0):
+    rng = random.Random(seed)
+    return [make_clinic(rng, number) for number in range(size)]
+
+def write_dataset(size, output_dir, seed=0):
+    """Writes strains_alt.json and clinic_data.json with `size` records each. Returns their paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for filename, records in (("strains_alt.json", make_strains(size, seed)),
+                              ("clinic_data.json", make_clinics(size, seed))):
+        path = os.path.join(output_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    for path in write_dataset(int(sys.argv[1]), sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 0):
+        print(path)
@@ -1,45 +1,75 @@
 # bot.py
+import asyncio
+import sqlite3
 import discord
 from discord.ext import commands
 import logging
-import os
+import config
 from config import BOT_TOKEN, TEST_GUILD_ID, JSON_FILE_PATH, CLINICS_FILE_PATH, LOG_LEVEL
-from data_loader import load_strains_data, load_clinics_data
+from data_manager import DataManager
+from sqlite_store import CatalogueStore
 from strains_commands import register_strain_commands
 from clinic_commands import register_clinic_commands
 from utils import ensure_file_exists
-
-# --- Ensure logs directory exists ---
-if not os.path.exists("logs"):
-    os.makedirs("logs")
+from executor import configure_executor
+from cache import configure_caches
+from responses import configure_responses
+from send_scheduler import configure_send_scheduler
+from admission import configure_admission
+from logging_setup import setup_logging
+from command_sync import sync_commands
+from metrics import start_metrics_server
 
 # --- Setup Logging ---
-logging.basicConfig(
+# Log records go through a queue to a background thread, so slow disk writes never block the event loop
+setup_logging(
     level=LOG_LEVEL,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("logs/bot.log", encoding='utf-8')
-    ]
+    max_bytes=getattr(config, "LOG_MAX_BYTES", 5 * 1024 * 1024),
+    backup_count=getattr(config, "LOG_BACKUP_COUNT", 5),
+    when=getattr(config, "LOG_ROTATE_WHEN", None),
 )
 logger = logging.getLogger('cannabis_clinic_bot')
 
+# --- Executor and result caches (optional settings, older config.py files lack them) ---
+configure_executor(
+    kind=getattr(config, "EXECUTOR_KIND", "thread"),
+    max_workers=getattr(config, "EXECUTOR_WORKERS", 4),
+    max_queue=getattr(config, "EXECUTOR_QUEUE_SIZE", 32),
+    timeout=getattr(config, "EXECUTOR_TIMEOUT", 10.0),
+)
+configure_caches(
+    maxsize=getattr(config, "CACHE_MAX_SIZE", 512),
+    ttl=getattr(config, "CACHE_TTL", 3600),
+)
+configure_responses(budget=getattr(config, "RESPONSE_BUDGET", 1.0))
+configure_send_scheduler(
+    route_concurrency=getattr(config, "SEND_ROUTE_CONCURRENCY", 1),
+    global_concurrency=getattr(config, "SEND_GLOBAL_CONCURRENCY", 8),
+)
+configure_admission(
+    global_limit=getattr(config, "ADMISSION_GLOBAL_LIMIT", 4),
+    guild_limit=getattr(config, "ADMISSION_GUILD_LIMIT", 2),
+    max_waiting=getattr(config, "ADMISSION_MAX_WAITING", 20),
+    max_wait=getattr(config, "ADMISSION_MAX_WAIT", 120.0),
+)
+
 # --- Ensure Required Files Exist ---
 ensure_file_exists(JSON_FILE_PATH, default_content="[]")
 ensure_file_exists(CLINICS_FILE_PATH, default_content="[]")
 
 # --- Load Data ---
-try:
-    strains_data = load_strains_data(JSON_FILE_PATH) or []
-except Exception as e:
-    logger.error(f"Error loading strains data: {e}")
-    strains_data = []
+# Optional SQLite backend; the JSON files stay the source of the data and are imported when they change
+store = None
+if getattr(config, "STORAGE_BACKEND", "json") == "sqlite":
+    try:
+        store = CatalogueStore(getattr(config, "SQLITE_PATH", "catalogue.sqlite"))
+    except sqlite3.Error as e:
+        logger.error(f"Could not open the SQLite database, reading the JSON files directly: {e}")
 
-try:
-    clinics_data = load_clinics_data(CLINICS_FILE_PATH) or []
-except Exception as e:
-    logger.error(f"Error loading clinics data: {e}")
-    clinics_data = []
+# The data manager holds the current snapshot (data + indexes) and reloads the files when they change
+data_manager = DataManager(JSON_FILE_PATH, CLINICS_FILE_PATH,
+                           poll_interval=getattr(config, "DATA_RELOAD_INTERVAL", 30), store=store)
+data_manager.load()
 
 # --- Discord Bot Setup ---
 intents = discord.Intents.default()
@@ -47,35 +77,43 @@ intents.message_content = True
 client = commands.Bot(command_prefix="!", intents=intents)
 tree = client.tree
 
-@client.event
-async def on_ready():
-    print(f"Zalogowano jako {client.user}.")
-    logger.info(f"Zalogowano jako {client.user}.")
-    
-    test_guild = discord.Object(id=TEST_GUILD_ID) if TEST_GUILD_ID else None
+# --- Commands ---
+# Registered once per process; on_ready fires again on every reconnect and must not re-register them
+register_strain_commands(client, tree, data_manager)
+register_clinic_commands(client, tree, data_manager)
 
-    try:
-        logger.info("Clearing all commands before registration...")
-        client.tree.clear_commands(guild=None)
-        if test_guild:
-            client.tree.clear_commands(guild=test_guild)
+@client.event
+async def setup_hook():
+    # Runs once per process (not on every reconnect), so the file watcher is started only once
+    client.data_watcher = asyncio.create_task(data_manager.watch())
 
-        logger.info("Registering commands...")
-        register_strain_commands(client, tree, strains_data)
-        register_clinic_commands(client, tree, clinics_data)
+    # Optional Prometheus endpoint, bound to localhost unless configured otherwise
+    metrics_port = getattr(config, "METRICS_PORT", None)
+    if metrics_port:
+        try:
+            client.metrics_server = await start_metrics_server(getattr(config, "METRICS_HOST", "127.0.0.1"), metrics_port)
+        except OSError as e:
+            logger.error(f"Could not start the metrics endpoint: {e}")
 
-        logger.info("Syncing commands with Discord...")
+    # Discord is only called when the command schema differs from the last synced one
+    test_guild = discord.Object(id=TEST_GUILD_ID) if TEST_GUILD_ID else None
+    state_path = getattr(config, "COMMAND_SYNC_STATE_FILE", "command_sync.json")
+    try:
         if test_guild:
-            await client.tree.sync(guild=test_guild)
-        await client.tree.sync()
-        logger.info("Commands synced successfully.")
+            await sync_commands(tree, client.application_id, guild=test_guild, state_path=state_path)
+        await sync_commands(tree, client.application_id, state_path=state_path)
     except Exception as e:
-        logger.error(f"Error during command registration or syncing: {e}")
+        logger.error(f"Error during command syncing: {e}")
+
+@client.event
+async def on_ready():
+    logger.info(f"Zalogowano jako {client.user}.")
 
 if __name__ == "__main__":
     try:
         logger.info("Starting Discord bot...")
-        client.run(BOT_TOKEN)
+        # log_handler=None: discord.py logs go through the root logger queue instead of its own console handler
+        client.run(BOT_TOKEN, log_handler=None)
     except discord.errors.LoginFailure:
         logger.error("Invalid Discord token. Please check your token in config.py")
         exit(1)
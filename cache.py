@@ -0,0 +1,100 @@
+# cache.py
+import time
+from collections import OrderedDict, namedtuple
+import discord
+
+# Wynik wyszukiwania zapisany w cache: zapytanie w oryginalnej postaci, dopasowania i gotowa odpowiedź
+CachedLookup = namedtuple("CachedLookup", ["query", "matches", "is_exact", "payload"])
+
+_caches = {}
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire `ttl` seconds after being stored.
+
+    Used from the event loop only, so no locking is done. Hits and misses are counted
+    (an expired entry counts as a miss).
+
+    Args:
+        name (str): Name under which the cache is registered for clear_caches() and cache_stats().
+        maxsize (int): Maximum number of entries; the least recently used one is evicted first.
+        ttl (float): Lifetime of an entry in seconds (None for no expiry).
+    """
+
+    def __init__(self, name, maxsize=512, ttl=3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        _caches[name] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def configure_caches(maxsize=512, ttl=3600.0):
+    """Applies size and TTL settings to all registered caches (entries already stored keep their expiry)."""
+    for cache in _caches.values():
+        cache.maxsize = maxsize
+        cache.ttl = ttl
+        while len(cache._entries) > maxsize:
+            cache._entries.popitem(last=False)
+
+def clear_caches():
+    """Clears all registered caches. Must be called whenever the data is reloaded."""
+    for cache in _caches.values():
+        cache.clear()
+
+def cache_stats():
+    """Returns the stats of every registered cache by name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+def serialize_message(message):
+    """Converts send() arguments to a cacheable payload (embeds are stored as dicts)."""
+    payload = dict(message)
+    if payload.get("embed") is not None:
+        payload["embed"] = payload["embed"].to_dict()
+    return payload
+
+def deserialize_message(payload):
+    """Rebuilds send() arguments from a payload created by serialize_message."""
+    message = dict(payload)
+    if message.get("embed") is not None:
+        message["embed"] = discord.Embed.from_dict(message["embed"])
+    return message
@@ -1,50 +1,71 @@
 # clinic_commands.py
+import logging
 import discord
+from discord import app_commands
 from discord.ext import commands
 from clinic_utils import get_clinic_info, list_all_clinics
+from autocomplete import MAX_CHOICE_LENGTH
+from metrics import track_command, COMMAND_ERRORS
+from responses import send_response
 
-def register_clinic_commands(client, tree, clinics_data):
-    """Rejestruje komendy związane z klinikami."""
+logger = logging.getLogger('cannabis_clinic_bot.commands')
+
+def register_clinic_commands(client, tree, data_manager):
+    """
+    Rejestruje komendy związane z klinikami.
+    Dane są odczytywane z bieżącej migawki data_manager przy każdym wywołaniu, więc przeładowanie nie wymaga restartu.
+    """
 
     @client.command(name="klinika", help="Wyświetla informacje o klinikach w podanej lokalizacji.")
     async def clinic_prefix(ctx, *, lokalizacja: str = None):
-        if lokalizacja is None:
-            await ctx.send("Proszę podać lokalizację kliniki. Użyj: `!klinika [nazwa miasta]`")
-            return
+        with track_command("!klinika", guild=ctx.guild.id if ctx.guild else None):
+            if lokalizacja is None:
+                await ctx.send("Proszę podać lokalizację kliniki. Użyj: `!klinika [nazwa miasta]`")
+                return
             
-        # Clean up the input
-        lokalizacja = lokalizacja.strip()
-        if not lokalizacja:
-            await ctx.send("Proszę podać poprawną lokalizację. Użyj: `!klinika [nazwa miasta]`")
-            return
+            # Clean up the input
+            lokalizacja = lokalizacja.strip()
+            if not lokalizacja:
+                await ctx.send("Proszę podać poprawną lokalizację. Użyj: `!klinika [nazwa miasta]`")
+                return
             
-        await get_clinic_info(ctx, lokalizacja, clinics_data, ephemeral=False)
+            await get_clinic_info(ctx, lokalizacja, data_manager.snapshot.clinic_index, ephemeral=False)
 
     @client.command(name="listaklinik", help="Wyświetla listę wszystkich dostępnych klinik.")
     async def clinic_list_prefix(ctx):
-        await list_all_clinics(ctx, clinics_data, ephemeral=False)
+        with track_command("!listaklinik", guild=ctx.guild.id if ctx.guild else None):
+            await list_all_clinics(ctx, data_manager.snapshot.clinic_index, ephemeral=False)
 
     @tree.command(name="listaklinik", description="Wyświetla listę wszystkich dostępnych klinik.")
     async def clinic_list_command(interaction: discord.Interaction):
-        try:
-            await interaction.response.defer(ephemeral=True)
-            await list_all_clinics(interaction, clinics_data, ephemeral=True)
-        except Exception as e:
-            print(f"Error in /listaklinik: {e}")
+        with track_command("/listaklinik", guild=interaction.guild_id):
             try:
-                await interaction.followup.send("Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.", ephemeral=True)
-            except:
-                print("Failed to send error message")
+                await list_all_clinics(interaction, data_manager.snapshot.clinic_index, ephemeral=True)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/listaklinik")
+                logger.exception(f"Error in /listaklinik: {e}", extra={"command": "/listaklinik", "guild": interaction.guild_id})
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/listaklinik", "guild": interaction.guild_id})
 
     @tree.command(name="klinika", description="Wyświetla informacje o klinikach w podanej lokalizacji.")
     async def clinic_command(interaction: discord.Interaction, lokalizacja: str):
-        try:
-            await interaction.response.defer(ephemeral=True)
-            await get_clinic_info(interaction, lokalizacja, clinics_data, ephemeral=True)
-        except Exception as e:
-            print(f"Error in /klinika: {e}")
+        with track_command("/klinika", guild=interaction.guild_id):
             try:
-                await interaction.followup.send("Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.", ephemeral=True)
-            except:
-                print("Failed to send error message")
+                await get_clinic_info(interaction, lokalizacja, data_manager.snapshot.clinic_index, ephemeral=True)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/klinika")
+                logger.exception(f"Error in /klinika: {e}", extra={"command": "/klinika", "guild": interaction.guild_id})
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/klinika", "guild": interaction.guild_id})
 
+    @clinic_command.autocomplete("lokalizacja")
+    async def clinic_location_autocomplete(interaction: discord.Interaction, current: str):
+        # Served from the prefix index built at load, cheap enough to run on every keystroke
+        cities = data_manager.snapshot.clinic_index.suggest(current)
+        return [app_commands.Choice(name=city[:MAX_CHOICE_LENGTH], value=city[:MAX_CHOICE_LENGTH]) for city in cities]
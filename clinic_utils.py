@@ -1,114 +1,95 @@
 # clinic_utils.py
+import functools
+import itertools
+from collections import namedtuple
 import discord
-from discord.ext import commands
 from difflib import SequenceMatcher
-from utils import get_best_match
-
-async def list_clinics(ctx_or_interaction, clinics_data):
+from utils import get_best_match, NgramIndex
+from batch_scoring import BatchScorer, max_scores, top_k
+from fuzzywuzzy.utils import full_process
+from embed_layout import layout_embeds
+from responses import send_response, send_embeds, run_within_budget
+from admission import run_admitted
+from single_flight import SingleFlight
+from metrics import MATCH_STAGE, STAGE_LATENCY
+from records import ClinicRecord
+from text_normalization import fold_key
+from autocomplete import PrefixIndex, MAX_SUGGESTIONS
+from cache import TTLCache, CachedLookup, serialize_message, deserialize_message
+
+# Wyniki /klinika według (wersja danych, znormalizowane zapytanie)
+clinic_info_cache = TTLCache("clinic_info")
+
+# Gotowe strony list klinik według (wersja danych, sposób grupowania)
+clinic_list_cache = TTLCache("clinic_list_pages")
+
+# Trwające obliczenia według tych samych kluczy co cache, wspólne dla jednoczesnych identycznych zapytań
+clinic_info_flights = SingleFlight("/klinika")
+clinic_list_flights = SingleFlight("/listaklinik")
+
+def build_network_list_embeds(clinic_index):
+    """Buduje embedy z listą klinik pogrupowanych według sieci. Działa synchronicznie, poza pętlą zdarzeń."""
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
+
+    # Sieci i miasta z tytułów są już wyciągnięte w indeksie
+    networks = {network_name: [(clinic_index.clinics[position], clinic_index.locations[position])
+                               for position in positions]
+                for network_name, positions in clinic_index.by_network.items()}
+
+    def network_rows():
+        for network_name, clinics in sorted(networks.items()):
+            for clinic, location in clinics:
+                address = clinic.get("address", "Brak adresu")
+                phone = clinic.get("phone", "Brak telefonu")
+                clinic_url = clinic.get("clinic_url", "#")
+
+                # Przygotuj wpis dla kliniki
+                if address == "N/A":
+                    address = "Brak informacji o adresie"
+
+                city_part = location.title_city or ""
+
+                clinic_entry = f"**{city_part}**\n"
+                clinic_entry += f"📍 {address}\n"
+                clinic_entry += f"📞 {phone}\n"
+                clinic_entry += f"🔗 [Link do strony]({clinic_url})\n\n"
+                yield network_name, clinic_entry
+
+    # Układ pól, embedów i wiadomości w granicach limitów Discorda
+    return layout_embeds(
+        network_rows(),
+        title="Dostępne Kliniki Konopne",
+        field_name=lambda network_name, part: f"__{network_name}__" if part == 0 else f"__{network_name} (część {part+1})__",
+        description="Lista wszystkich dostępnych klinik konopnych pogrupowana według sieci:",
+        continuation_title="Dostępne Kliniki Konopne (kontynuacja)",
+        footer="Dane klinik mogą ulec zmianie. Przed wizytą zaleca się kontakt telefoniczny w celu potwierdzenia dostępności i cen.",
+    )
+
+def build_network_list_pages(clinic_index):
+    """Builds the embeds of clinics grouped by network serialized to dicts, ready to be cached."""
+    with STAGE_LATENCY.time("list_build"):
+        return [embed.to_dict() for embed in build_network_list_embeds(clinic_index)]
+
+async def list_clinics(ctx_or_interaction, clinic_index):
     """Wyświetla listę dostępnych klinik."""
-    if not clinics_data:
-        if isinstance(ctx_or_interaction, discord.Interaction):
-            await ctx_or_interaction.followup.send("Brak dostępnych danych klinik.", ephemeral=True)
-        else:
-            await ctx_or_interaction.send("Brak dostępnych danych klinik.")
-        return
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
 
-    # Grupujemy kliniki według sieci/sieci
-    networks = {}
-    for clinic in clinics_data:
-        title = clinic.get("title", "Nieznana Klinika")
-        
-        # Wyciągamy nazwę sieci z tytułu (część przed myślnikiem)
-        if " – " in title:
-            network_name = title.split(" – ")[0].strip()
-        elif " - " in title:
-            network_name = title.split(" - ")[0].strip()
-        else:
-            network_name = "Inne Kliniki"
-
-        if network_name not in networks:
-            networks[network_name] = []
-
-        networks[network_name].append(clinic)
-
-    # Tworzymy listę embedów
-    embeds = []
-    current_embed = None
-    current_size = 0
-    MAX_EMBED_SIZE = 5800  # Zostawiamy margines bezpieczeństwa
-
-    # Funkcja pomocnicza do tworzenia nowego embeda
-    def create_new_embed(title="Dostępne Kliniki Konopne"):
-        embed = discord.Embed(
-            title=title,
-            color=discord.Color.green()
-        )
-        if title == "Dostępne Kliniki Konopne":
-            embed.description = "Lista wszystkich dostępnych klinik konopnych pogrupowana według sieci:"
-        return embed
-
-    current_embed = create_new_embed()
-
-    # Dodajemy pola dla każdej sieci klinik
-    for network_name, clinics in sorted(networks.items()):
-        network_clinics = []
-        current_field = ""
-
-        for clinic in clinics:
-            address = clinic.get("address", "Brak adresu")
-            phone = clinic.get("phone", "Brak telefonu")
-            clinic_url = clinic.get("clinic_url", "#")
-            
-            # Przygotuj wpis dla kliniki
-            if address == "N/A":
-                address = "Brak informacji o adresie"
-                
-            city_part = ""
-            if " – " in clinic.get("title", ""):
-                city_part = clinic.get("title", "").split(" – ")[1].strip()
-            elif " - " in clinic.get("title", ""):
-                city_part = clinic.get("title", "").split(" - ")[1].strip()
-            
-            clinic_entry = f"**{city_part}**\n"
-            clinic_entry += f"📍 {address}\n"
-            clinic_entry += f"📞 {phone}\n"
-            clinic_entry += f"🔗 [Link do strony]({clinic_url})\n\n"
-
-            if len(current_field + clinic_entry) > 1000:
-                network_clinics.append(current_field)
-                current_field = clinic_entry
-            else:
-                current_field += clinic_entry
-
-        if current_field:
-            network_clinics.append(current_field)
-
-        # Dodajemy pola dla sieci klinik
-        for i, field_content in enumerate(network_clinics):
-            field_name = f"__{network_name}__" if i == 0 else f"__{network_name} (część {i+1})__"
-            field_size = len(field_name) + len(field_content)
-
-            # Sprawdzamy, czy dodanie nowego pola nie przekroczy limitu
-            if current_size + field_size > MAX_EMBED_SIZE:
-                embeds.append(current_embed)
-                current_embed = create_new_embed("Dostępne Kliniki Konopne (kontynuacja)")
-                current_size = 0
-
-            current_embed.add_field(name=field_name, value=field_content, inline=False)
-            current_size += field_size
-
-    embeds.append(current_embed)
+    if not clinic_index:
+        await send_response(ctx_or_interaction, ephemeral=True, content="Brak dostępnych danych klinik.")
+        return
 
-    # Dodajemy stopkę do ostatniego embeda
-    embeds[-1].set_footer(text="Dane klinik mogą ulec zmianie. Przed wizytą zaleca się kontakt telefoniczny w celu potwierdzenia dostępności i cen.")
+    cache_key = (clinic_index.version, "networks")
+    pages = clinic_list_cache.get(cache_key)
+    if pages is None:
+        pages = await run_within_budget(ctx_or_interaction, build_network_list_pages, clinic_index, ephemeral=True,
+                                        flight=clinic_list_flights, flight_key=cache_key)
+        clinic_list_cache.set(cache_key, pages)
 
-    # Wysyłamy wszystkie embedy
-    if isinstance(ctx_or_interaction, discord.Interaction):
-        for embed in embeds:
-            await ctx_or_interaction.followup.send(embed=embed, ephemeral=True)
-    else:
-        for embed in embeds:
-            await ctx_or_interaction.send(embed=embed)
+    # Wysyłamy wszystkie embedy, po kilka w jednej wiadomości
+    embeds = [discord.Embed.from_dict(page) for page in pages]
+    await send_embeds(ctx_or_interaction, embeds, ephemeral=True)
 
 def get_similarity(a, b):
     """Calculate the similarity ratio between two strings."""
@@ -137,81 +118,165 @@ def extract_city_from_address(address):
     # If no comma or prefix, just return the whole address as we can't reliably extract the city
     return address.strip()
 
-def find_matching_clinics(location_query, clinics_data, threshold=0.65):
-    """Find clinics that match the location query with fuzzy matching."""
-    if not location_query or not clinics_data:
+def build_clinic_records(clinics_data):
+    """
+    Converts the loaded clinics to compact ClinicRecords, extracting the city from the address
+    when the data has none (done once at load instead of on every query).
+    """
+    records = []
+    for clinic in clinics_data or []:
+        if isinstance(clinic, ClinicRecord):
+            records.append(clinic)
+            continue
+        city = extract_city_from_address(clinic["address"]) if "address" in clinic else None
+        records.append(ClinicRecord.from_dict(clinic, city=city))
+    return records
+
+# Every ClinicIndex gets a new version, which is part of the cache keys
+_index_versions = itertools.count(1)
+
+# Grupa klinik bez sieci w tytule
+OTHER_NETWORK = "Inne Kliniki"
+
+# Location parts of one clinic, parsed once at load:
+# network and city from a "Network – City" title (None if the title has no separator),
+# the city the clinic is listed under, the address part before the first comma and the street after it
+ClinicLocation = namedtuple("ClinicLocation", ["network", "title_city", "list_city", "address_head", "street"])
+
+def split_title(title):
+    """Splits a "Network – City" (or "Network - City") title into (network, city), or (None, None)."""
+    for separator in (" – ", " - "):
+        if separator in title:
+            parts = title.split(separator)
+            return parts[0].strip(), parts[1].strip()
+    return None, None
+
+def parse_clinic_location(clinic):
+    """Parses the title and address of a clinic into a ClinicLocation."""
+    network, title_city = split_title(clinic.get("title", ""))
+    address = clinic.get("address", "")
+
+    # Clinics are listed under the city from the title, otherwise the one from the address
+    list_city = title_city or extract_city_from_address(address)
+    if not list_city and address and "," in address:
+        list_city = address.split(",")[0].strip()
+
+    street = address.split(",", 1)[1].strip() if "," in address else None
+    return ClinicLocation(network, title_city, list_city or "Inna lokalizacja", address.split(",")[0], street)
+
+class ClinicIndex:
+    """
+    Location index over the clinics data, built once when the data is loaded.
+
+    Holds every clinic as a ClinicRecord with its parsed ClinicLocation, a dict from
+    case-folded city to the positions of its clinics, a dict from network name to the
+    positions of its clinics and the distinct city / address keys checked by the exact
+    stage of find_matching_clinics. Nothing is parsed or written back at query time.
+    Every index gets a new `version`, which keys the cached results.
+    """
+
+    def __init__(self, clinics_data):
+        self.version = next(_index_versions)
+        self.clinics = build_clinic_records(clinics_data)
+        self.locations = [parse_clinic_location(clinic) for clinic in self.clinics]
+
+        self.by_city = {}
+        self.by_network = {}
+        # Folded city and address head (see text_normalization.fold_key) -> positions,
+        # for the substring checks of the exact stage
+        self.location_keys = {}
+        for position, (clinic, location) in enumerate(zip(self.clinics, self.locations)):
+            city = clinic.get("city", "").casefold()
+            if city:
+                self.by_city.setdefault(city, []).append(position)
+                self.location_keys.setdefault(fold_key(city), set()).add(position)
+            if clinic.get("address"):
+                self.location_keys.setdefault(fold_key(location.address_head), set()).add(position)
+            self.by_network.setdefault(location.network or OTHER_NETWORK, []).append(position)
+
+        # Distinct city names as choices for fuzzy matching, with an n-gram index for the shortlist
+        self.city_choices = list({clinic.get("city"): None for clinic in self.clinics if clinic.get("city")})
+        self.city_choice_index = NgramIndex(self.city_choices)
+
+        # Batch scorers over every clinic's city and first part of address (likely contains the city)
+        # for the last fuzzy fallback stage, with the same preprocessing as process.extractOne
+        self.city_scorer = BatchScorer([clinic.get("city", "") for clinic in self.clinics], processor=full_process)
+        self.address_scorer = BatchScorer([location.address_head if location.street is not None else ""
+                                           for location in self.locations], processor=full_process)
+
+        # Prefix index over the cities for /klinika autocomplete
+        self.city_suggestions = PrefixIndex((clinic.get("city", ""), fold_key(clinic.get("city", "")))
+                                            for clinic in self.clinics)
+
+    def __len__(self):
+        return len(self.clinics)
+
+    def __bool__(self):
+        return bool(self.clinics)
+
+    def in_city(self, city):
+        """Returns the positions of all clinics in the given city, compared case-insensitively (empty list if none)."""
+        return self.by_city.get(city.casefold(), [])
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        """Returns up to `limit` city names starting with the typed text (or with a later word starting with it)."""
+        return self.city_suggestions.suggest(fold_key(text), limit)
+
+    def records(self, matches):
+        """Returns the clinic records for (position, similarity) pairs returned by find_matching_clinics."""
+        return [self.clinics[position] for position, _ in matches]
+
+def find_matching_clinics(location_query, clinic_index, threshold=0.65):
+    """
+    Find clinics that match the location query with fuzzy matching.
+    Returns (list of (position in clinic_index.clinics, similarity) pairs, exact match flag).
+    """
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
+
+    if not location_query or not clinic_index:
         return [], False
     
     # Normalize the query
-    location_query = location_query.strip().lower()
-    
-    # Process each clinic to extract city info
-    cities = set()
-    for clinic in clinics_data:
-        # Extract city from address if not already present
-        if "city" not in clinic and "address" in clinic:
-            city = extract_city_from_address(clinic["address"])
-            clinic["city"] = city
-            if city:
-                cities.add(city)
+    location_query = location_query.strip().casefold()
     
-    # First try exact match (case insensitive)
-    exact_matches = []
-    for clinic in clinics_data:
-        address = clinic.get("address", "").lower()
-        city = clinic.get("city", "").lower()
-        
-        # Check if location query is in city name or at the beginning of address
-        if (city and location_query in city) or \
-           (address.startswith(location_query + ",")) or \
-           (address and location_query in address.split(",")[0].strip()):
-            exact_matches.append(clinic)
+    # First try exact match (ignoring case, Polish characters and punctuation): the query is part of
+    # the city name or of the address before the first comma. Only the distinct keys are checked, not every clinic.
+    folded_query = fold_key(location_query)
+    exact_positions = set()
+    if folded_query:
+        for key, positions in clinic_index.location_keys.items():
+            if folded_query in key:
+                exact_positions.update(positions)
     
-    if exact_matches:
-        return exact_matches, True  # Return exact matches and flag
+    if exact_positions:
+        MATCH_STAGE.inc("clinics", "exact")
+        return [(position, 1.0) for position in sorted(exact_positions)], True  # Return exact matches and flag
     
     # If no exact match, try fuzzy matching with the cities list
-    city_list = list(cities)  # Convert set to list for get_best_match
-    best_city_match, similarity = get_best_match(location_query, city_list, threshold=threshold)
+    best_city_match, similarity = get_best_match(location_query, clinic_index.city_choices, threshold=threshold,
+                                                 ngram_index=clinic_index.city_choice_index)
     
     if best_city_match:
         # Found a fuzzy match for the city
-        fuzzy_matches = [clinic for clinic in clinics_data 
-                        if clinic.get("city", "").lower() == best_city_match.lower()]
-        return fuzzy_matches, False
-    
-    # If still no match, try direct fuzzy matching on addresses
-    fuzzy_matches = []
-    for clinic in clinics_data:
-        address = clinic.get("address", "")
-        city = clinic.get("city", "")
-            
-        # Only check similarity if we have data to compare
-        if city or address:
-            # Check similarity with city
-            city_similarity = get_best_match(location_query, [city])[1] if city else 0
-            
-            # Also check first part of address (likely contains city)
-            address_part = address.split(",")[0] if address and "," in address else ""
-            address_similarity = get_best_match(location_query, [address_part])[1] if address_part else 0
-            
-            # Use the better match
-            best_similarity = max(city_similarity, address_similarity)
-            
-            if best_similarity >= threshold:
-                # Add similarity score to clinic for sorting
-                clinic_copy = clinic.copy()
-                clinic_copy["similarity"] = best_similarity
-                fuzzy_matches.append(clinic_copy)
+        MATCH_STAGE.inc("clinics", "best_match")
+        return [(position, similarity) for position in clinic_index.in_city(best_city_match)], False
     
-    # Sort fuzzy matches by similarity score, highest first
-    fuzzy_matches.sort(key=lambda x: x.get("similarity", 0), reverse=True)
-    return fuzzy_matches[:10], False  # Limit results to avoid overwhelming the user
+    # get_best_match zeroed per-field scores below its default threshold of 0.8,
+    # so nothing under that could ever be returned here
+    field_threshold = max(threshold, 0.8)
 
-async def get_clinic_info(ctx_or_interaction, location_query, clinics_data, ephemeral=True):
-    """Wyświetla informacje o klinikach w danej lokalizacji."""
-    matching_clinics, is_exact = find_matching_clinics(location_query, clinics_data)
+    # If still no match, score the query against every clinic's city and first part of address in one batch each
+    city_scores = clinic_index.city_scorer.scores(location_query, field_threshold)
+    address_scores = clinic_index.address_scorer.scores(location_query, field_threshold)
+
+    # Limit results to avoid overwhelming the user
+    matches = top_k(max_scores(city_scores, address_scores), k=10, threshold=field_threshold)
+    MATCH_STAGE.inc("clinics", "fallback" if matches else "none")
+    return matches, False
 
+def render_clinic_info_message(location_query, matching_clinics, is_exact):
+    """Buduje odpowiedź z informacjami o znalezionych klinikach. Zwraca argumenty dla send() (embed albo content)."""
     if matching_clinics:
         if len(matching_clinics) == 1:
             # Tylko jedna klinika znaleziona
@@ -232,7 +297,7 @@ async def get_clinic_info(ctx_or_interaction, location_query, clinics_data, ephe
             if not is_exact:
                 embed.description = f"*Pokazuję najbliższe dopasowanie do zapytania '{location_query}'*"
             
-            if "city" in clinic and clinic["city"]:
+            if clinic.get("city"):
                 embed.add_field(name="Miasto", value=clinic["city"], inline=True)
                 
             if clinic.get("address"):
@@ -255,10 +320,7 @@ async def get_clinic_info(ctx_or_interaction, location_query, clinics_data, ephe
                 doctors_text = "\n".join([f"• {doctor}" for doctor in clinic["doctors"]])
                 embed.add_field(name="Lekarze", value=doctors_text, inline=False)
                 
-            if isinstance(ctx_or_interaction, commands.Context):
-                await ctx_or_interaction.send(embed=embed)
-            else:
-                await ctx_or_interaction.followup.send(embed=embed, ephemeral=ephemeral)
+            return {"embed": embed}
         else:
             # Wiele klinik znalezionych
             if is_exact:
@@ -288,160 +350,152 @@ async def get_clinic_info(ctx_or_interaction, location_query, clinics_data, ephe
                     
                 response_text += "\n"
                 
-            if isinstance(ctx_or_interaction, commands.Context):
-                await ctx_or_interaction.send(response_text)
-            else:
-                await ctx_or_interaction.followup.send(response_text, ephemeral=ephemeral)
+            return {"content": response_text}
     else:
         message = f"Nie znaleziono klinik w lokalizacji '{location_query}'. Spróbuj wpisać nazwę miasta lub sprawdź pisownię."
-        if isinstance(ctx_or_interaction, commands.Context):
-            await ctx_or_interaction.send(message)
-        else:
-            await ctx_or_interaction.followup.send(message, ephemeral=ephemeral)
+        return {"content": message}
+
+def build_clinic_info(location_query, clinic_index):
+    """
+    Wyszukuje kliniki w danej lokalizacji i buduje odpowiedź. Działa synchronicznie, poza pętlą zdarzeń.
+    Zwraca (pary (pozycja, podobieństwo) dopasowanych klinik, czy dopasowanie dokładne, argumenty dla send()).
+    """
+    with STAGE_LATENCY.time("clinic_match"):
+        matches, is_exact = find_matching_clinics(location_query, clinic_index)
+    with STAGE_LATENCY.time("clinic_render"):
+        message = render_clinic_info_message(location_query, clinic_index.records(matches), is_exact)
+    return matches, is_exact, message
+
+def lookup_clinic_info(location_query, clinic_index):
+    """Runs build_clinic_info and returns the result as a CachedLookup, ready to be cached and shared."""
+    matches, is_exact, message = build_clinic_info(location_query, clinic_index)
+    return CachedLookup(location_query, matches, is_exact, serialize_message(message))
+
+async def get_clinic_info(ctx_or_interaction, location_query, clinic_index, ephemeral=True):
+    """Wyświetla informacje o klinikach w danej lokalizacji."""
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
+
+    cache_key = (clinic_index.version, location_query.strip().casefold())
+    cached = clinic_info_cache.get(cache_key)
+
+    if cached is None:
+        # Matching and formatting run in the executor, so they don't block the event loop; the interaction
+        # is deferred only if they take longer than the response budget. Identical queries arriving
+        # meanwhile wait for the same computation.
+        cached = await run_within_budget(ctx_or_interaction, lookup_clinic_info, location_query, clinic_index,
+                                         ephemeral=ephemeral, flight=clinic_info_flights, flight_key=cache_key)
+        clinic_info_cache.set(cache_key, cached)
+
+    if cached.query == location_query:
+        message = deserialize_message(cached.payload)
+    else:
+        # Same normalized query typed differently, the reply quotes the query so render it again
+        message = render_clinic_info_message(location_query, clinic_index.records(cached.matches), cached.is_exact)
 
-async def list_all_clinics(ctx_or_interaction, clinics_data, ephemeral=True):
-    """Wyświetla listę wszystkich dostępnych klinik."""
-    if not clinics_data:
-        message = "Brak dostępnych danych o klinikach."
-        if isinstance(ctx_or_interaction, commands.Context):
-            await ctx_or_interaction.send(message)
-        else:
-            await ctx_or_interaction.followup.send(message, ephemeral=True)
-        return
+    await send_response(ctx_or_interaction, ephemeral=ephemeral, **message)
+
+def build_clinic_list_embeds(clinic_index):
+    """Buduje embedy z listą klinik pogrupowanych według miast. Działa synchronicznie, poza pętlą zdarzeń."""
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
 
-    # Process and organize clinics by city
+    # Organize clinics by the city parsed at load (from the title, otherwise from the address)
     cities = {}
-    for clinic in clinics_data:
-        # Extract city from address if not already present
-        address = clinic.get("address", "")
-        
-        # Get city either from title or from address
-        city = None
-        title = clinic.get("title", "")
-        if title:
-            # Try to extract city from title (often in format "Network - City")
-            if " - " in title:
-                city = title.split(" - ")[1].strip()
-            elif " – " in title:
-                city = title.split(" – ")[1].strip()
-        
-        # If city not found in title, extract from address
-        if not city and address:
-            city = extract_city_from_address(address)
-            
-        # If still no city, try to parse first part of address
-        if not city and address and "," in address:
-            city = address.split(",")[0].strip()
-        
-        # Default if we couldn't extract a city
-        if not city:
-            city = "Inna lokalizacja"
-        
-        # Add to cities dictionary
-        if city not in cities:
-            cities[city] = []
-        cities[city].append(clinic)
-
-    # Create embeds for the grouped clinics
-    embeds = []
-    current_embed = None
-    current_size = 0
-    MAX_EMBED_SIZE = 5800  # Leave safety margin
-
-    # Helper function to create a new embed
-    def create_new_embed(title="Dostępne Kliniki Konopne"):
-        embed = discord.Embed(
-            title=title,
-            color=discord.Color.green()
-        )
-        if title == "Dostępne Kliniki Konopne":
-            embed.description = "Lista dostępnych klinik pogrupowana według miast:"
-        return embed
-
-    current_embed = create_new_embed()
-
-    # Add fields for each city
-    for city, clinics in sorted(cities.items()):
-        city_clinics = []
-        current_field = ""
-
-        for clinic in clinics:
-            # Get clinic name from title or network name
-            clinic_name = None
-            title = clinic.get('title', '')
-            
-            if title:
-                if " – " in title:
-                    network = title.split(" – ")[0].strip()
-                    clinic_name = f"{network} ({city})"
-                elif " - " in title:
-                    network = title.split(" - ")[0].strip()
-                    clinic_name = f"{network} ({city})"
-                else:
-                    clinic_name = title
-            
-            # If still no name, create one from address
-            if not clinic_name:
-                address = clinic.get('address', 'Nieznany adres')
-                if address != "N/A":
-                    # Get the street part if possible
-                    if "," in address:
-                        street = address.split(",", 1)[1].strip()
-                        clinic_name = f"Klinika - {street}"
+    for clinic, location in zip(clinic_index.clinics, clinic_index.locations):
+        cities.setdefault(location.list_city, []).append((clinic, location))
+
+    def city_rows():
+        for city, clinics in sorted(cities.items()):
+            for clinic, location in clinics:
+                # Get clinic name from title or network name
+                clinic_name = None
+                title = clinic.get('title', '')
+
+                if title:
+                    if location.network is not None:
+                        clinic_name = f"{location.network} ({city})"
                     else:
-                        clinic_name = f"Klinika - {address}"
-                else:
-                    clinic_name = "Klinika (brak adresu)"
-            
-            # Format clinic entry
-            clinic_entry = f"**{clinic_name}**\n"
-            
-            if clinic.get("address") and clinic.get("address") != "N/A":
-                clinic_entry += f"📍 {clinic['address']}\n"
-            
-            if clinic.get("phone") and clinic.get("phone") != "N/A":
-                clinic_entry += f"📞 {clinic['phone']}\n"
-            
-            website_url = clinic.get("website") or clinic.get("clinic_url")
-            if website_url:
-                clinic_entry += f"🔗 [Strona WWW]({website_url})\n"
-                
-            clinic_entry += "\n"
+                        clinic_name = title
 
-            # Check if adding this clinic would exceed field size
-            if len(current_field + clinic_entry) > 1000:
-                city_clinics.append(current_field)
-                current_field = clinic_entry
-            else:
-                current_field += clinic_entry
-
-        if current_field:
-            city_clinics.append(current_field)
-
-        # Add fields for the city
-        for i, field_content in enumerate(city_clinics):
-            field_name = f"__{city}__" if i == 0 else f"__{city} (część {i+1})__"
-            field_size = len(field_name) + len(field_content)
-
-            # Check if adding the new field would exceed the limit
-            if current_size + field_size > MAX_EMBED_SIZE:
-                embeds.append(current_embed)
-                current_embed = create_new_embed("Dostępne Kliniki Konopne (kontynuacja)")
-                current_size = 0
-
-            current_embed.add_field(name=field_name, value=field_content, inline=False)
-            current_size += field_size
-
-    # Add footer to the last embed
-    if embeds or current_embed:
-        if current_embed:
-            current_embed.set_footer(text="Dane klinik mogą ulec zmianie. Przed wizytą zaleca się kontakt telefoniczny.")
-            embeds.append(current_embed)
-
-    # Send all embeds
-    if isinstance(ctx_or_interaction, commands.Context):
-        for embed in embeds:
-            await ctx_or_interaction.send(embed=embed)
-    else:
-        for embed in embeds:
-            await ctx_or_interaction.followup.send(embed=embed, ephemeral=ephemeral)
+                # If still no name, create one from address
+                if not clinic_name:
+                    address = clinic.get('address', 'Nieznany adres')
+                    if address != "N/A":
+                        # Get the street part if possible
+                        if location.street is not None:
+                            clinic_name = f"Klinika - {location.street}"
+                        else:
+                            clinic_name = f"Klinika - {address}"
+                    else:
+                        clinic_name = "Klinika (brak adresu)"
+
+                # Format clinic entry
+                clinic_entry = f"**{clinic_name}**\n"
+
+                if clinic.get("address") and clinic.get("address") != "N/A":
+                    clinic_entry += f"📍 {clinic['address']}\n"
+
+                if clinic.get("phone") and clinic.get("phone") != "N/A":
+                    clinic_entry += f"📞 {clinic['phone']}\n"
+
+                website_url = clinic.get("website") or clinic.get("clinic_url")
+                if website_url:
+                    clinic_entry += f"🔗 [Strona WWW]({website_url})\n"
+
+                clinic_entry += "\n"
+                yield city, clinic_entry
+
+    # Lay out fields, embeds and messages within Discord's limits
+    return layout_embeds(
+        city_rows(),
+        title="Dostępne Kliniki Konopne",
+        field_name=lambda city, part: f"__{city}__" if part == 0 else f"__{city} (część {part+1})__",
+        description="Lista dostępnych klinik pogrupowana według miast:",
+        continuation_title="Dostępne Kliniki Konopne (kontynuacja)",
+        footer="Dane klinik mogą ulec zmianie. Przed wizytą zaleca się kontakt telefoniczny.",
+    )
+
+def build_clinic_list_pages(clinic_index):
+    """Builds the /listaklinik embeds serialized to dicts, ready to be cached."""
+    with STAGE_LATENCY.time("list_build"):
+        return [embed.to_dict() for embed in build_clinic_list_embeds(clinic_index)]
+
+def prerender_clinic_list(clinic_index, pages=None):
+    """
+    Caches the clinic list for freshly loaded data, so the first /listaklinik is a cache hit.
+    Pages already built off the event loop can be passed in, otherwise they are built here.
+    """
+    if pages is None:
+        pages = build_clinic_list_pages(clinic_index)
+    clinic_list_cache.set((clinic_index.version, "cities"), pages)
+
+async def list_all_clinics(ctx_or_interaction, clinic_index, ephemeral=True):
+    """
+    Wyświetla listę wszystkich dostępnych klinik.
+    Lista jest wysyłana dopiero po wpuszczeniu przez kontroler dopuszczeń (patrz admission.py).
+    """
+    await run_admitted(ctx_or_interaction, "clinic_list",
+                       functools.partial(_send_clinic_list, ctx_or_interaction, clinic_index, ephemeral),
+                       ephemeral=ephemeral)
+
+async def _send_clinic_list(ctx_or_interaction, clinic_index, ephemeral):
+    if not isinstance(clinic_index, ClinicIndex):
+        clinic_index = ClinicIndex(clinic_index)
+
+    if not clinic_index:
+        message = "Brak dostępnych danych o klinikach."
+        await send_response(ctx_or_interaction, ephemeral=True, content=message)
+        return
+
+    # Pages are rendered once per data version
+    cache_key = (clinic_index.version, "cities")
+    pages = clinic_list_cache.get(cache_key)
+    if pages is None:
+        pages = await run_within_budget(ctx_or_interaction, build_clinic_list_pages, clinic_index, ephemeral=ephemeral,
+                                        flight=clinic_list_flights, flight_key=cache_key)
+        clinic_list_cache.set(cache_key, pages)
+
+    # Send all embeds, packed into as few messages as possible
+    embeds = [discord.Embed.from_dict(page) for page in pages]
+    await send_embeds(ctx_or_interaction, embeds, ephemeral=ephemeral)
@@ -0,0 +1,57 @@
+# command_sync.py
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger('cannabis_clinic_bot.sync')
+
+def command_schema(tree, guild=None):
+    """Payload of the application commands registered in the tree for a guild (None for global), as sent by tree.sync()."""
+    schema = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    return sorted(schema, key=lambda command: (command.get("type", 1), command["name"]))
+
+def schema_hash(schema):
+    """Stable hash of a command schema: the same commands give the same hash in every process."""
+    encoded = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def load_sync_state(filepath):
+    """Reads the hashes of the last synced schemas. A missing or broken file means nothing was synced yet."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+def save_sync_state(filepath, state):
+    """Writes the sync state through a temporary file, so an interrupted write can't corrupt it."""
+    temp_path = f"{filepath}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_path, filepath)
+
+async def sync_commands(tree, application_id, guild=None, state_path="command_sync.json"):
+    """
+    Syncs the tree's commands for a guild (None for global) only if their schema changed
+    since the last successful sync recorded in state_path. Returns True if Discord was called.
+    Deleting the state file forces the next sync.
+    """
+    scope = f"guild:{guild.id}" if guild else "global"
+    key = f"{application_id}:{scope}"
+    current_hash = schema_hash(command_schema(tree, guild=guild))
+
+    state = load_sync_state(state_path)
+    if state.get(key) == current_hash:
+        logger.info(f"Commands ({scope}) unchanged, skipping sync.")
+        return False
+
+    await tree.sync(guild=guild)
+    state[key] = current_hash
+    try:
+        save_sync_state(state_path, state)
+    except OSError as e:
+        logger.warning(f"Could not save the command sync state to {state_path}: {e}")
+    logger.info(f"Commands ({scope}) synced with Discord.")
+    return True
@@ -11,5 +11,49 @@ TEST_GUILD_ID = 123456789012345678  # Replace with your test server ID or set to
 JSON_FILE_PATH = "strains_alt.json"  # Path to strains data
 CLINICS_FILE_PATH = "clinic_data.json"  # Path to clinics data
 
+# Storage of the loaded data: "json" (in memory only) or "sqlite" (the last good JSON files are also kept in a
+# local SQLite database; restarts read unchanged files from it, search works the same way)
+STORAGE_BACKEND = "json"
+SQLITE_PATH = "catalogue.sqlite"
+
 # Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
 LOG_LEVEL = "INFO"
+
+# Rotation of logs/bot.log: by size, or on a schedule if LOG_ROTATE_WHEN is set (e.g. "midnight")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5  # Number of old log files kept
+LOG_ROTATE_WHEN = None
+
+# Executor for CPU-bound matching and embed building (keeps the Discord event loop responsive)
+EXECUTOR_KIND = "thread"  # "thread" or "process"
+EXECUTOR_WORKERS = 4  # Number of worker threads/processes
+EXECUTOR_QUEUE_SIZE = 32  # Calls allowed to wait for a free worker before new ones are rejected
+EXECUTOR_TIMEOUT = 10.0  # Per-call timeout in seconds
+# Slash commands whose answer is ready within this many seconds reply directly; slower ones are deferred first
+RESPONSE_BUDGET = 1.0
+
+# Outbound message scheduler (one queue per channel / interaction)
+SEND_ROUTE_CONCURRENCY = 1  # Requests in flight per channel or interaction
+SEND_GLOBAL_CONCURRENCY = 8  # Requests in flight in total
+
+# Admission control for the list commands (/listaodmian, /odmiany, /filtruj, /listaklinik and their ! versions)
+ADMISSION_GLOBAL_LIMIT = 4  # Lists built and sent at once in total
+ADMISSION_GUILD_LIMIT = 2  # Lists built and sent at once per server
+ADMISSION_MAX_WAITING = 20  # Lists allowed to wait for a slot; further ones get a "busy, try again" reply
+ADMISSION_MAX_WAIT = 120.0  # Seconds a list waits for a slot at most (never past the 15-minute interaction token)
+
+# Cache of /odmiana and /klinika results (cleared whenever the data is reloaded)
+CACHE_MAX_SIZE = 512  # Maximum number of cached queries per command
+CACHE_TTL = 3600  # Seconds before a cached result expires
+
+# Seconds between checks for changes in the data files; changed files are reloaded without a restart (0 disables)
+DATA_RELOAD_INTERVAL = 30
+
+# File storing a hash of the last synced slash commands; commands are only synced with Discord when they change
+# (delete the file to force a sync)
+COMMAND_SYNC_STATE_FILE = "command_sync.json"
+
+# Optional local metrics endpoint (latency histograms, matching stages, errors, sends) in Prometheus text format,
+# served at http://METRICS_HOST:METRICS_PORT/metrics (None disables it)
+METRICS_PORT = None  # e.g. 9108
+METRICS_HOST = "127.0.0.1"
@@ -1,17 +1,20 @@
 # data_loader.py
 import json
+import logging
 import os
 
+logger = logging.getLogger('cannabis_clinic_bot.data')
+
 def load_data(filepath):
     """Loads JSON data from a file with robust error handling."""
     if not os.path.exists(filepath):
-        print(f"File not found: {filepath}. Returning empty list.")
+        logger.warning(f"File not found: {filepath}. Returning empty list.")
         return []
     try:
         with open(filepath, 'r', encoding='utf-8') as file:
             return json.load(file)
     except (json.JSONDecodeError, FileNotFoundError) as e:
-        print(f"Error loading data from {filepath}: {e}")
+        logger.error(f"Error loading data from {filepath}: {e}")
         return []
 
 def load_strains_data(filepath):
@@ -24,4 +27,30 @@ def ensure_file_exists(filepath, default_content="[]"):
     if not os.path.exists(filepath):
         with open(filepath, 'w', encoding='utf-8') as file:
             file.write(default_content)
-        print(f"Created file at {filepath} with default content.")
\ No newline at end of file
+        logger.info(f"Created file at {filepath} with default content.")
+
+def parse_data_file(filepath):
+    """Loads JSON data from a file, raising on any error instead of returning an empty list."""
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def validate_strains_data(data):
+    """Checks that strains data is a list of strain records. Raises ValueError otherwise."""
+    if not isinstance(data, list):
+        raise ValueError("Strains data must be a JSON list")
+    for position, strain in enumerate(data):
+        if not isinstance(strain, dict):
+            raise ValueError(f"Strain record {position} is not an object")
+        for key in ("strain_name", "product_name"):
+            if not isinstance(strain.get(key), str):
+                raise ValueError(f"Strain record {position} has no valid '{key}'")
+    return data
+
+def validate_clinics_data(data):
+    """Checks that clinics data is a list of clinic records. Raises ValueError otherwise."""
+    if not isinstance(data, list):
+        raise ValueError("Clinics data must be a JSON list")
+    for position, clinic in enumerate(data):
+        if not isinstance(clinic, dict):
+            raise ValueError(f"Clinic record {position} is not an object")
+    return data
@@ -0,0 +1,176 @@
+# data_manager.py
+import asyncio
+import logging
+import os
+from collections import namedtuple
+from data_loader import parse_data_file, validate_strains_data, validate_clinics_data
+from strains_utils import StrainIndex, build_strain_list_pages, prerender_strain_list
+from clinic_utils import ClinicIndex, build_clinic_list_pages, prerender_clinic_list
+from cache import clear_caches
+
+logger = logging.getLogger('cannabis_clinic_bot.data')
+
+class DataSnapshot(namedtuple("DataSnapshot", [
+        "strain_index", "clinic_index", "strain_list_pages", "clinic_list_pages"])):
+    """
+    Immutable set of loaded data and everything derived from it. Command handlers take
+    the current snapshot once per call, so a reload never mixes old and new data.
+    The records themselves must be treated as read-only.
+    """
+    __slots__ = ()
+
+    @property
+    def strains_data(self):
+        return self.strain_index.strains
+
+    @property
+    def clinics_data(self):
+        return self.clinic_index.clinics
+
+def _file_signature(filepath):
+    """(mtime, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class DataManager:
+    """
+    Loads the strains and clinics files and reloads them when they change on disk.
+
+    The files are polled by modification time and size. A changed file is parsed,
+    validated and indexed off the event loop, then the new snapshot is swapped in
+    with a single assignment and the result caches are cleared. If the new file is
+    invalid, the current snapshot is kept and the error is logged.
+
+    With a CatalogueStore, changed files are imported into its SQLite database and the
+    records are read back from it; the indexes are built in memory as for the JSON files
+    (see sqlite_store.py).
+
+    Args:
+        strains_path (str): Path of the strains JSON file.
+        clinics_path (str): Path of the clinics JSON file.
+        poll_interval (float): Seconds between checks for changes (0 disables watching).
+        store (CatalogueStore): Optional SQLite backend (None reads the JSON files directly).
+    """
+
+    def __init__(self, strains_path, clinics_path, poll_interval=30, store=None):
+        self.strains_path = strains_path
+        self.clinics_path = clinics_path
+        self.poll_interval = poll_interval
+        self.store = store
+        self.snapshot = DataSnapshot(StrainIndex([]), ClinicIndex([]), [], [])
+        self._signatures = {strains_path: None, clinics_path: None}
+        # Created by the first reload, inside the running loop (before Python 3.10 a lock binds to the loop
+        # current when it is created, and the manager is built before client.run() starts one)
+        self._reload_lock = None
+
+    def _load_file(self, kind, filepath, validate):
+        signature = _file_signature(filepath)
+        if self.store is not None:
+            data = self.store.load(kind, filepath, signature, validate)
+        else:
+            data = validate(parse_data_file(filepath))
+        return data, signature
+
+    def load(self):
+        """
+        Loads both files at startup. A file that fails to load is logged and replaced by the
+        rows last imported from it into the store, or treated as empty without them.
+        """
+        strains_data = self._load_at_startup("strains", self.strains_path, validate_strains_data)
+        clinics_data = self._load_at_startup("clinics", self.clinics_path, validate_clinics_data)
+        self._install(self._build_snapshot(self.snapshot, strains_data, clinics_data))
+        return self.snapshot
+
+    def _load_at_startup(self, kind, filepath, validate):
+        try:
+            data, self._signatures[filepath] = self._load_file(kind, filepath, validate)
+            return data
+        except Exception as e:
+            self._signatures[filepath] = _file_signature(filepath)
+            stored = self.store.stored(kind, filepath) if self.store is not None else None
+            if stored is None:
+                logger.error(f"Error loading {kind} data: {e}")
+                return []
+            logger.error(f"Error loading {kind} data, using the last imported data from {self.store.path}: {e}")
+            return stored
+
+    def changed_files(self):
+        """Paths of the watched files whose signature differs from the last (attempted) load."""
+        return [path for path, signature in self._signatures.items() if _file_signature(path) != signature]
+
+    def _build_snapshot(self, current, strains_data=None, clinics_data=None):
+        """Builds a new snapshot, reusing the parts of `current` whose data didn't change."""
+        if strains_data is not None:
+            strain_index = StrainIndex(strains_data)
+            strain_list_pages = build_strain_list_pages(strain_index) if strain_index else []
+        else:
+            strain_index, strain_list_pages = current.strain_index, current.strain_list_pages
+
+        if clinics_data is not None:
+            clinic_index = ClinicIndex(clinics_data)
+            clinic_list_pages = build_clinic_list_pages(clinic_index) if clinic_index else []
+        else:
+            clinic_index, clinic_list_pages = current.clinic_index, current.clinic_list_pages
+
+        return DataSnapshot(strain_index, clinic_index, strain_list_pages, clinic_list_pages)
+
+    def _prepare_reload(self, current, paths):
+        """Parses, validates and indexes the changed files. Runs in a worker thread."""
+        strains_data = clinics_data = None
+        for path in paths:
+            # The signature is recorded even if the file is invalid, so it isn't re-parsed on every poll
+            signature = _file_signature(path)
+            self._signatures[path] = signature
+            try:
+                if path == self.strains_path:
+                    strains_data, _ = self._load_file("strains", path, validate_strains_data)
+                else:
+                    clinics_data, _ = self._load_file("clinics", path, validate_clinics_data)
+            except Exception as e:
+                logger.error(f"Not reloading {path}, keeping the current data: {e}")
+
+        if strains_data is None and clinics_data is None:
+            return None
+        return self._build_snapshot(current, strains_data, clinics_data)
+
+    def _install(self, snapshot):
+        """Swaps in a new snapshot. Must run on the event loop (or before it starts)."""
+        self.snapshot = snapshot
+        clear_caches()
+        if snapshot.strain_list_pages:
+            prerender_strain_list(snapshot.strain_index, snapshot.strain_list_pages)
+        if snapshot.clinic_list_pages:
+            prerender_clinic_list(snapshot.clinic_index, snapshot.clinic_list_pages)
+
+    async def reload(self, force=False):
+        """Reloads the changed files (all files if force). Returns True if a new snapshot was installed."""
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            paths = list(self._signatures) if force else self.changed_files()
+            if not paths:
+                return False
+
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(None, self._prepare_reload, self.snapshot, paths)
+            if snapshot is None:
+                return False
+
+            self._install(snapshot)
+            logger.info(f"Reloaded data from {', '.join(paths)}: "
+                        f"{len(snapshot.strain_index)} strains, {len(snapshot.clinic_index)} clinics")
+            return True
+
+    async def watch(self):
+        """Polls the files forever and reloads them when they change."""
+        if not self.poll_interval:
+            return
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Error while reloading data: {e}")
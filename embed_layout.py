@@ -0,0 +1,139 @@
+# embed_layout.py
+import discord
+
+# Limity Discorda dla pól, embedów i jednej wiadomości
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+MAX_FIELDS_PER_EMBED = 25
+MAX_EMBED_CHARS = 6000
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_MESSAGE_CHARS = 6000
+
+def pack_embeds(embeds, max_embeds=MAX_EMBEDS_PER_MESSAGE, max_chars=MAX_MESSAGE_CHARS):
+    """
+    Groups embeds into as few messages as the limits allow, keeping their order.
+
+    An embed's size is counted the way Discord counts it (title, description, field
+    names and values, footer and author text, see discord.Embed.__len__); the sizes
+    of all embeds in one message must not exceed max_chars together.
+    Returns a list of lists of embeds, one list per message.
+    """
+    messages = []
+    current = []
+    current_size = 0
+    for embed in embeds:
+        size = len(embed)
+        if current and (len(current) >= max_embeds or current_size + size > max_chars):
+            messages.append(current)
+            current = []
+            current_size = 0
+        current.append(embed)
+        current_size += size
+
+    if current:
+        messages.append(current)
+    return messages
+
+class _Embed:
+    """Embed being laid out: header texts and fields as (name, list of entries) pairs."""
+    __slots__ = ("title", "description", "footer", "fields")
+
+    def __init__(self, title, description, footer):
+        self.title = title
+        self.description = description
+        self.footer = footer
+        self.fields = []
+
+    def build(self, color):
+        embed = discord.Embed(title=self.title, description=self.description, color=color)
+        for name, entries in self.fields:
+            embed.add_field(name=name, value="".join(entries), inline=False)
+        if self.footer:
+            embed.set_footer(text=self.footer)
+        return embed
+
+def layout_embeds(rows, title, field_name, description=None, continuation_title=None,
+                  continuation_description=None, footer=None, repeat_footer=False,
+                  color=discord.Color.green()):
+    """
+    Lays out (group, entry) rows as embed fields, in a single pass.
+
+    Rows of one group must come one after another. The entries of a group fill a field
+    until the next one would exceed MAX_FIELD_VALUE, then the group continues in a new
+    field named field_name(group, part) (part counts from 0). Fields fill an embed up to
+    MAX_FIELDS_PER_EMBED, and embeds fill a message up to MAX_EMBEDS_PER_MESSAGE and
+    MAX_MESSAGE_CHARS in total, counted like discord.Embed.__len__. When a group doesn't
+    fit in what is left of a message, it is split between entries, so every message is
+    filled as far as the limits allow. Only running lengths are tracked and every field
+    is joined once, so the layout is linear in the size of the rows.
+
+    The first embed gets `title` and `description`, the following ones `continuation_title`
+    (defaults to `title`) and `continuation_description`. The footer goes on every embed if
+    repeat_footer, otherwise only on the last one (its length is reserved in every message).
+    Returns the embeds in order; pack_embeds groups them into the same messages.
+    """
+    if continuation_title is None:
+        continuation_title = title
+    # Every embed is part of a message, so keeping messages within the budget keeps embeds within theirs too
+    budget = min(MAX_MESSAGE_CHARS, MAX_EMBED_CHARS)
+    if footer and not repeat_footer:
+        budget -= len(footer)
+
+    def header_size(embed):
+        size = len(embed.title or "") + len(embed.description or "")
+        return size + len(embed.footer) if embed.footer else size
+
+    embeds = []
+    current = _Embed(title, description, footer if repeat_footer else None)
+    message_size = header_size(current)
+    message_embeds = 1
+    # Entries of the open field and its group, part number and value length
+    field = None
+    group = None
+    part = 0
+    field_length = 0
+
+    def start_embed(needed):
+        """Closes the current embed and starts a continuation embed with room for `needed` characters."""
+        nonlocal current, message_size, message_embeds
+        embeds.append(current)
+        current = _Embed(continuation_title, continuation_description, footer if repeat_footer else None)
+        size = header_size(current)
+        if message_embeds < MAX_EMBEDS_PER_MESSAGE and message_size + size + needed <= budget:
+            message_embeds += 1
+            message_size += size
+        else:
+            message_embeds = 1
+            message_size = size
+
+    for row_group, entry in rows:
+        entry = entry[:MAX_FIELD_VALUE]
+        if row_group != group:
+            group = row_group
+            part = 0
+            field = None
+        elif field is not None and (field_length + len(entry) > MAX_FIELD_VALUE
+                                    or message_size + len(entry) > budget):
+            part += 1
+            field = None
+
+        if field is None:
+            name = field_name(group, part)[:MAX_FIELD_NAME]
+            needed = len(name) + len(entry)
+            if current.fields and (len(current.fields) >= MAX_FIELDS_PER_EMBED or message_size + needed > budget):
+                start_embed(needed)
+            field = [entry]
+            current.fields.append((name, field))
+            field_length = len(entry)
+            message_size += needed
+        else:
+            field.append(entry)
+            field_length += len(entry)
+            message_size += len(entry)
+
+    if current.fields or not embeds:
+        embeds.append(current)
+    if footer and not repeat_footer:
+        embeds[-1].footer = footer
+
+    return [embed.build(color) for embed in embeds]
@@ -0,0 +1,100 @@
+# executor.py
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import threading
+
+logger = logging.getLogger('cannabis_clinic_bot.executor')
+
+class ExecutorBusy(Exception):
+    """Raised when the executor queue is full and a new call cannot be accepted."""
+
+class MatchExecutor:
+    """
+    Runs CPU-bound matching and embed building outside the Discord event loop.
+
+    Calls go to a thread or process pool. At most max_workers + max_queue calls can be
+    pending at once; further calls fail fast with ExecutorBusy. Each call is awaited for
+    at most `timeout` seconds and then raises asyncio.TimeoutError.
+
+    Args:
+        kind (str): "thread" or "process". With "process", the function and its
+            arguments must be picklable and are copied to the worker on every call.
+        max_workers (int): Number of pool workers.
+        max_queue (int): Number of calls allowed to wait for a free worker.
+        timeout (float): Per-call timeout in seconds (None to wait indefinitely).
+    """
+
+    def __init__(self, kind="thread", max_workers=4, max_queue=32, timeout=10.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Number of submitted calls that have not finished yet."""
+        return self._pending
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                   thread_name_prefix="match")
+        return self._pool
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in the pool and returns its result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise ExecutorBusy(f"{self._pending} calls already pending")
+            self._pending += 1
+
+        try:
+            future = self._get_pool().submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is only freed once the work itself finishes, even if the caller timed out
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            logger.warning(f"{getattr(func, '__name__', func)} timed out after {self.timeout}s")
+            raise
+
+    def shutdown(self):
+        if self._pool is not None:
+            # Queued calls still finish (cancel_futures needs Python 3.9), their callers keep waiting for them
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+_executor = MatchExecutor()
+
+def configure_executor(kind="thread", max_workers=4, max_queue=32, timeout=10.0):
+    """Replaces the shared executor with one using the given settings."""
+    global _executor
+    _executor.shutdown()
+    _executor = MatchExecutor(kind=kind, max_workers=max_workers, max_queue=max_queue, timeout=timeout)
+    return _executor
+
+def get_executor():
+    return _executor
+
+async def run_in_executor(func, *args, **kwargs):
+    """Runs func in the shared executor, see MatchExecutor.run."""
+    return await _executor.run(func, *args, **kwargs)
@@ -0,0 +1,73 @@
+# logging_setup.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+# Extra fields attached to log records (logger.info(..., extra={"command": ...})) and appended to the line
+STRUCTURED_FIELDS = ("command", "guild", "latency_ms")
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+_listener = None
+
+class StructuredFormatter(logging.Formatter):
+    """Appends the structured fields present on a record as key=value pairs (before any traceback)."""
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = [f"{field}={getattr(record, field)}" for field in STRUCTURED_FIELDS
+                  if getattr(record, field, None) is not None]
+        return f"{line} | {' '.join(fields)}" if fields else line
+
+def setup_logging(level="INFO", log_dir="logs", filename="bot.log", max_bytes=5 * 1024 * 1024,
+                  backup_count=5, when=None):
+    """
+    Routes all logging through a queue, so log calls never do I/O on the event loop.
+
+    The root logger only gets a QueueHandler; a QueueListener thread writes the records
+    to the console and to log_dir/filename. The file is rotated at max_bytes, or on a
+    time schedule if `when` is given (see TimedRotatingFileHandler, e.g. "midnight"),
+    keeping backup_count old files. Returns the listener, which is stopped at exit (see stop_logging).
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    filepath = os.path.join(log_dir, filename)
+    if when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(filepath, when=when, backupCount=backup_count,
+                                                                 encoding='utf-8')
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(filepath, maxBytes=max_bytes, backupCount=backup_count,
+                                                            encoding='utf-8')
+    formatter = logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler()
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    # The queue handler renders the message (with the structured fields and any traceback)
+    # in the calling thread, the listener only adds the time, level and logger name
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(StructuredFormatter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Writes out the queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
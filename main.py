@@ -17,9 +17,9 @@ async def main():
             backup_path = basic_commands_path + '.bak'
             shutil.copy2(basic_commands_path, backup_path)
             os.remove(basic_commands_path)
-            print(f"Removed problematic file {basic_commands_path} (backup at {backup_path})")
+            logger.info(f"Removed problematic file {basic_commands_path} (backup at {backup_path})")
         except Exception as e:
-            print(f"Warning: Could not remove {basic_commands_path}: {e}")
+            logger.warning(f"Could not remove {basic_commands_path}: {e}")
     
     # Run the bot
     async with client:
@@ -0,0 +1,238 @@
+# metrics.py
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from cache import cache_stats
+
+logger = logging.getLogger('cannabis_clinic_bot.metrics')
+command_logger = logging.getLogger('cannabis_clinic_bot.commands')
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """
+    Monotonic counter with labels, rendered in the Prometheus text format.
+
+    Thread-safe, since matching runs in the executor's worker threads. Values
+    counted in a process pool worker stay in that process and are not exported.
+    """
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def label_values(self):
+        """Returns the label value tuples counted so far."""
+        with self._lock:
+            return list(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+class Gauge:
+    """Value that can go up and down (e.g. a queue depth), with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    """
+    Histogram of observed values (latencies in seconds) with labels, rendered in the
+    Prometheus text format with cumulative buckets, _sum and _count.
+    """
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *label_values):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *label_values):
+        entry = self._values.get(label_values)
+        return entry[2] if entry else 0
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observes the time spent in the with block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, (list(entry[0]), entry[1], entry[2])) for labels, entry in self._values.items())
+        for label_values, (bucket_counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, [("le", _format_number(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+# --- Metryki bota ---
+COMMAND_LATENCY = Histogram("bot_command_duration_seconds", "Time from receiving a command to its last reply.", ["command"])
+STAGE_LATENCY = Histogram("bot_stage_duration_seconds", "Time spent in one stage of handling a command.", ["stage"])
+MATCH_STAGE = Counter("bot_match_stage_total", "Queries by the matching stage that resolved them.", ["matcher", "stage"])
+COMMAND_ERRORS = Counter("bot_command_errors_total", "Commands that ended with an error.", ["command"])
+MESSAGES_SENT = Counter("bot_messages_sent_total", "Messages sent to Discord, by kind of call.", ["kind"])
+SEND_QUEUE_DEPTH = Gauge("bot_send_queue_depth", "Outbound messages waiting in the send scheduler, by kind of route.", ["route"])
+SEND_ROUTES = Gauge("bot_send_routes_active", "Channels and interactions with queued or running sends.")
+SENDS_SCHEDULED = Counter("bot_sends_scheduled_total",
+                          "Outbound messages by outcome (sent, merged, failed, rate_limited).", ["outcome"])
+ADMISSIONS = Counter("bot_admissions_total",
+                     "Admission decisions for expensive commands (admitted, queued, rejected_full, rejected_deadline).",
+                     ["command", "decision"])
+ADMISSION_WAITING = Gauge("bot_admission_waiting", "Expensive commands waiting for admission.")
+ADMISSION_RUNNING = Gauge("bot_admission_running", "Expensive commands admitted and running.")
+SINGLE_FLIGHT = Counter("bot_single_flight_total",
+                        "Computations started (leader) or joined while in flight (coalesced), by command.", ["flight", "role"])
+
+@contextmanager
+def track_command(command, guild=None):
+    """
+    Records the latency of a command handler and counts it as an error if the block raises.
+    Every handled command is also logged with its command, guild and latency fields.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        COMMAND_ERRORS.inc(command)
+        raise
+    finally:
+        latency = time.perf_counter() - start
+        COMMAND_LATENCY.observe(latency, command)
+        command_logger.info("Command handled", extra={"command": command, "guild": guild,
+                                                      "latency_ms": round(latency * 1000, 1)})
+
+def render_metrics():
+    """All metrics (plus the coalescing ratios and the result cache counters) in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+
+    # Share of the calls that joined a computation already in flight
+    lines.append("# HELP bot_single_flight_coalescing_ratio Coalesced calls / all calls, by command.")
+    lines.append("# TYPE bot_single_flight_coalescing_ratio gauge")
+    flights = sorted({label_values[0] for label_values in SINGLE_FLIGHT.label_values()})
+    for flight in flights:
+        leaders = SINGLE_FLIGHT.value(flight, "leader")
+        coalesced = SINGLE_FLIGHT.value(flight, "coalesced")
+        ratio = coalesced / (leaders + coalesced) if leaders + coalesced else 0.0
+        lines.append(f'bot_single_flight_coalescing_ratio{{flight="{_escape(flight)}"}} {_format_number(ratio)}')
+
+    stats = cache_stats()
+    for name, kind in (("hits", "counter"), ("misses", "counter"), ("size", "gauge")):
+        metric_name = f"bot_cache_{name}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric_name} Result cache {name}.")
+        lines.append(f"# TYPE {metric_name} {kind}")
+        for cache_name, cache in sorted(stats.items()):
+            lines.append(f'{metric_name}{{cache="{_escape(cache_name)}"}} {cache[name]}')
+    return "\n".join(lines) + "\n"
+
+async def _handle_request(reader, writer):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Skip the request headers
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", render_metrics().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def start_metrics_server(host="127.0.0.1", port=9108):
+    """Serves GET /metrics on host:port from the bot's event loop. Returns the asyncio server."""
+    server = await asyncio.start_server(_handle_request, host, port)
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return server
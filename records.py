@@ -0,0 +1,72 @@
+# records.py
+import sys
+
+def _intern(value):
+    """Interns repeated categorical strings, so equal values share a single object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Record:
+    """
+    Compact, read-only record with a fixed set of fields stored in __slots__.
+
+    Supports record["field"] and record.get("field", default) like the JSON dicts it
+    replaces, so formatting code works with both. A field that was missing in the
+    source data is stored as None and treated as missing.
+    """
+    __slots__ = ()
+    # Fields whose values repeat across records and are interned
+    CATEGORICAL = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            value = data.get(field)
+            if field in cls.CATEGORICAL:
+                value = _intern(value)
+            object.__setattr__(record, field, value)
+        return record
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, field):
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        return default if value is None else value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__ if getattr(self, field) is not None}
+
+    def __reduce__(self):
+        # Slotted read-only objects need an explicit pickle path (used by the process pool)
+        return (type(self).from_dict, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class StrainRecord(Record):
+    """Jedna odmiana z pliku strains_alt.json."""
+    __slots__ = ("strain_name", "product_name", "strain_type", "thc_content", "cbd_content",
+                 "availability", "strain_url")
+    CATEGORICAL = ("strain_type", "thc_content", "cbd_content", "availability")
+
+class ClinicRecord(Record):
+    """Jedna klinika z pliku clinic_data.json."""
+    __slots__ = ("title", "city", "address", "phone", "email", "website", "clinic_url",
+                 "description", "doctors")
+    CATEGORICAL = ("city",)
+
+    @classmethod
+    def from_dict(cls, data, city=None):
+        """`city` fills in the city when the source data has none (e.g. extracted from the address)."""
+        if city is not None and not data.get("city"):
+            data = dict(data, city=city)
+        if isinstance(data.get("doctors"), list):
+            data = dict(data, doctors=tuple(data["doctors"]))
+        return super().from_dict(data)
@@ -0,0 +1,121 @@
+# responses.py
+import asyncio
+import functools
+import discord
+from embed_layout import pack_embeds
+from executor import get_executor
+from metrics import STAGE_LATENCY, MESSAGES_SENT
+from send_scheduler import get_send_scheduler, HIGH, NORMAL
+
+# Czas (s), w jakim wynik musi być gotowy, żeby odpowiedzieć bez defer; Discord czeka na pierwszą odpowiedź 3 s
+DEFAULT_RESPONSE_BUDGET = 1.0
+
+_response_budget = DEFAULT_RESPONSE_BUDGET
+
+def configure_responses(budget=DEFAULT_RESPONSE_BUDGET):
+    """Sets how long a command may compute its answer before the interaction is deferred."""
+    global _response_budget
+    _response_budget = budget
+
+def is_interaction(target):
+    """True for an Interaction (answered through response/followup), False for a Context or a channel (Messageable)."""
+    return not isinstance(target, discord.abc.Messageable)
+
+def route_of(ctx_or_interaction):
+    """Send scheduler route of a reply: its interaction, or the channel of a Context (or the channel itself)."""
+    if is_interaction(ctx_or_interaction):
+        return ("interaction", ctx_or_interaction.id)
+    channel = getattr(ctx_or_interaction, "channel", None) or ctx_or_interaction
+    return ("channel", getattr(channel, "id", None) or id(channel))
+
+async def _deliver(ctx_or_interaction, ephemeral, **message):
+    if not is_interaction(ctx_or_interaction):
+        MESSAGES_SENT.inc("send")
+        return await ctx_or_interaction.send(**message)
+    if not ctx_or_interaction.response.is_done():
+        try:
+            MESSAGES_SENT.inc("response")
+            return await ctx_or_interaction.response.send_message(**message, ephemeral=ephemeral)
+        except discord.InteractionResponded:
+            pass
+    MESSAGES_SENT.inc("followup")
+    return await ctx_or_interaction.followup.send(**message, ephemeral=ephemeral)
+
+async def _deliver_defer(interaction, ephemeral):
+    if interaction.response.is_done():
+        return None
+    with STAGE_LATENCY.time("defer"):
+        try:
+            MESSAGES_SENT.inc("defer")
+            return await interaction.response.defer(ephemeral=ephemeral)
+        except discord.InteractionResponded:
+            return None
+
+async def send_response(ctx_or_interaction, ephemeral=False, priority=NORMAL, **message):
+    """
+    Sends one message through the send scheduler: with ctx.send for a Context (or a channel), as the
+    interaction response if it hasn't been responded to yet (one API call instead of defer + followup),
+    otherwise as a followup. Returns what discord.py returned for the request.
+    """
+    interaction = is_interaction(ctx_or_interaction)
+    if interaction and not ctx_or_interaction.response.is_done():
+        priority = HIGH
+    route = route_of(ctx_or_interaction)
+    # Replies to one interaction with the same visibility, or to one channel, can share a message
+    target = (route, ephemeral) if interaction else route
+    with STAGE_LATENCY.time("send"):
+        return await get_send_scheduler().submit(route, functools.partial(_deliver, ctx_or_interaction, ephemeral),
+                                                 message, target=target, priority=priority)
+
+async def send_embeds(ctx_or_interaction, embeds, ephemeral=False):
+    """
+    Sends the embeds packed into as few messages as possible.
+    For an interaction that hasn't been responded to yet, the first message is sent as the response.
+    """
+    for message_embeds in pack_embeds(embeds):
+        await send_response(ctx_or_interaction, ephemeral=ephemeral, embeds=message_embeds)
+
+async def defer_response(ctx_or_interaction, ephemeral=False):
+    """Defers an interaction that hasn't been responded to yet (does nothing for a Context)."""
+    if not is_interaction(ctx_or_interaction) or ctx_or_interaction.response.is_done():
+        return
+    await get_send_scheduler().submit(route_of(ctx_or_interaction),
+                                      functools.partial(_deliver_defer, ctx_or_interaction, ephemeral), {},
+                                      priority=HIGH)
+
+async def run_within_budget(ctx_or_interaction, func, *args, ephemeral=False, budget=None, flight=None, flight_key=None):
+    """
+    Runs func(*args) in the executor and returns its result.
+
+    For an interaction the result is awaited for at most `budget` seconds (see configure_responses);
+    only if it isn't ready by then is the interaction deferred, so fast answers go out as a single
+    response. When every executor worker is already busy the call will queue, so it defers right away.
+
+    With a SingleFlight and a key (command, normalized query and data version), concurrent calls
+    with the same key share one computation; each caller still defers its own interaction.
+    """
+    executor = get_executor()
+    # Every worker is busy, so new work would queue
+    busy = executor.pending >= executor.max_workers
+    shared = flight is not None and flight_key is not None
+    if shared:
+        task = flight.run(flight_key, lambda: executor.run(func, *args))
+    else:
+        task = asyncio.ensure_future(executor.run(func, *args))
+
+    try:
+        if is_interaction(ctx_or_interaction) and not task.done():
+            if budget is None:
+                budget = _response_budget
+            done = False
+            if budget > 0 and not busy:
+                # asyncio.wait leaves the task running when the time is up
+                done, _ = await asyncio.wait({task}, timeout=budget)
+            if not done:
+                await defer_response(ctx_or_interaction, ephemeral=ephemeral)
+        # A shared computation is shielded, so one cancelled caller doesn't cancel it for the others
+        return await (asyncio.shield(task) if shared else task)
+    except BaseException:
+        if not shared:
+            task.cancel()
+        raise
@@ -0,0 +1,210 @@
+# send_scheduler.py
+import asyncio
+from collections import deque
+import discord
+from embed_layout import MAX_EMBEDS_PER_MESSAGE, MAX_MESSAGE_CHARS
+from metrics import SEND_QUEUE_DEPTH, SEND_ROUTES, SENDS_SCHEDULED, STAGE_LATENCY
+
+# Priorytety wysyłek: pierwsza odpowiedź na interakcję (nie czeka na limit globalny) i zwykłe wiadomości
+HIGH, NORMAL = 0, 1
+
+MAX_CONTENT_LENGTH = 2000
+# How many times a message is retried after a 429 before its caller gets the error
+MAX_RATE_LIMIT_RETRIES = 3
+
+def merge_messages(first, second):
+    """
+    Combines two queued messages into one, or returns None when they can't be combined
+    within Discord's limits. Only plain text with plain text and embeds with embeds are merged.
+    """
+    if first.keys() == {"content"} and second.keys() == {"content"}:
+        content = f"{first['content']}\n{second['content']}"
+        return {"content": content} if len(content) <= MAX_CONTENT_LENGTH else None
+    if first.keys() == {"embeds"} and second.keys() == {"embeds"}:
+        embeds = list(first["embeds"]) + list(second["embeds"])
+        if len(embeds) <= MAX_EMBEDS_PER_MESSAGE and sum(len(embed) for embed in embeds) <= MAX_MESSAGE_CHARS:
+            return {"embeds": embeds}
+    return None
+
+def retry_after_of(error):
+    """Seconds to wait before retrying after a rate-limit error (None if the error is not a 429)."""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        headers = getattr(error.response, "headers", None) or {}
+        try:
+            return float(headers.get("Retry-After") or headers.get("X-RateLimit-Reset-After"))
+        except (TypeError, ValueError):
+            return 1.0
+    return None
+
+def exhausted_reset_after(result):
+    """
+    Seconds until the bucket resets when the response headers say it is exhausted, otherwise None.
+    Messages returned by discord.py carry no headers, so this only applies to transports that expose them.
+    """
+    headers = getattr(result, "headers", None)
+    if not headers or str(headers.get("X-RateLimit-Remaining")) != "0":
+        return None
+    try:
+        return float(headers.get("X-RateLimit-Reset-After", 0))
+    except (TypeError, ValueError):
+        return None
+
+class _Job:
+    __slots__ = ("deliver", "target", "message", "priority", "futures", "queued_at", "attempts")
+
+    def __init__(self, deliver, target, message, priority, future, queued_at):
+        self.deliver = deliver
+        self.target = target
+        self.message = message
+        self.priority = priority
+        self.futures = [future]
+        self.queued_at = queued_at
+        self.attempts = 0
+
+class _Route:
+    __slots__ = ("key", "jobs", "workers", "paused_until")
+
+    def __init__(self, key):
+        self.key = key
+        self.jobs = deque()
+        self.workers = 0
+        self.paused_until = 0.0
+
+class SendScheduler:
+    """
+    Sends every outbound message through a queue per route: a channel, or an interaction's
+    webhook, which Discord rate-limits as separate buckets.
+
+    Each route sends its messages in order with at most `route_concurrency` requests in flight,
+    and all routes together with at most `global_concurrency` (first responses to interactions
+    skip the global limit, they must go out within 3 seconds). A route that got a 429, or whose
+    response headers say the bucket is exhausted, pauses until the bucket resets instead of
+    piling more requests behind the rate limit.
+
+    Under pressure, when messages are already waiting on a route, a new message for the same
+    target is merged into the last waiting one if the two fit into one message (see
+    merge_messages), which saves a request. No message is dropped: every one is either the
+    only reply to a command or part of its answer.
+
+    Used from the event loop only. Queue depths are exported as bot_send_queue_depth.
+
+    Args:
+        route_concurrency (int): Requests in flight per route.
+        global_concurrency (int): Requests in flight over all routes.
+    """
+
+    def __init__(self, route_concurrency=1, global_concurrency=8):
+        self.route_concurrency = route_concurrency
+        self.global_concurrency = global_concurrency
+        self._routes = {}
+        self._global = None
+
+    def depth(self, key):
+        """Number of messages waiting on a route."""
+        route = self._routes.get(key)
+        return len(route.jobs) if route else 0
+
+    def _count_queued(self, route, amount):
+        SEND_QUEUE_DEPTH.inc(route.key[0], amount=amount)
+
+    async def submit(self, key, deliver, message, target=None, priority=NORMAL):
+        """
+        Queues deliver(**message) on the route `key` (a (kind, id) tuple) and returns its result
+        once sent. Messages with the same `target` (None: never)
+        may be merged into one request.
+        """
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = _Route(key)
+            SEND_ROUTES.inc()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if route.jobs and target is not None:
+            last = route.jobs[-1]
+            merged = merge_messages(last.message, message) if last.target == target else None
+            if merged is not None:
+                last.message = merged
+                last.priority = min(last.priority, priority)
+                last.futures.append(future)
+                SENDS_SCHEDULED.inc("merged")
+                return await future
+
+        route.jobs.append(_Job(deliver, target, message, priority, future, loop.time()))
+        self._count_queued(route, 1)
+        if route.workers < self.route_concurrency:
+            route.workers += 1
+            asyncio.ensure_future(self._drain(route))
+        return await future
+
+    def _forget_if_idle(self, route):
+        if not route.workers and not route.jobs and self._routes.get(route.key) is route:
+            del self._routes[route.key]
+            SEND_ROUTES.dec()
+
+    def _global_slots(self):
+        # Created on first use inside the running loop: before Python 3.10 a semaphore binds to the
+        # loop current when it is created, and the scheduler is configured before client.run() starts one
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.global_concurrency)
+        return self._global
+
+    async def _send(self, job):
+        if job.priority == HIGH:
+            return await job.deliver(**job.message)
+        async with self._global_slots():
+            return await job.deliver(**job.message)
+
+    async def _drain(self, route):
+        loop = asyncio.get_running_loop()
+        try:
+            while route.jobs:
+                wait = route.paused_until - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                job = route.jobs.popleft()
+                self._count_queued(route, -1)
+                STAGE_LATENCY.observe(loop.time() - job.queued_at, "send_queue")
+                try:
+                    result = await self._send(job)
+                except Exception as e:
+                    retry_after = retry_after_of(e)
+                    if retry_after is not None and job.attempts < MAX_RATE_LIMIT_RETRIES:
+                        # Wait for the bucket to reset and retry the same message first
+                        SENDS_SCHEDULED.inc("rate_limited")
+                        job.attempts += 1
+                        route.paused_until = max(route.paused_until, loop.time() + retry_after)
+                        route.jobs.appendleft(job)
+                        self._count_queued(route, 1)
+                        continue
+                    SENDS_SCHEDULED.inc("failed")
+                    for future in job.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                reset_after = exhausted_reset_after(result)
+                if reset_after:
+                    route.paused_until = max(route.paused_until, loop.time() + reset_after)
+                SENDS_SCHEDULED.inc("sent")
+                for future in job.futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            route.workers -= 1
+            self._forget_if_idle(route)
+
+_scheduler = SendScheduler()
+
+def configure_send_scheduler(route_concurrency=1, global_concurrency=8):
+    """Replaces the shared scheduler with one using the given settings (call before the bot starts sending)."""
+    global _scheduler
+    _scheduler = SendScheduler(route_concurrency=route_concurrency, global_concurrency=global_concurrency)
+    return _scheduler
+
+def get_send_scheduler():
+    return _scheduler
@@ -0,0 +1,44 @@
+# single_flight.py
+import asyncio
+from metrics import SINGLE_FLIGHT
+
+class SingleFlight:
+    """
+    Shares one in-flight computation between concurrent callers asking for the same key.
+
+    The first caller for a key starts the computation; callers arriving while it runs get
+    the same future instead of starting their own. The key is forgotten once the
+    computation finishes, so later calls (normally served by the result cache) start a new one.
+    Used from the event loop only. Every call is counted in bot_single_flight_total as
+    "leader" or "coalesced".
+
+    Args:
+        name (str): Label of the flight in the metrics, normally the command.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def run(self, key, factory):
+        """Returns a future with the result of factory() (a coroutine function), joining a running one for the key."""
+        future = self._flights.get(key)
+        if future is not None:
+            SINGLE_FLIGHT.inc(self.name, "coalesced")
+            return future
+
+        SINGLE_FLIGHT.inc(self.name, "leader")
+        future = asyncio.ensure_future(factory())
+        self._flights[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        if self._flights.get(key) is future:
+            del self._flights[key]
+        # Callers that gave up (e.g. cancelled) no longer retrieve the exception, so retrieve it here
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,157 @@
+# sqlite_store.py
+import json
+import logging
+import sqlite3
+import threading
+from data_loader import parse_data_file
+from records import StrainRecord, ClinicRecord
+from clinic_utils import build_clinic_records
+
+logger = logging.getLogger('cannabis_clinic_bot.data')
+
+# Rows are stored at their position in the source file. Record fields have no declared type, so numbers
+# stay numbers as in the JSON; lists and objects are stored as JSON.
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    kind TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    signature TEXT
+);
+CREATE TABLE IF NOT EXISTS strains (
+    position INTEGER PRIMARY KEY,
+    strain_name TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    strain_type,
+    thc_content,
+    cbd_content,
+    availability,
+    strain_url
+);
+CREATE TABLE IF NOT EXISTS clinics (
+    position INTEGER PRIMARY KEY,
+    title,
+    city,
+    address,
+    phone,
+    email,
+    website,
+    clinic_url,
+    description,
+    doctors
+);
+"""
+# Tables of older schema versions, dropped when the database is upgraded
+_OLD_TABLES = ("strains_fts", "clinics_fts", "strains", "clinics", "sources")
+
+STRAIN_COLUMNS = StrainRecord.__slots__
+CLINIC_COLUMNS = ClinicRecord.__slots__
+
+def _column_value(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, tuple, dict)) else value
+
+class CatalogueStore:
+    """
+    Optional SQLite copy of the last successfully loaded strains and clinics (STORAGE_BACKEND = "sqlite").
+
+    A JSON file is parsed, validated and imported only when its (mtime, size) signature
+    differs from the one recorded at the last import; otherwise the stored rows are read
+    back. Imports run in one transaction on a WAL database, so a failed or interrupted
+    import leaves the previous rows in place.
+
+    The store only replaces reading the JSON files: the records and every index are built
+    in memory from the rows exactly as from the JSON, so lookups, lists and fuzzy results
+    are the same with both backends.
+
+    Every thread uses its own connection.
+
+    Args:
+        path (str): Path of the database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Nothing but a copy of the JSON files is stored, so an older database is rebuilt on the next import
+            with connection:
+                for table in _OLD_TABLES:
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def _source(self, kind):
+        """(path, signature) of the last import of `kind`, or None."""
+        row = self._connection().execute("SELECT path, signature FROM sources WHERE kind = ?", (kind,)).fetchone()
+        return (row["path"], row["signature"]) if row else None
+
+    def stored(self, kind, filepath):
+        """The records of `kind` last imported from `filepath`, or None if it was never imported."""
+        source = self._source(kind)
+        if source is None or source[0] != filepath:
+            return None
+        return self.strains() if kind == "strains" else self.clinics()
+
+    def load(self, kind, filepath, signature, validate):
+        """
+        Returns the records of `kind` ("strains" or "clinics"), importing the file first if it
+        changed since the last import. Raises like parse_data_file / validate for a bad file.
+        """
+        signature = json.dumps(signature) if signature is not None else None
+        if signature is None or self._source(kind) != (filepath, signature):
+            data = validate(parse_data_file(filepath))
+            if kind == "strains":
+                self.import_strains(data, filepath, signature)
+            else:
+                self.import_clinics(data, filepath, signature)
+            logger.info(f"Imported {len(data)} {kind} from {filepath} into {self.path}")
+        return self.strains() if kind == "strains" else self.clinics()
+
+    def _replace(self, table, columns, rows, filepath, signature):
+        connection = self._connection()
+        placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+        with connection:
+            connection.execute(f"DELETE FROM {table}")
+            connection.executemany(f"INSERT INTO {table} (position, {', '.join(columns)}) VALUES ({placeholders})",
+                                   rows)
+            connection.execute("INSERT OR REPLACE INTO sources (kind, path, signature) VALUES (?, ?, ?)",
+                               (table, filepath, signature))
+
+    def import_strains(self, strains_data, filepath="", signature=None):
+        """Replaces the stored strains with the given (validated) strain dicts or records."""
+        rows = []
+        for position, strain in enumerate(strains_data):
+            record = strain if isinstance(strain, StrainRecord) else StrainRecord.from_dict(strain)
+            rows.append((position, *(_column_value(getattr(record, column)) for column in STRAIN_COLUMNS)))
+        self._replace("strains", STRAIN_COLUMNS, rows, filepath, signature)
+
+    def import_clinics(self, clinics_data, filepath="", signature=None):
+        """Replaces the stored clinics with the given (validated) clinic dicts or records."""
+        rows = [(position, *(_column_value(getattr(clinic, column)) for column in CLINIC_COLUMNS))
+                for position, clinic in enumerate(build_clinic_records(clinics_data))]
+        self._replace("clinics", CLINIC_COLUMNS, rows, filepath, signature)
+
+    def strains(self):
+        """All stored strains as StrainRecords, in file order."""
+        rows = self._connection().execute(f"SELECT {', '.join(STRAIN_COLUMNS)} FROM strains ORDER BY position")
+        return [StrainRecord.from_dict(dict(row)) for row in rows]
+
+    def clinics(self):
+        """All stored clinics as ClinicRecords, in file order."""
+        records = []
+        for row in self._connection().execute(f"SELECT {', '.join(CLINIC_COLUMNS)} FROM clinics ORDER BY position"):
+            clinic = dict(row)
+            if isinstance(clinic["doctors"], str):
+                clinic["doctors"] = json.loads(clinic["doctors"])
+            records.append(ClinicRecord.from_dict(clinic))
+        return records
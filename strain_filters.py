@@ -0,0 +1,248 @@
+# strain_filters.py
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from text_normalization import fold_diacritics, fold_key
+
+# Filtry komendy /filtruj; thc i cbd to (od, do) w procentach, None = bez ograniczenia
+StrainFilter = namedtuple("StrainFilter", ["thc", "cbd", "strain_types", "availability"],
+                          defaults=(None, None, (), ()))
+
+# Typ odmiany -> początek słowa, po którym jest rozpoznawany w danych i w zapytaniu ("hybrid", "hybryda", ...)
+STRAIN_TYPE_STEMS = {"indica": "indic", "sativa": "sativ", "hybryda": "hybr"}
+
+# Dostępność: "dostepne" to każda odmiana z informacją o dostępności, która nie jest brak/wycofany
+AVAILABLE = "dostepne"
+AVAILABILITY_LEVELS = ("wysoka", "srednia", "niska", "brak", "wycofany")
+UNAVAILABLE = {"brak", "wycofany", "brak informacji"}
+AVAILABILITY_ALIASES = {"dostepne": AVAILABLE, "dostepna": AVAILABLE, "dostepny": AVAILABLE, "dostepnosc": AVAILABLE}
+AVAILABILITY_LABELS = {AVAILABLE: "dostępne", "wysoka": "dostępność wysoka", "srednia": "dostępność średnia",
+                       "niska": "dostępność niska", "brak": "dostępność brak", "wycofany": "wycofane"}
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_CONTENT_NUMBER = re.compile(_NUMBER)
+# "thc 20-25", "thc 20% - 25%", "thc od 20 do 25", "cbd <1", "cbd do 1", "thc >= 20", "thc 22"
+_RANGE_QUERY = re.compile(
+    rf"\b(thc|cbd)\s*:?\s*(?:od\s*{_NUMBER}\s*%?\s*do\s*{_NUMBER}"
+    rf"|(<=|>=|<|>|=|do|od|ponizej|powyzej)\s*{_NUMBER}|{_NUMBER}\s*%?\s*(?:-|do)\s*{_NUMBER}|{_NUMBER})\s*%?")
+_UPPER_BOUNDS = {"<", "<=", "do", "ponizej"}
+_LOWER_BOUNDS = {">", ">=", "od", "powyzej"}
+
+def _to_float(number):
+    return float(number.replace(",", "."))
+
+def parse_content_range(text):
+    """
+    Parses a thc_content / cbd_content string into a (low, high) range in percent:
+    "22%" -> (22, 22), "<1%" -> (0, 1), "20-25%" -> (20, 25), ">20%" -> (20, inf),
+    "220 mg/g" -> (22, 22). Returns None when the string holds no number ("N/A").
+    """
+    if not text:
+        return None
+    text = str(text).strip().lower()
+    numbers = [_to_float(number) for number in _CONTENT_NUMBER.findall(text)]
+    if not numbers:
+        return None
+    if "mg/g" in text:
+        numbers = [number / 10 for number in numbers]
+    if text.startswith("<"):
+        return (0.0, numbers[0])
+    if text.startswith(">"):
+        return (numbers[0], float("inf"))
+    return (min(numbers), max(numbers)) if len(numbers) > 1 else (numbers[0], numbers[0])
+
+class RangeIndex:
+    """
+    Lower and upper bounds of a numeric attribute as two sorted arrays, so the strains whose
+    range overlaps a query range are found with two bisects and one set intersection.
+    Strains without a parsed value are left out.
+    """
+
+    def __init__(self, ranges):
+        by_low = sorted((bounds[0], position) for position, bounds in enumerate(ranges) if bounds is not None)
+        by_high = sorted((bounds[1], position) for position, bounds in enumerate(ranges) if bounds is not None)
+        self.lows = [low for low, _ in by_low]
+        self.low_positions = [position for _, position in by_low]
+        self.highs = [high for high, _ in by_high]
+        self.high_positions = [position for _, position in by_high]
+
+    def overlapping(self, low=None, high=None):
+        """Returns the set of positions whose range overlaps [low, high] (None = unbounded)."""
+        # Starting at or below `high`
+        below = self.low_positions[:bisect_right(self.lows, high)] if high is not None else self.low_positions
+        if low is None:
+            return set(below)
+        # Ending at or above `low`
+        above = self.high_positions[bisect_left(self.highs, low):]
+        if high is None:
+            return set(above)
+        smaller, larger = (below, above) if len(below) <= len(above) else (above, below)
+        return set(smaller).intersection(larger)
+
+class StrainAttributeIndex:
+    """
+    Indexes for /filtruj, built once when the data is loaded: a RangeIndex over the parsed THC
+    and CBD content and sets of positions per strain type and per availability. A query is
+    answered by intersecting these sets, nothing is scanned or parsed per query.
+    """
+
+    def __init__(self, strains):
+        self.size = len(strains)
+        # The content strings repeat a lot, so each distinct string is parsed once
+        parsed = {}
+        ranges = {"thc": [], "cbd": []}
+        self.by_type = {strain_type: set() for strain_type in STRAIN_TYPE_STEMS}
+        self.by_availability = {level: set() for level in (AVAILABLE, *AVAILABILITY_LEVELS)}
+        for position, strain in enumerate(strains):
+            for attribute in ("thc", "cbd"):
+                value = strain.get(f"{attribute}_content")
+                if value not in parsed:
+                    parsed[value] = parse_content_range(value)
+                ranges[attribute].append(parsed[value])
+
+            words = fold_key(strain.get("strain_type", "")).split()
+            for strain_type, stem in STRAIN_TYPE_STEMS.items():
+                if any(word.startswith(stem) for word in words):
+                    self.by_type[strain_type].add(position)
+
+            availability = fold_key(strain.get("availability", ""))
+            if availability in self.by_availability:
+                self.by_availability[availability].add(position)
+            if availability and availability not in UNAVAILABLE:
+                self.by_availability[AVAILABLE].add(position)
+
+        self.thc = RangeIndex(ranges["thc"])
+        self.cbd = RangeIndex(ranges["cbd"])
+
+    def matching(self, strain_filter):
+        """Returns the set of positions of the strains matching every criterion of the StrainFilter."""
+        candidates = []
+        if strain_filter.thc:
+            candidates.append(self.thc.overlapping(*strain_filter.thc))
+        if strain_filter.cbd:
+            candidates.append(self.cbd.overlapping(*strain_filter.cbd))
+        if strain_filter.strain_types:
+            candidates.append(set().union(*(self.by_type[strain_type] for strain_type in strain_filter.strain_types)))
+        if strain_filter.availability:
+            candidates.append(set().union(*(self.by_availability[level] for level in strain_filter.availability)))
+        if not candidates:
+            return set(range(self.size))
+
+        # Intersect starting from the smallest set
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for positions in candidates[1:]:
+            result &= positions
+        return result
+
+def _merge_bounds(current, low, high):
+    """Narrows the (low, high) range of a filter with another criterion for the same attribute."""
+    if current is None:
+        return (low, high)
+    current_low, current_high = current
+    if low is not None:
+        current_low = low if current_low is None else max(current_low, low)
+    if high is not None:
+        current_high = high if current_high is None else min(current_high, high)
+    return (current_low, current_high)
+
+def strain_type_of(word):
+    """Returns the strain type (key of STRAIN_TYPE_STEMS) named by the word, or None."""
+    word = fold_key(word)
+    for strain_type, stem in STRAIN_TYPE_STEMS.items():
+        if word.startswith(stem):
+            return strain_type
+    return None
+
+def availability_of(word):
+    """Returns the availability level (AVAILABLE or one of AVAILABILITY_LEVELS) named by the word, or None."""
+    word = fold_key(word)
+    if word in AVAILABILITY_LEVELS:
+        return word
+    return AVAILABILITY_ALIASES.get(word)
+
+def _ordered_bounds(bounds):
+    """(low, high) with the bounds swapped if given the wrong way round (thc_od 25, thc_do 20), None if unbounded."""
+    if not bounds or bounds == (None, None):
+        return None
+    low, high = bounds
+    if low is not None and high is not None and low > high:
+        return (high, low)
+    return tuple(bounds)
+
+def make_strain_filter(thc=None, cbd=None, strain_types=(), availability=()):
+    """Builds a StrainFilter with ordered, duplicate-free criteria, so equal filters share cache entries."""
+    return StrainFilter(
+        thc=_ordered_bounds(thc),
+        cbd=_ordered_bounds(cbd),
+        strain_types=tuple(strain_type for strain_type in STRAIN_TYPE_STEMS if strain_type in set(strain_types)),
+        availability=tuple(level for level in (AVAILABLE, *AVAILABILITY_LEVELS) if level in set(availability)),
+    )
+
+def parse_strain_filter(text):
+    """
+    Parsuje kryteria komendy !filtruj, np. "thc 20-25 cbd <1 indica dostępne".
+
+    Returns (StrainFilter, list of words that were not recognized).
+    """
+    text = fold_diacritics(text or "").lower().replace("–", "-")
+    bounds = {"thc": None, "cbd": None}
+
+    def take_range(match):
+        attribute, from_value, to_value, operator, operator_value, low, high, value = match.groups()
+        if from_value is not None:
+            low, high = sorted((_to_float(from_value), _to_float(to_value)))
+            bounds[attribute] = _merge_bounds(bounds[attribute], low, high)
+        elif operator in _UPPER_BOUNDS:
+            bounds[attribute] = _merge_bounds(bounds[attribute], None, _to_float(operator_value))
+        elif operator in _LOWER_BOUNDS:
+            bounds[attribute] = _merge_bounds(bounds[attribute], _to_float(operator_value), None)
+        elif operator == "=":
+            number = _to_float(operator_value)
+            bounds[attribute] = _merge_bounds(bounds[attribute], number, number)
+        elif low is not None:
+            low, high = sorted((_to_float(low), _to_float(high)))
+            bounds[attribute] = _merge_bounds(bounds[attribute], low, high)
+        else:
+            number = _to_float(value)
+            bounds[attribute] = _merge_bounds(bounds[attribute], number, number)
+        return " "
+
+    rest = _RANGE_QUERY.sub(take_range, text)
+    strain_types = []
+    availability = []
+    unknown = []
+    for word in fold_key(rest).split():
+        strain_type = strain_type_of(word)
+        level = availability_of(word) if strain_type is None else None
+        if strain_type:
+            strain_types.append(strain_type)
+        elif level:
+            availability.append(level)
+        else:
+            unknown.append(word)
+
+    strain_filter = make_strain_filter(bounds["thc"], bounds["cbd"], strain_types, availability)
+    return strain_filter, unknown
+
+def _format_percent(number):
+    return f"{number:g}%"
+
+def _describe_bounds(name, bounds):
+    low, high = bounds
+    if low is not None and high is not None:
+        return f"{name} {_format_percent(low)}" if low == high else f"{name} {low:g}–{_format_percent(high)}"
+    if high is not None:
+        return f"{name} do {_format_percent(high)}"
+    return f"{name} od {_format_percent(low)}"
+
+def describe_strain_filter(strain_filter):
+    """Opis filtrów do nagłówka listy, np. "THC 20–25%, CBD do 1%, indica, dostępne"."""
+    parts = []
+    if strain_filter.thc:
+        parts.append(_describe_bounds("THC", strain_filter.thc))
+    if strain_filter.cbd:
+        parts.append(_describe_bounds("CBD", strain_filter.cbd))
+    parts.extend(strain_filter.strain_types)
+    parts.extend(AVAILABILITY_LABELS[level] for level in strain_filter.availability)
+    return ", ".join(parts)
@@ -1,57 +1,94 @@
 # strains_commands.py
+import logging
 import discord
 from discord import app_commands
 from strains_utils import get_strain_info, list_strains, parse_producer_filters, parse_producer_includes
+from strain_filters import parse_strain_filter, make_strain_filter, AVAILABLE
+from autocomplete import MAX_CHOICE_LENGTH
+from metrics import track_command, COMMAND_ERRORS
+from responses import send_response
 
-def register_strain_commands(client, tree, strains_data):
-    """Rejestruje komendy związane z odmianami."""
+logger = logging.getLogger('cannabis_clinic_bot.commands')
+
+FILTER_USAGE = ("Użyj: `!filtruj [kryteria]`, np. `!filtruj thc 20-25 cbd <1 indica dostępne`.\n"
+                "Kryteria: `thc`/`cbd` z zakresem (`20-25`, `od 20 do 25`, `<1`, `>20`, `22`), typ (`indica`, `sativa`, `hybryda`) "
+                "i dostępność (`dostępne`, `wysoka`, `średnia`, `niska`).")
+
+def register_strain_commands(client, tree, data_manager):
+    """
+    Rejestruje komendy związane z odmianami.
+    Dane są odczytywane z bieżącej migawki data_manager przy każdym wywołaniu, więc przeładowanie nie wymaga restartu.
+    """
 
     @client.command(name="odmiana", help="Wyświetla informacje o danej odmianie.")
     async def strain_prefix(ctx, *, nazwa_odmiany: str = None):
-        if nazwa_odmiany is None:
-            await ctx.send("Proszę podać nazwę odmiany. Użyj: `!odmiana [nazwa odmiany]`")
-            return
+        with track_command("!odmiana", guild=ctx.guild.id if ctx.guild else None):
+            if nazwa_odmiany is None:
+                await ctx.send("Proszę podać nazwę odmiany. Użyj: `!odmiana [nazwa odmiany]`")
+                return
             
-        # Clean up the input a bit
-        nazwa_odmiany = nazwa_odmiany.strip()
-        if not nazwa_odmiany:
-            await ctx.send("Proszę podać poprawną nazwę odmiany. Użyj: `!odmiana [nazwa odmiany]`")
-            return
+            # Clean up the input a bit
+            nazwa_odmiany = nazwa_odmiany.strip()
+            if not nazwa_odmiany:
+                await ctx.send("Proszę podać poprawną nazwę odmiany. Użyj: `!odmiana [nazwa odmiany]`")
+                return
             
-        await get_strain_info(ctx, nazwa_odmiany, strains_data, ephemeral=False)
+            await get_strain_info(ctx, nazwa_odmiany, data_manager.snapshot.strain_index, ephemeral=False)
 
     @client.command(name="listaodmian", help="Wyświetla listę wszystkich dostępnych odmian. Użyj: -producent (aby wykluczyć), +producent (aby pokazać tylko określonych producentów).")
     async def list_strains_prefix(ctx, *args):
-        # Parse args to extract producers to exclude or include
-        excluded_producers = parse_producer_filters(args)
-        included_producers = parse_producer_includes(args)
+        with track_command("!listaodmian", guild=ctx.guild.id if ctx.guild else None):
+            # Parse args to extract producers to exclude or include
+            excluded_producers = parse_producer_filters(args)
+            included_producers = parse_producer_includes(args)
         
-        # Only one filtering mode can be active at once
-        if excluded_producers and included_producers:
-            await ctx.send("Błąd: Nie możesz używać filtrów wykluczających (-) i włączających (+) jednocześnie. Wybierz jeden rodzaj filtrowania.")
-            return
+            # Only one filtering mode can be active at once
+            if excluded_producers and included_producers:
+                await ctx.send("Błąd: Nie możesz używać filtrów wykluczających (-) i włączających (+) jednocześnie. Wybierz jeden rodzaj filtrowania.")
+                return
         
-        await list_strains(ctx, strains_data, ephemeral=False, 
-                          excluded_producers=excluded_producers, 
-                          included_producers=included_producers)
+            await list_strains(ctx, data_manager.snapshot.strain_index, ephemeral=False, 
+                              excluded_producers=excluded_producers, 
+                              included_producers=included_producers)
+
+    @client.command(name="filtruj", help="Wyświetla odmiany według THC, CBD, typu i dostępności, np. !filtruj thc 20-25 cbd <1 indica dostępne")
+    async def filter_strains_prefix(ctx, *, kryteria: str = None):
+        with track_command("!filtruj", guild=ctx.guild.id if ctx.guild else None):
+            strain_filter, unknown = parse_strain_filter(kryteria)
+            if unknown:
+                await ctx.send(f"Nie rozpoznano: {', '.join(unknown)}. {FILTER_USAGE}")
+                return
+            if not any(strain_filter):
+                await ctx.send(f"Proszę podać kryteria. {FILTER_USAGE}")
+                return
+
+            await list_strains(ctx, data_manager.snapshot.strain_index, ephemeral=False, strain_filter=strain_filter)
 
     @tree.command(name="odmiana", description="Wyświetla informacje o danej odmianie.")
     async def strain_command(interaction: discord.Interaction, nazwa_odmiany: str):
-        try:
-            await interaction.response.defer(ephemeral=True)
-            nazwa_odmiany = nazwa_odmiany.strip()
-            if not nazwa_odmiany:
-                await interaction.followup.send("Proszę podać poprawną nazwę odmiany.", ephemeral=True)
-                return
-                
-            await get_strain_info(interaction, nazwa_odmiany, strains_data, ephemeral=True)
-        except Exception as e:
-            print(f"Error in /odmiana: {e}")
-            # Try to recover if possible
+        with track_command("/odmiana", guild=interaction.guild_id):
             try:
-                await interaction.followup.send("Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.", ephemeral=True)
-            except:
-                print("Failed to send error message")
+                nazwa_odmiany = nazwa_odmiany.strip()
+                if not nazwa_odmiany:
+                    await send_response(interaction, ephemeral=True, content="Proszę podać poprawną nazwę odmiany.")
+                    return
+                
+                await get_strain_info(interaction, nazwa_odmiany, data_manager.snapshot.strain_index, ephemeral=True)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/odmiana")
+                logger.exception(f"Error in /odmiana: {e}", extra={"command": "/odmiana", "guild": interaction.guild_id})
+                # Try to recover if possible
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/odmiana", "guild": interaction.guild_id})
+
+    @strain_command.autocomplete("nazwa_odmiany")
+    async def strain_name_autocomplete(interaction: discord.Interaction, current: str):
+        # Served from the prefix index built at load, cheap enough to run on every keystroke
+        names = data_manager.snapshot.strain_index.suggest(current)
+        return [app_commands.Choice(name=name[:MAX_CHOICE_LENGTH], value=name[:MAX_CHOICE_LENGTH]) for name in names]
 
     @tree.command(name="listaodmian", description="Wyświetla listę dostępnych odmian.")
     @discord.app_commands.describe(
@@ -59,44 +96,91 @@ def register_strain_commands(client, tree, strains_data):
         pokaz="Opcjonalnie: Lista producentów do pokazania (np. 'four20 cantourage')"
     )
     async def list_strains_command(interaction: discord.Interaction, wyklucz: str = None, pokaz: str = None):
-        try:
-            await interaction.response.defer(ephemeral=True)
-            
-            excluded_producers = []
-            included_producers = []
+        with track_command("/listaodmian", guild=interaction.guild_id):
+            try:
+                excluded_producers = []
+                included_producers = []
             
-            if wyklucz and pokaz:
-                await interaction.followup.send("Błąd: Nie możesz używać parametrów 'wyklucz' i 'pokaz' jednocześnie. Wybierz jeden rodzaj filtrowania.", ephemeral=True)
-                return
+                if wyklucz and pokaz:
+                    await send_response(interaction, ephemeral=True, content="Błąd: Nie możesz używać parametrów 'wyklucz' i 'pokaz' jednocześnie. Wybierz jeden rodzaj filtrowania.")
+                    return
                 
-            if wyklucz:
-                # Split by spaces and add '-' prefix to match the parse_producer_filters format
-                args = [f"-{producer.strip()}" for producer in wyklucz.split() if producer.strip()]
-                excluded_producers = parse_producer_filters(args)
+                if wyklucz:
+                    # Split by spaces and add '-' prefix to match the parse_producer_filters format
+                    args = [f"-{producer.strip()}" for producer in wyklucz.split() if producer.strip()]
+                    excluded_producers = parse_producer_filters(args)
             
-            if pokaz:
-                # Split by spaces and add '+' prefix to match the parse_producer_includes format
-                args = [f"+{producer.strip()}" for producer in pokaz.split() if producer.strip()]
-                included_producers = parse_producer_includes(args)
+                if pokaz:
+                    # Split by spaces and add '+' prefix to match the parse_producer_includes format
+                    args = [f"+{producer.strip()}" for producer in pokaz.split() if producer.strip()]
+                    included_producers = parse_producer_includes(args)
                 
-            await list_strains(interaction, strains_data, ephemeral=True,
-                              excluded_producers=excluded_producers,
-                              included_producers=included_producers)
-        except Exception as e:
-            print(f"Error in /listaodmian: {e}")
+                await list_strains(interaction, data_manager.snapshot.strain_index, ephemeral=True,
+                                  excluded_producers=excluded_producers,
+                                  included_producers=included_producers)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/listaodmian")
+                logger.exception(f"Error in /listaodmian: {e}", extra={"command": "/listaodmian", "guild": interaction.guild_id})
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/listaodmian", "guild": interaction.guild_id})
+
+    @tree.command(name="filtruj", description="Wyświetla odmiany według zawartości THC i CBD, typu i dostępności.")
+    @discord.app_commands.describe(
+        thc_od="Opcjonalnie: Minimalna zawartość THC w %",
+        thc_do="Opcjonalnie: Maksymalna zawartość THC w %",
+        cbd_od="Opcjonalnie: Minimalna zawartość CBD w %",
+        cbd_do="Opcjonalnie: Maksymalna zawartość CBD w %",
+        typ="Opcjonalnie: Typ odmiany",
+        dostepnosc="Opcjonalnie: Dostępność"
+    )
+    @discord.app_commands.choices(
+        typ=[app_commands.Choice(name="Indica", value="indica"),
+             app_commands.Choice(name="Sativa", value="sativa"),
+             app_commands.Choice(name="Hybryda", value="hybryda")],
+        dostepnosc=[app_commands.Choice(name="Dostępne", value=AVAILABLE),
+                    app_commands.Choice(name="Wysoka", value="wysoka"),
+                    app_commands.Choice(name="Średnia", value="srednia"),
+                    app_commands.Choice(name="Niska", value="niska")]
+    )
+    async def filter_strains_command(interaction: discord.Interaction, thc_od: float = None, thc_do: float = None,
+                                     cbd_od: float = None, cbd_do: float = None,
+                                     typ: app_commands.Choice[str] = None, dostepnosc: app_commands.Choice[str] = None):
+        with track_command("/filtruj", guild=interaction.guild_id):
             try:
-                await interaction.followup.send("Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.", ephemeral=True)
-            except:
-                print("Failed to send error message")
+                strain_filter = make_strain_filter(
+                    thc=(thc_od, thc_do),
+                    cbd=(cbd_od, cbd_do),
+                    strain_types=[typ.value] if typ else [],
+                    availability=[dostepnosc.value] if dostepnosc else [],
+                )
+                if not any(strain_filter):
+                    await send_response(interaction, ephemeral=True, content="Proszę podać przynajmniej jedno kryterium.")
+                    return
+
+                await list_strains(interaction, data_manager.snapshot.strain_index, ephemeral=True,
+                                   strain_filter=strain_filter)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/filtruj")
+                logger.exception(f"Error in /filtruj: {e}", extra={"command": "/filtruj", "guild": interaction.guild_id})
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/filtruj", "guild": interaction.guild_id})
 
     @tree.command(name="odmiany", description="Wyświetla listę wszystkich dostępnych odmian.")
     async def strains_command(interaction: discord.Interaction):
-        try:
-            await interaction.response.defer(ephemeral=True)
-            await list_strains(interaction, strains_data, ephemeral=True)
-        except Exception as e:
-            print(f"Error in /odmiany: {e}")
+        with track_command("/odmiany", guild=interaction.guild_id):
             try:
-                await interaction.followup.send("Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.", ephemeral=True)
-            except:
-                print("Failed to send error message")
\ No newline at end of file
+                await list_strains(interaction, data_manager.snapshot.strain_index, ephemeral=True)
+            except Exception as e:
+                COMMAND_ERRORS.inc("/odmiany")
+                logger.exception(f"Error in /odmiany: {e}", extra={"command": "/odmiany", "guild": interaction.guild_id})
+                try:
+                    await send_response(interaction, ephemeral=True,
+                                        content="Wystąpił błąd podczas przetwarzania komendy. Spróbuj ponownie.")
+                except:
+                    logger.error("Failed to send error message", extra={"command": "/odmiany", "guild": interaction.guild_id})
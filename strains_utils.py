@@ -1,7 +1,20 @@
 # strains_utils.py
+import functools
+import itertools
+import re
 import discord
-from discord.ext import commands
-from utils import get_best_match
+from utils import get_best_match, NgramIndex
+from batch_scoring import BatchScorer
+from embed_layout import layout_embeds
+from responses import send_response, send_embeds, run_within_budget
+from admission import run_admitted
+from single_flight import SingleFlight
+from metrics import MATCH_STAGE, STAGE_LATENCY
+from records import StrainRecord
+from text_normalization import fold_key
+from strain_filters import StrainAttributeIndex, describe_strain_filter
+from autocomplete import PrefixIndex, MAX_SUGGESTIONS
+from cache import TTLCache, CachedLookup, serialize_message, deserialize_message
 from difflib import SequenceMatcher
 from fuzzywuzzy import fuzz
 
@@ -23,19 +36,76 @@ PRODUCER_KEYWORDS = {
 
 DEFAULT_PRODUCER = "Inni Producenci"
 
+# Bit każdego producenta w masce filtrów /listaodmian
+PRODUCER_BITS = {producer: 1 << bit for bit, producer in enumerate([*PRODUCER_KEYWORDS, DEFAULT_PRODUCER])}
+ALL_PRODUCERS_MASK = (1 << len(PRODUCER_BITS)) - 1
+
+# Producenci w kolejności wyświetlania na liście (inni producenci na końcu)
+LIST_PRODUCER_ORDER = sorted(PRODUCER_BITS, key=lambda producer: (producer == DEFAULT_PRODUCER, producer))
+
+# Argument filtra (bez '+'/'-', małymi literami) -> producent; pierwszy producent w PRODUCER_KEYWORDS wygrywa
+PRODUCER_FILTER_KEYS = {}
+for _producer, _keywords in PRODUCER_KEYWORDS.items():
+    for _key in [*_keywords, _producer.replace(' ', '')]:
+        PRODUCER_FILTER_KEYS.setdefault(_key.lower(), _producer)
+
+# Wyniki /odmiana według (wersja danych, znormalizowane zapytanie)
+strain_info_cache = TTLCache("strain_info")
+
+# Gotowe strony /listaodmian według (wersja danych, wykluczeni producenci, pokazani producenci[, filtry /filtruj])
+strain_list_cache = TTLCache("strain_list_pages")
+
+# Trwające obliczenia według tych samych kluczy co cache, wspólne dla jednoczesnych identycznych zapytań
+strain_info_flights = SingleFlight("/odmiana")
+strain_list_flights = SingleFlight("/listaodmian")
+
+# Każdy nowy indeks dostaje kolejny numer wersji danych
+_index_versions = itertools.count(1)
+
+def normalize_producer_text(text):
+    """Lowercases the text and keeps only letters and digits, the form in which product names are matched."""
+    return ''.join(filter(str.isalnum, text.lower()))
+
+def build_producer_matcher(producer_keywords):
+    """
+    Compiles the keywords of all producers into one regex matching at every position of a
+    normalized product name. The keywords are normalized like the product names (so "s-lab"
+    and "four 20 pharma" can match) and ordered by producer priority, so at each position
+    the first alternative that matches belongs to the highest-priority producer.
+    Returns (compiled pattern, dict from keyword to (priority, producer)).
+    """
+    keyword_producers = {}
+    for priority, (producer_name, keywords) in enumerate(producer_keywords.items()):
+        for keyword in keywords:
+            keyword = normalize_producer_text(keyword)
+            if keyword:
+                keyword_producers.setdefault(keyword, (priority, producer_name))
+
+    ordered = sorted(keyword_producers, key=lambda keyword: (keyword_producers[keyword][0], -len(keyword)))
+    # The lookahead lets matches overlap, so a lower-priority keyword can't hide a higher-priority one
+    pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in ordered) + "))")
+    return pattern, keyword_producers
+
+_producer_pattern, _keyword_producers = build_producer_matcher(PRODUCER_KEYWORDS)
+
 def detect_producer(product_name):
-    """Wykrywa nazwę producenta na podstawie nazwy produktu, używając PRODUCER_KEYWORDS."""
+    """
+    Wykrywa nazwę producenta na podstawie nazwy produktu, używając PRODUCER_KEYWORDS.
+    Jeśli pasuje kilku producentów, wygrywa pierwszy w kolejności PRODUCER_KEYWORDS.
+    """
     if not product_name:
         return DEFAULT_PRODUCER
 
-    # Normalizacja nazwy produktu dla łatwiejszego porównania
-    normalized_product_name = ''.join(filter(str.isalnum, product_name.lower()))
+    # Normalizacja nazwy produktu dla łatwiejszego porównania, potem jedno przejście wzorcem wszystkich słów kluczowych
+    best = None
+    for match in _producer_pattern.finditer(normalize_producer_text(product_name)):
+        found = _keyword_producers[match.group(1)]
+        if best is None or found[0] < best[0]:
+            best = found
+            if best[0] == 0:
+                break
 
-    for producer_name, keywords in PRODUCER_KEYWORDS.items():
-        if any(keyword in normalized_product_name for keyword in keywords):
-            return producer_name
-
-    return DEFAULT_PRODUCER
+    return best[1] if best else DEFAULT_PRODUCER
 
 def get_similarity(a, b):
     """Calculate the similarity ratio between two strings."""
@@ -75,60 +145,127 @@ def normalize_strain_name(name):
     
     return normalized
 
-def find_matching_strains(query, strains_data, threshold=0.8):
-    """Find strains that match the query with fuzzy matching."""
-    if not query or not strains_data:
+class StrainIndex:
+    """
+    Search index over the strains data, built once when the data is loaded.
+
+    Holds every strain as a compact StrainRecord, the normalized name and the
+    producer of every strain, a dict from normalized name to the positions of
+    the strains sharing it, a dict from folded key (see text_normalization.fold_key)
+    to positions for O(1) exact hits and the list of unique normalized names used
+    as choices for fuzzy matching. Every index gets a new `version`, which keys the
+    cached lookup results.
+    """
+
+    def __init__(self, strains_data):
+        self.version = next(_index_versions)
+        self.strains = [strain if isinstance(strain, StrainRecord) else StrainRecord.from_dict(strain)
+                        for strain in strains_data or []]
+        self.normalized_names = [normalize_strain_name(strain.get("strain_name", "")) for strain in self.strains]
+        # Producer of every strain, detected once here instead of on every listing
+        self.producers = [detect_producer(strain.get("product_name", "")) for strain in self.strains]
+
+        # Positions of each producer's strains, sorted by name once here, and every strain's
+        # /listaodmian line, so a filtered list only concatenates the chosen producers' buckets
+        self.producer_buckets = {}
+        for position, producer in enumerate(self.producers):
+            self.producer_buckets.setdefault(producer, []).append(position)
+        for positions in self.producer_buckets.values():
+            positions.sort(key=lambda position: self.strains[position].get("strain_name", "Nieznana Odmiana"))
+        self.list_entries = [format_strain_list_entry(strain) for strain in self.strains]
+        # Place of every strain in the unfiltered list, to put /filtruj results in list order
+        self.list_rank = [0] * len(self.strains)
+        rank = 0
+        for producer in LIST_PRODUCER_ORDER:
+            for position in self.producer_buckets.get(producer, ()):
+                self.list_rank[position] = rank
+                rank += 1
+        # THC/CBD ranges, types and availability for /filtruj
+        self.attributes = StrainAttributeIndex(self.strains)
+
+        self.by_name = {}
+        self.by_key = {}
+        for position, name in enumerate(self.normalized_names):
+            self.by_name.setdefault(name, []).append(position)
+            # Diacritics and punctuation folded, so "gorilla glue 4" finds "Gorilla Glue #4" without fuzzy matching
+            self.by_key.setdefault(fold_key(name), []).append(position)
+
+        # Unique names in first-seen order, so fuzzy matching picks the same winner as a full scan.
+        # The n-gram index over them lets get_best_match score only a shortlist.
+        self.choices = list(self.by_name)
+        self.choice_index = NgramIndex(self.choices)
+        # Batch scorer over every strain's name for the last fuzzy fallback stage
+        self.name_scorer = BatchScorer(self.normalized_names)
+        # Prefix index over the names for /odmiana autocomplete
+        self.name_suggestions = PrefixIndex(
+            (strain.get("strain_name", ""), fold_key(name)) for strain, name in zip(self.strains, self.normalized_names))
+
+    def __len__(self):
+        return len(self.strains)
+
+    def __bool__(self):
+        return bool(self.strains)
+
+    def lookup(self, normalized_name):
+        """Returns the positions of all strains with the given normalized name (empty list if none)."""
+        return self.by_name.get(normalized_name, [])
+
+    def lookup_folded(self, name):
+        """Returns the positions of all strains whose folded name equals the folded (normalized) name."""
+        return self.by_key.get(fold_key(name), [])
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        """Returns up to `limit` strain names starting with the typed text (or with a later word starting with it)."""
+        return self.name_suggestions.suggest(fold_key(normalize_strain_name(text)), limit)
+
+    def records(self, matches):
+        """Returns the strain records for (position, similarity) pairs returned by find_matching_strains."""
+        return [self.strains[position] for position, _ in matches]
+
+    def producers_of(self, matches):
+        """Returns the producers of the strains in (position, similarity) pairs."""
+        return [self.producers[position] for position, _ in matches]
+
+def find_matching_strains(query, strain_index, threshold=0.8):
+    """
+    Find strains that match the query with fuzzy matching.
+    Returns (list of (position in strain_index.strains, similarity) pairs, exact match flag).
+    """
+    if not isinstance(strain_index, StrainIndex):
+        strain_index = StrainIndex(strain_index)
+
+    if not query or not strain_index:
         return [], False
         
     # Normalize the query
     query = normalize_strain_name(query)
     
-    # First try exact match (case insensitive)
-    exact_matches = [strain for strain in strains_data if normalize_strain_name(strain["strain_name"]) == query]
+    # First try exact match (ignoring case, Polish characters and punctuation)
+    exact_matches = strain_index.lookup_folded(query)
     if exact_matches:
-        return exact_matches, True  # Return exact matches and a flag indicating exact match
+        MATCH_STAGE.inc("strains", "exact")
+        return [(position, 1.0) for position in exact_matches], True  # Return exact matches and a flag indicating exact match
 
-    # Get all strain names for fuzzy matching
-    strain_names = [normalize_strain_name(strain["strain_name"]) for strain in strains_data]
-    
-    # Try fuzzy matching with all strain names
-    best_match, similarity = get_best_match(query, strain_names, threshold=threshold)
+    # Try fuzzy matching with all (unique) strain names
+    best_match, similarity = get_best_match(query, strain_index.choices, threshold=threshold,
+                                            ngram_index=strain_index.choice_index)
     
     if best_match:
         # If we found a good match, return all strains with that exact name
-        matched_strains = [strain for strain in strains_data if normalize_strain_name(strain["strain_name"]) == best_match]
-        return matched_strains, False
-    
-    # If still no match, try advanced fuzzy matching approach
-    fuzzy_matches = []
-    for strain in strains_data:
-        strain_name = normalize_strain_name(strain["strain_name"])
-        
-        # Calculate multiple types of fuzzy matches
-        token_set_ratio = fuzz.token_set_ratio(query, strain_name) / 100.0
-        partial_ratio = fuzz.partial_ratio(query, strain_name) / 100.0
-        
-        # Use the best match score
-        best_similarity = max(token_set_ratio, partial_ratio)
-        
-        if best_similarity >= threshold:
-            # Add similarity score to strain for sorting
-            strain_copy = strain.copy()
-            strain_copy["similarity"] = best_similarity
-            fuzzy_matches.append(strain_copy)
+        MATCH_STAGE.inc("strains", "best_match")
+        return [(position, similarity) for position in strain_index.lookup(best_match)], False
     
-    if fuzzy_matches:
-        # Sort fuzzy matches by similarity score, highest first
-        fuzzy_matches.sort(key=lambda x: x.get("similarity", 0), reverse=True)
-        return fuzzy_matches[:10], False  # Limit results to avoid overwhelming the user
-    
-    # No matches found
-    return [], False
-
-async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strains_data, ephemeral=False):
-    """Pobiera i wyświetla informacje o odmianie (lub odmianach)."""
-    matching_strains, is_exact = find_matching_strains(nazwa_odmiany, strains_data)
+    # If still no match, score the query against every strain name in one batch.
+    # Limit results to avoid overwhelming the user
+    matches = strain_index.name_scorer.top_k(query, k=10, threshold=threshold)
+    MATCH_STAGE.inc("strains", "fallback" if matches else "none")
+    return matches, False
 
+def render_strain_info_embed(nazwa_odmiany, matching_strains, is_exact, producers=None):
+    """
+    Buduje embed z informacjami o znalezionej odmianie (lub odmianach).
+    `producers` to producenci kolejnych odmian z indeksu; bez nich są wykrywani z nazw produktów.
+    """
     if matching_strains:
         if len(matching_strains) == 1:
             strain = matching_strains[0]
@@ -158,10 +295,7 @@ async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strains_data, ephem
                 inline=False
             )
 
-            if isinstance(ctx_or_interaction, commands.Context):
-                await ctx_or_interaction.send(embed=strain_info_embed)
-            else:
-                await ctx_or_interaction.followup.send(embed=strain_info_embed, ephemeral=ephemeral)
+            return strain_info_embed
         else:
             # Create embed for multiple strain results
             matches_embed = discord.Embed(
@@ -175,24 +309,24 @@ async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strains_data, ephem
                 matches_embed.description = f"Znaleziono wiele odmian o nazwie '{nazwa_odmiany}'. Wybierz jedną z poniższych:"
             
             # Group by producer using the centralized helper function
-            producers = {}
-            for strain in matching_strains:
-                # Use the new helper function to detect producer
-                producer = detect_producer(strain['product_name'])
+            grouped = {}
+            for position, strain in enumerate(matching_strains):
+                # Use the producer from the index (or the helper function to detect it)
+                producer = producers[position] if producers else detect_producer(strain['product_name'])
                     
-                if producer not in producers:
-                    producers[producer] = []
+                if producer not in grouped:
+                    grouped[producer] = []
                     
                 availability = strain.get('availability', 'Brak informacji')
                 availability_emoji = "🟢" if availability.lower() == "wysoka" else "🔴" if availability.lower() in ["brak", "wycofany"] else "⚪"
                 
-                producers[producer].append({
+                grouped[producer].append({
                     'strain': strain,
                     'availability_emoji': availability_emoji
                 })
             
             # Add fields for each producer
-            for producer, strains in sorted(producers.items()):
+            for producer, strains in sorted(grouped.items()):
                 strain_list = ""
                 for strain_info in strains:
                     strain = strain_info['strain']
@@ -205,10 +339,7 @@ async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strains_data, ephem
             # Add legend
             matches_embed.set_footer(text="🟢 Wysoka dostępność | ⚪ Brak informacji | 🔴 Brak/Wycofany")
 
-            if isinstance(ctx_or_interaction, commands.Context):
-                await ctx_or_interaction.send(embed=matches_embed)
-            else:
-                await ctx_or_interaction.followup.send(embed=matches_embed, ephemeral=ephemeral)
+            return matches_embed
     else:
         # Create embed for no results
         not_found_embed = discord.Embed(
@@ -216,11 +347,50 @@ async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strains_data, ephem
             description=f"Nie znaleziono odmiany '{nazwa_odmiany}' w bazie danych. Spróbuj innej nazwy lub sprawdź pisownię.",
             color=discord.Color.red()
         )
-        
-        if isinstance(ctx_or_interaction, commands.Context):
-            await ctx_or_interaction.send(embed=not_found_embed)
+        return not_found_embed
+
+def build_strain_info(nazwa_odmiany, strain_index):
+    """
+    Wyszukuje odmianę (lub odmiany) i buduje embed z wynikiem. Działa synchronicznie, poza pętlą zdarzeń.
+    Zwraca (pary (pozycja, podobieństwo) dopasowanych odmian, czy dopasowanie dokładne, embed).
+    """
+    with STAGE_LATENCY.time("strain_match"):
+        matches, is_exact = find_matching_strains(nazwa_odmiany, strain_index)
+    with STAGE_LATENCY.time("strain_render"):
+        embed = render_strain_info_embed(nazwa_odmiany, strain_index.records(matches), is_exact,
+                                         strain_index.producers_of(matches))
+    return matches, is_exact, embed
+
+def lookup_strain_info(nazwa_odmiany, strain_index):
+    """Runs build_strain_info and returns the result as a CachedLookup, ready to be cached and shared."""
+    matches, is_exact, embed = build_strain_info(nazwa_odmiany, strain_index)
+    return CachedLookup(nazwa_odmiany, matches, is_exact, serialize_message({"embed": embed}))
+
+async def get_strain_info(ctx_or_interaction, nazwa_odmiany, strain_index, ephemeral=False):
+    """Pobiera i wyświetla informacje o odmianie (lub odmianach)."""
+    cache_key = (strain_index.version, normalize_strain_name(nazwa_odmiany))
+    cached = strain_info_cache.get(cache_key)
+
+    if cached is None:
+        if strain_index.lookup_folded(nazwa_odmiany):
+            # Exact hit: a dict lookup and one embed, cheap enough to answer right away on the event loop
+            cached = lookup_strain_info(nazwa_odmiany, strain_index)
         else:
-            await ctx_or_interaction.followup.send(embed=not_found_embed, ephemeral=ephemeral)
+            # Fuzzy matching runs in the executor, so it doesn't block the event loop; the interaction
+            # is deferred only if it takes longer than the response budget. Identical queries arriving
+            # meanwhile wait for the same computation.
+            cached = await run_within_budget(ctx_or_interaction, lookup_strain_info, nazwa_odmiany, strain_index,
+                                             ephemeral=ephemeral, flight=strain_info_flights, flight_key=cache_key)
+        strain_info_cache.set(cache_key, cached)
+
+    if cached.query == nazwa_odmiany:
+        embed = deserialize_message(cached.payload)["embed"]
+    else:
+        # Same normalized query typed differently, the embed quotes the query so render it again
+        embed = render_strain_info_embed(nazwa_odmiany, strain_index.records(cached.matches), cached.is_exact,
+                                         strain_index.producers_of(cached.matches))
+
+    await send_response(ctx_or_interaction, ephemeral=ephemeral, embed=embed)
 
 def parse_producer_filters(args):
     """
@@ -236,13 +406,11 @@ def parse_producer_filters(args):
     for arg in args:
         if arg.startswith('-'):
             # Remove the '-' prefix
-            producer_key = arg[1:].lower()
+            producer_name = PRODUCER_FILTER_KEYS.get(arg[1:].lower())
             
             # Match with known producers
-            for producer_name, keywords in PRODUCER_KEYWORDS.items():
-                if producer_key in keywords or producer_key == producer_name.lower().replace(' ', ''):
-                    excluded_producers.append(producer_name)
-                    break
+            if producer_name:
+                excluded_producers.append(producer_name)
     
     return excluded_producers
 
@@ -260,139 +428,147 @@ def parse_producer_includes(args):
     for arg in args:
         if arg.startswith('+'):
             # Remove the '+' prefix
-            producer_key = arg[1:].lower()
+            producer_name = PRODUCER_FILTER_KEYS.get(arg[1:].lower())
             
             # Match with known producers
-            for producer_name, keywords in PRODUCER_KEYWORDS.items():
-                if producer_key in keywords or producer_key == producer_name.lower().replace(' ', ''):
-                    included_producers.append(producer_name)
-                    break
+            if producer_name:
+                included_producers.append(producer_name)
     
     return included_producers
 
-async def list_strains(ctx_or_interaction, strains_data, ephemeral=False, excluded_producers=None, included_producers=None):
-    """Wyświetla listę dostępnych odmian, pogrupowanych według producenta."""
-    if not strains_data:
-        if isinstance(ctx_or_interaction, commands.Context):
-            await ctx_or_interaction.send("Brak dostępnych danych odmian.")
-        else:
-            await ctx_or_interaction.followup.send("Brak dostępnych danych odmian.", ephemeral=ephemeral)
-        return
-
-    # Initialize filter lists if not provided
-    if excluded_producers is None:
-        excluded_producers = []
-    if included_producers is None:
-        included_producers = []
-
-    # Group strains by producer using the centralized function
-    producers = {}
-    for strain in strains_data:
-        # Use the helper function to detect producer
-        producer = detect_producer(strain['product_name'])
-        
-        # Skip if producer is in the excluded list
-        if producer in excluded_producers:
-            continue
-            
-        # Skip if we're only including specific producers and this one isn't in the list
-        if included_producers and producer not in included_producers:
-            continue
-            
-        strain_name = strain.get("strain_name", "Nieznana Odmiana")
-        strain_url = strain.get("strain_url", "#")
-
-        if producer not in producers:
-            producers[producer] = []
-
-        thc_content = strain.get("thc_content", "N/A")
-        cbd_content = strain.get("cbd_content", "N/A")
-        availability = strain.get("availability", "Brak informacji")
-
-        # Add strain information
-        producers[producer].append({
-            'name': strain_name,
-            'thc': thc_content,
-            'cbd': cbd_content,
-            'url': strain_url,
-            'availability': availability
-        })
-
-    # Create list of embeds with improved logic
-    embeds = []
-    current_embed = None
-    current_size = 0
-    MAX_EMBED_SIZE = 5900
-
-    # Helper function to create a new embed
-    def create_new_embed(title="Dostępne Odmiany"):
-        embed = discord.Embed(
-            title=title,
-            color=discord.Color.green()
-        )
-        embed.set_footer(text="🟢 Wysoka dostępność | ⚪ Brak informacji | 🔴 Brak/Wycofany")
-        
-        description = "Lista odmian pogrupowana według producentów:"
-        if included_producers:
-            description += f"\n*Pokazani producenci: {', '.join(included_producers)}*"
-        if excluded_producers:
-            description += f"\n*Wykluczeni producenci: {', '.join(excluded_producers)}*"
-        
-        embed.description = description
-        return embed
-
-    current_embed = create_new_embed()
-    current_size += len(current_embed.title) + (len(current_embed.description) if current_embed.description else 0) + 50
-
-    sorted_producer_names = sorted(producers.keys(), key=lambda p: (p == DEFAULT_PRODUCER, p))
-
-    for producer_name in sorted_producer_names:
-        strains = producers[producer_name]
-        producer_strains_parts = []
-        current_field_part = ""
+def format_strain_list_entry(strain):
+    """Linia odmiany na liście /listaodmian: dostępność, nazwa, THC/CBD i link."""
+    availability = strain.get("availability", "Brak informacji")
+    availability_emoji = "🟢" if availability.lower() == "wysoka" else "🔴" if availability.lower() in ["brak", "wycofany"] else "⚪"
 
-        for strain in sorted(strains, key=lambda x: x['name']):
-            availability_emoji = "🟢" if strain['availability'].lower() == "wysoka" else "🔴" if strain['availability'].lower() in ["brak", "wycofany"] else "⚪"
+    strain_url = strain.get("strain_url", "#")
+    link_md = f" - [Info]({strain_url})" if strain_url and strain_url != "#" else ""
 
-            link_md = f" - [Info]({strain['url']})" if strain['url'] and strain['url'] != "#" else ""
+    return (f"{availability_emoji} **{strain.get('strain_name', 'Nieznana Odmiana')}** "
+            f"(THC: {strain.get('thc_content', 'N/A')}, CBD: {strain.get('cbd_content', 'N/A')}){link_md}\n")
 
-            strain_entry = f"{availability_emoji} **{strain['name']}** (THC: {strain['thc']}, CBD: {strain['cbd']}){link_md}\n"
-
-            if len(current_field_part + strain_entry) > 1024:
-                producer_strains_parts.append(current_field_part)
-                current_field_part = strain_entry
-            else:
-                current_field_part += strain_entry
+def producer_mask(producers):
+    """Maska bitowa (PRODUCER_BITS) podanych producentów."""
+    mask = 0
+    for producer in producers or []:
+        mask |= PRODUCER_BITS.get(producer, 0)
+    return mask
 
-        if current_field_part:
-            producer_strains_parts.append(current_field_part)
+def producer_filter_mask(excluded_producers=None, included_producers=None):
+    """Kompiluje filtry /listaodmian do maski pokazanych producentów: tylko pokazani, a jeśli ich brak - wszyscy poza wykluczonymi."""
+    included = ALL_PRODUCERS_MASK if not included_producers else producer_mask(included_producers)
+    return included & ~producer_mask(excluded_producers)
 
-        for i, field_content in enumerate(producer_strains_parts):
-            field_name = f"{producer_name}" if i == 0 else f"{producer_name} (cz. {i+1})"
-            field_size = len(field_name) + len(field_content)
+def build_strain_list_embeds(strain_index, excluded_producers=None, included_producers=None, strain_filter=None):
+    """
+    Buduje embedy z listą odmian pogrupowanych według producenta. Działa synchronicznie, poza pętlą zdarzeń.
+    Z strain_filter (StrainFilter) pokazuje tylko odmiany spełniające kryteria /filtruj.
+    """
+    if not isinstance(strain_index, StrainIndex):
+        strain_index = StrainIndex(strain_index)
 
-            if current_size + field_size > MAX_EMBED_SIZE:
-                embeds.append(current_embed)
-                current_embed = create_new_embed("Dostępne Odmiany (kontynuacja)")
-                current_size = len(current_embed.title) + (len(current_embed.description) if current_embed.description else 0) + 50
+    # Initialize filter lists if not provided
+    if excluded_producers is None:
+        excluded_producers = []
+    if included_producers is None:
+        included_producers = []
 
-            current_embed.add_field(name=field_name, value=field_content, inline=False)
-            current_size += field_size
+    selected = producer_filter_mask(excluded_producers, included_producers)
+
+    description = "Lista odmian pogrupowana według producentów:"
+    if included_producers:
+        description += f"\n*Pokazani producenci: {', '.join(included_producers)}*"
+    if excluded_producers:
+        description += f"\n*Wykluczeni producenci: {', '.join(excluded_producers)}*"
+
+    filtered_positions = None
+    if strain_filter:
+        # Matching strains from the attribute indexes, put in list order by their precomputed rank
+        filtered_positions = sorted(strain_index.attributes.matching(strain_filter), key=strain_index.list_rank.__getitem__)
+        description += f"\n*Filtry: {describe_strain_filter(strain_filter)}*"
+        if not filtered_positions:
+            description += "\n\nBrak odmian spełniających kryteria."
+
+    def strain_rows():
+        if filtered_positions is not None:
+            for position in filtered_positions:
+                producer_name = strain_index.producers[position]
+                if selected & PRODUCER_BITS[producer_name]:
+                    yield producer_name, strain_index.list_entries[position]
+            return
+
+        # Buckets are already sorted by name, so the chosen ones are only concatenated
+        for producer_name in LIST_PRODUCER_ORDER:
+            if not selected & PRODUCER_BITS[producer_name]:
+                continue
+            for position in strain_index.producer_buckets.get(producer_name, ()):
+                yield producer_name, strain_index.list_entries[position]
+
+    return layout_embeds(
+        strain_rows(),
+        title="Dostępne Odmiany",
+        field_name=lambda producer_name, part: producer_name if part == 0 else f"{producer_name} (cz. {part+1})",
+        description=description,
+        continuation_title="Dostępne Odmiany (kontynuacja)",
+        continuation_description=description,
+        footer="🟢 Wysoka dostępność | ⚪ Brak informacji | 🔴 Brak/Wycofany",
+        repeat_footer=True,
+    )
+
+def canonical_producers(producers):
+    """Returns the producers without duplicates, in PRODUCER_KEYWORDS order, so equal filters share cache entries."""
+    producers = set(producers or [])
+    return tuple(producer for producer in PRODUCER_KEYWORDS if producer in producers)
+
+def build_strain_list_pages(strain_index, excluded_producers=None, included_producers=None, strain_filter=None):
+    """Builds the /listaodmian (or /filtruj) embeds serialized to dicts, ready to be cached."""
+    with STAGE_LATENCY.time("list_build"):
+        return [embed.to_dict() for embed in build_strain_list_embeds(strain_index, excluded_producers, included_producers,
+                                                                      strain_filter)]
+
+def prerender_strain_list(strain_index, pages=None):
+    """
+    Caches the unfiltered strain list for a freshly loaded index, so the first /listaodmian is a cache hit.
+    Pages already built off the event loop can be passed in, otherwise they are built here.
+    """
+    if pages is None:
+        pages = build_strain_list_pages(strain_index)
+    strain_list_cache.set((strain_index.version, (), ()), pages)
 
-    if current_embed.fields or not embeds:
-        embeds.append(current_embed)
+async def list_strains(ctx_or_interaction, strain_index, ephemeral=False, excluded_producers=None, included_producers=None,
+                       strain_filter=None):
+    """
+    Wyświetla listę dostępnych odmian, pogrupowanych według producenta (z strain_filter tylko pasujące do filtrów).
+    Lista jest wysyłana dopiero po wpuszczeniu przez kontroler dopuszczeń (patrz admission.py).
+    """
+    await run_admitted(ctx_or_interaction, "strain_list",
+                       functools.partial(_send_strain_list, ctx_or_interaction, strain_index, ephemeral,
+                                         excluded_producers, included_producers, strain_filter),
+                       ephemeral=ephemeral)
+
+async def _send_strain_list(ctx_or_interaction, strain_index, ephemeral, excluded_producers, included_producers,
+                            strain_filter):
+    if not isinstance(strain_index, StrainIndex):
+        strain_index = StrainIndex(strain_index)
+
+    if not strain_index:
+        await send_response(ctx_or_interaction, ephemeral=ephemeral, content="Brak dostępnych danych odmian.")
+        return
 
-    if isinstance(ctx_or_interaction, commands.Context):
-        for embed in embeds:
-            await ctx_or_interaction.send(embed=embed)
-    else:
-        first_message = True
-        for embed in embeds:
-            if first_message and not ctx_or_interaction.response.is_done():
-                try:
-                    await ctx_or_interaction.response.send_message(embed=embed, ephemeral=ephemeral)
-                except discord.InteractionResponded:
-                    await ctx_or_interaction.followup.send(embed=embed, ephemeral=ephemeral)
-                first_message = False
-            else:
-                await ctx_or_interaction.followup.send(embed=embed, ephemeral=ephemeral)
\ No newline at end of file
+    excluded_producers = canonical_producers(excluded_producers)
+    included_producers = canonical_producers(included_producers)
+
+    # Pages are rendered once per data version and filter combination
+    cache_key = (strain_index.version, excluded_producers, included_producers)
+    if strain_filter:
+        cache_key += (strain_filter,)
+    pages = strain_list_cache.get(cache_key)
+    if pages is None:
+        pages = await run_within_budget(ctx_or_interaction, build_strain_list_pages, strain_index,
+                                        excluded_producers, included_producers, strain_filter, ephemeral=ephemeral,
+                                        flight=strain_list_flights, flight_key=cache_key)
+        strain_list_cache.set(cache_key, pages)
+
+    # Up to 10 embeds per message, so a long list takes a few requests instead of one per embed
+    embeds = [discord.Embed.from_dict(page) for page in pages]
+    await send_embeds(ctx_or_interaction, embeds, ephemeral=ephemeral)
@@ -0,0 +1,10 @@
+# tests/conftest.py
+import os
+import sys
+
+# The bot's modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_configure(config):
+    # fuzzywuzzy warns on import when python-Levenshtein isn't installed; the results are the same
+    config.addinivalue_line("filterwarnings", "ignore:Using slow pure-python SequenceMatcher")
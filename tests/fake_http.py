@@ -0,0 +1,62 @@
+# tests/fake_http.py
+"""
+Local fake of Discord's HTTP layer for the send scheduler: every channel is a rate-limit bucket
+of `limit` requests per `window` seconds that reports X-RateLimit-Remaining / X-RateLimit-Reset-After
+and answers 429 when exhausted. Used by tests/test_send_scheduler.py and the scheduler benchmark.
+"""
+import asyncio
+import time
+
+import discord
+
+class FakeResponse:
+    def __init__(self, status, headers):
+        self.status = status
+        self.reason = "Too Many Requests" if status == 429 else "OK"
+        self.headers = headers
+
+class FakeMessage:
+    def __init__(self, content, embeds, headers):
+        self.content = content
+        self.embeds = list(embeds)
+        self.headers = headers
+
+def rate_limited(retry_after):
+    """The HTTPException discord.py raises for a 429 with the given Retry-After."""
+    headers = {"Retry-After": f"{retry_after:.3f}", "X-RateLimit-Remaining": "0",
+               "X-RateLimit-Reset-After": f"{retry_after:.3f}"}
+    return discord.HTTPException(FakeResponse(429, headers), "You are being rate limited.")
+
+class FakeHTTP:
+    """One rate-limit bucket per channel, like Discord's per-route buckets."""
+
+    def __init__(self, limit=5, window=0.25, latency=0.01):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.requests = 0
+        self.rate_limited = 0
+        self.delivered = 0
+        # (channel, content, number of embeds) of every accepted request, in order
+        self.sent = []
+        self._buckets = {}
+
+    def _headers(self, remaining, reset_at, now):
+        return {"X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset-After": f"{max(reset_at - now, 0):.3f}"}
+
+    async def send(self, channel, content=None, embeds=()):
+        await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        self.requests += 1
+        remaining, reset_at = self._buckets.get(channel, (self.limit, now + self.window))
+        if now >= reset_at:
+            remaining, reset_at = self.limit, now + self.window
+        if remaining == 0:
+            self.rate_limited += 1
+            raise rate_limited(max(reset_at - now, 0))
+        remaining -= 1
+        self._buckets[channel] = (remaining, reset_at)
+        self.delivered += content.count("\n") + 1 if content else len(embeds)
+        self.sent.append((channel, content, len(embeds)))
+        return FakeMessage(content, embeds, self._headers(remaining, reset_at, now))
@@ -0,0 +1,55 @@
+# tests/fakes.py
+"""Recording fakes of the discord.py objects the bot answers through."""
+import datetime
+
+from discord.ext import commands
+
+class FakeResponse:
+    def __init__(self, calls):
+        self.calls = calls
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, ephemeral=False, **message):
+        self.done = True
+        self.calls.append(("response", message))
+
+    async def defer(self, ephemeral=False, **kwargs):
+        self.done = True
+        self.calls.append(("defer", {}))
+
+class FakeFollowup:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def send(self, ephemeral=False, **message):
+        self.calls.append(("followup", message))
+
+class FakeInteraction:
+    """Records every response and followup instead of calling Discord."""
+
+    def __init__(self, guild_id=1, created_at=None):
+        self.calls = []
+        self.id = id(self)
+        self.guild_id = guild_id
+        self.created_at = created_at or datetime.datetime.now(datetime.timezone.utc)
+        self.response = FakeResponse(self.calls)
+        self.followup = FakeFollowup(self.calls)
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+def fake_context(guild_id=1):
+    """A commands.Context (so it is Messageable) whose send only records the message."""
+    ctx = object.__new__(commands.Context)
+    ctx.calls = []
+    ctx.guild = FakeGuild(guild_id) if guild_id is not None else None
+
+    async def send(**message):
+        ctx.calls.append(("send", message))
+
+    ctx.send = send
+    return ctx
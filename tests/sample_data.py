@@ -0,0 +1,33 @@
+# tests/sample_data.py
+"""A small strains / clinics catalogue in the format of strains_alt.json and clinic_data.json."""
+import json
+import os
+
+STRAINS = [
+    {"strain_name": "Gorilla Glue", "product_name": "Aurora Gorilla Glue 22/1", "strain_type": "Hybryda",
+     "thc_content": "22%", "cbd_content": "<1%", "availability": "wysoka", "strain_url": "https://example.com/1"},
+    {"strain_name": "Pink Kush", "product_name": "Aurora Pink Kush 20/1", "strain_type": "Indica",
+     "thc_content": "20%", "cbd_content": "<1%", "availability": "średnia", "strain_url": "https://example.com/2"},
+    {"strain_name": "Ghost Train Haze", "product_name": "Tilray Ghost Train Haze 25/1", "strain_type": "Sativa",
+     "thc_content": "25%", "cbd_content": "1%", "availability": "brak", "strain_url": "https://example.com/3"},
+    {"strain_name": "Lemon Skunk", "product_name": "Pedanios Lemon Skunk 18/1", "strain_type": "Sativa",
+     "thc_content": "18%", "cbd_content": "1%", "availability": "Brak informacji", "strain_url": "https://example.com/4"},
+]
+
+CLINICS = [
+    {"title": "Kanna – Gdańsk", "city": "Gdańsk", "address": "Gdańsk, ul. Długa 1", "phone": "123",
+     "email": "gdansk@example.com", "website": "https://example.com", "clinic_url": "https://example.com/c/1",
+     "description": "", "doctors": ["dr Anna Nowak"]},
+    {"title": "Medi – Kraków", "city": "Kraków", "address": "ul. Floriańska 2, 31-019 Kraków", "phone": "456",
+     "email": "krakow@example.com", "website": "https://example.com", "clinic_url": "https://example.com/c/2",
+     "description": "", "doctors": []},
+]
+
+def write_catalogue(directory, strains=STRAINS, clinics=CLINICS):
+    """Writes the strains and clinics files into directory and returns their paths."""
+    strains_path = os.path.join(directory, "strains_alt.json")
+    clinics_path = os.path.join(directory, "clinic_data.json")
+    for path, data in ((strains_path, strains), (clinics_path, clinics)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    return strains_path, clinics_path
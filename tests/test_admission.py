@@ -0,0 +1,217 @@
+# tests/test_admission.py
+"""Admission control of the list commands, driven through run_admitted with recording fakes."""
+import asyncio
+import datetime
+
+from admission import (AdmissionController, BUSY_MESSAGE, configure_admission, get_admission_controller,
+                       run_admitted)
+from send_scheduler import configure_send_scheduler
+
+from fakes import FakeInteraction, fake_context
+
+def test_controller_built_outside_the_loop_handles_contention():
+    # bot.py configures admission at import, before client.run() starts the event loop
+    configure_admission(global_limit=1, guild_limit=1)
+    running = []
+
+    async def list_command(name):
+        running.append(name)
+        assert len(running) == 1
+        await asyncio.sleep(0.01)
+        running.remove(name)
+        return name
+
+    async def run():
+        configure_send_scheduler()
+        return await asyncio.gather(*(run_admitted(FakeInteraction(guild_id=i % 2), "test",
+                                                   lambda i=i: list_command(i)) for i in range(4)))
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+
+class Gate:
+    """A list command that runs until it is opened, recording when it started."""
+
+    def __init__(self, started):
+        self.started = started
+        self.opened = asyncio.Event()
+
+    def command(self, name):
+        async def run():
+            self.started.append(name)
+            await self.opened.wait()
+            return name
+        return run
+
+def admitted(ctx_or_interaction, gate, name):
+    return asyncio.ensure_future(run_admitted(ctx_or_interaction, "test", gate.command(name), ephemeral=True))
+
+def run_scenario(scenario, **limits):
+    async def run():
+        configure_send_scheduler()
+        configure_admission(**limits)
+        return await scenario()
+    return asyncio.run(run())
+
+def test_waiters_are_admitted_in_arrival_order():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        first = admitted(FakeInteraction(), gate, "a")
+        await asyncio.sleep(0.01)
+        queued = [admitted(FakeInteraction(), gate, name) for name in "bc"]
+        await asyncio.sleep(0.01)
+        gate.opened.set()
+        # Arrives right as the slot is released, before the oldest waiter resumes
+        await first
+        late = admitted(FakeInteraction(), gate, "d")
+        return await asyncio.gather(*queued, late)
+
+    assert run_scenario(scenario, global_limit=1, guild_limit=1) == ["b", "c", "d"]
+    assert started == ["a", "b", "c", "d"]
+
+def test_newcomer_does_not_take_a_released_slot_from_a_waiter():
+    admitted_order = []
+
+    async def scenario():
+        controller = AdmissionController(global_limit=1, guild_limit=1)
+
+        async def admit(name):
+            ticket = await controller.acquire("test", 1)
+            admitted_order.append(name)
+            controller.release(ticket)
+
+        ticket = await controller.acquire("test", 1)
+        waiter = asyncio.ensure_future(admit("waiter"))
+        await asyncio.sleep(0.01)
+        # A command arriving in the same step as the release, before the waiter resumes
+        controller.release(ticket)
+        await admit("newcomer")
+        await waiter
+
+    asyncio.run(scenario())
+    assert admitted_order == ["waiter", "newcomer"]
+
+def test_slots_pass_on_a_slot_handed_to_a_cancelled_waiter():
+    async def scenario():
+        slots = AdmissionController(global_limit=1)._global
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        other = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0)
+        slots.release()
+        waiter.cancel()
+        await asyncio.wait_for(other, 1)
+        return slots.free, slots.locked()
+
+    assert asyncio.run(scenario()) == (0, True)
+
+def test_waiting_interaction_is_deferred_first():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        running, waiting = FakeInteraction(), FakeInteraction()
+        tasks = [admitted(running, gate, "a")]
+        await asyncio.sleep(0.01)
+        tasks.append(admitted(waiting, gate, "b"))
+        await asyncio.sleep(0.01)
+        deferred_while_waiting = list(waiting.calls)
+        gate.opened.set()
+        return await asyncio.gather(*tasks), running.calls, deferred_while_waiting
+
+    results, running_calls, deferred_while_waiting = run_scenario(scenario, global_limit=1)
+    assert results == ["a", "b"]
+    assert running_calls == []
+    assert deferred_while_waiting == [("defer", {})]
+
+def test_full_queue_replies_busy_at_once():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        tasks = [admitted(FakeInteraction(), gate, "a")]
+        await asyncio.sleep(0.01)
+        tasks.append(admitted(FakeInteraction(), gate, "b"))
+        await asyncio.sleep(0.01)
+        rejected = FakeInteraction()
+        result = await run_admitted(rejected, "test", gate.command("c"))
+        gate.opened.set()
+        await asyncio.gather(*tasks)
+        return result, rejected.calls
+
+    result, calls = run_scenario(scenario, global_limit=1, max_waiting=1)
+    assert result is None
+    assert calls == [("response", {"content": BUSY_MESSAGE})]
+    assert "c" not in started
+
+def test_wait_gives_up_after_max_wait():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        running = admitted(FakeInteraction(), gate, "a")
+        await asyncio.sleep(0.01)
+        waiting = FakeInteraction()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await run_admitted(waiting, "test", gate.command("b"))
+        waited = loop.time() - start
+        gate.opened.set()
+        await running
+        return result, waiting.calls, waited, get_admission_controller().waiting
+
+    result, calls, waited, still_waiting = run_scenario(scenario, global_limit=1, max_wait=0.05)
+    assert result is None
+    assert calls == [("defer", {}), ("followup", {"content": BUSY_MESSAGE})]
+    assert 0.05 <= waited < 1
+    assert still_waiting == 0
+    assert started == ["a"]
+
+def test_expiring_interaction_is_rejected_without_waiting():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        running = admitted(FakeInteraction(), gate, "a")
+        await asyncio.sleep(0.01)
+        old = FakeInteraction(created_at=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=14))
+        result = await run_admitted(old, "test", gate.command("b"))
+        gate.opened.set()
+        await running
+        return result, old.calls
+
+    assert run_scenario(scenario, global_limit=1) == (None, [("response", {"content": BUSY_MESSAGE})])
+
+def test_busy_guild_does_not_hold_up_other_guilds():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        tasks = [admitted(FakeInteraction(guild_id=1), gate, name) for name in "ab"]
+        await asyncio.sleep(0.01)
+        other = FakeInteraction(guild_id=2)
+        tasks.append(admitted(other, gate, "c"))
+        await asyncio.sleep(0.01)
+        gate.opened.set()
+        await asyncio.gather(*tasks)
+        return other.calls
+
+    # Guild 1's second list waits for its guild slot, guild 2 starts at once without a defer
+    assert run_scenario(scenario, global_limit=2, guild_limit=1) == []
+    assert started == ["a", "c", "b"]
+
+def test_context_waits_without_defer():
+    started = []
+
+    async def scenario():
+        gate = Gate(started)
+        tasks = [admitted(fake_context(), gate, "a")]
+        await asyncio.sleep(0.01)
+        ctx = fake_context()
+        tasks.append(admitted(ctx, gate, "b"))
+        await asyncio.sleep(0.01)
+        gate.opened.set()
+        return await asyncio.gather(*tasks), ctx.calls
+
+    assert run_scenario(scenario, global_limit=1) == (["a", "b"], [])
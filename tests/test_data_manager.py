@@ -0,0 +1,17 @@
+# tests/test_data_manager.py
+import asyncio
+
+from data_manager import DataManager
+
+from sample_data import write_catalogue
+
+def test_concurrent_reloads_with_manager_built_outside_the_loop(tmp_path):
+    # bot.py builds the manager at import, before client.run() starts the event loop
+    manager = DataManager(*write_catalogue(str(tmp_path)), poll_interval=0)
+    manager.load()
+
+    async def run():
+        return await asyncio.gather(manager.reload(force=True), manager.reload(force=True))
+
+    assert asyncio.run(run()) == [True, True]
+    assert len(manager.snapshot.strains_data) == 4
@@ -0,0 +1,106 @@
+# tests/test_embed_layout.py
+"""
+Embed packing and layout against Discord's limits, and how send_embeds delivers the packed
+messages, recorded by fakes of an Interaction and a commands.Context.
+"""
+import asyncio
+import random
+
+import discord
+import pytest
+
+from embed_layout import (pack_embeds, layout_embeds, MAX_EMBEDS_PER_MESSAGE, MAX_MESSAGE_CHARS,
+                          MAX_FIELDS_PER_EMBED, MAX_FIELD_NAME, MAX_FIELD_VALUE, MAX_EMBED_CHARS)
+from responses import send_embeds
+from send_scheduler import configure_send_scheduler
+
+from fakes import FakeInteraction, fake_context
+
+def numbered_embeds(count, description_length=0):
+    return [discord.Embed(title=f"{i}", description="x" * description_length) for i in range(count)]
+
+def deliver(ctx_or_interaction, embeds):
+    async def run():
+        # A fresh scheduler per event loop
+        configure_send_scheduler()
+        await send_embeds(ctx_or_interaction, embeds)
+    asyncio.run(run())
+    return ctx_or_interaction.calls
+
+def test_pack_embeds_limits_embed_count():
+    messages = pack_embeds(numbered_embeds(25))
+    assert [len(message) for message in messages] == [10, 10, 5]
+
+def test_pack_embeds_limits_message_size():
+    # 1 (title) + 1999 characters per embed: three fit in 6000, the fourth doesn't
+    messages = pack_embeds(numbered_embeds(7, 1999))
+    assert [len(message) for message in messages] == [3, 3, 1]
+    assert all(sum(len(embed) for embed in message) <= MAX_MESSAGE_CHARS for message in messages)
+
+def test_pack_embeds_keeps_order():
+    embeds = [discord.Embed(title=f"{i}", description="x" * random.Random(i).randint(0, 3000)) for i in range(40)]
+    messages = pack_embeds(embeds)
+    assert [embed for message in messages for embed in message] == embeds
+
+def test_pack_embeds_oversized_embed_gets_its_own_message():
+    embeds = [discord.Embed(title="a"), discord.Embed(description="x" * 7000), discord.Embed(title="b")]
+    assert [len(message) for message in pack_embeds(embeds)] == [1, 1, 1]
+
+def test_pack_embeds_empty():
+    assert pack_embeds([]) == []
+
+def test_fresh_interaction_gets_first_message_as_response():
+    embeds = numbered_embeds(23)
+    calls = deliver(FakeInteraction(), embeds)
+    assert [kind for kind, _ in calls] == ["response", "followup", "followup"]
+    assert [embed for _, message in calls for embed in message["embeds"]] == embeds
+
+def test_deferred_interaction_gets_followups_only():
+    interaction = FakeInteraction()
+    interaction.response.done = True
+    calls = deliver(interaction, numbered_embeds(12))
+    assert [kind for kind, _ in calls] == ["followup", "followup"]
+
+def test_context_uses_send():
+    embeds = numbered_embeds(11)
+    calls = deliver(fake_context(), embeds)
+    assert [kind for kind, _ in calls] == ["send", "send"]
+    assert [embed for _, message in calls for embed in message["embeds"]] == embeds
+
+def random_rows(rng):
+    rows = []
+    for group in range(rng.randint(1, 60)):
+        for entry in range(rng.randint(1, 40)):
+            rows.append((f"Grupa {group}", f"• {group}/{entry} " + "x" * rng.choice([5, 40, 200, 900, 1500]) + "\n"))
+    return rows
+
+@pytest.mark.parametrize("seed", range(30))
+def test_layout_embeds_stays_within_limits(seed):
+    rng = random.Random(seed)
+    rows = random_rows(rng)
+    footer = "Strona końcowa" if rng.random() < 0.5 else None
+    embeds = layout_embeds(rows, "Lista", lambda group, part: group if part == 0 else f"{group} (cd. {part})",
+                           description="Opis " * rng.randint(0, 50), continuation_title="Lista (cd.)",
+                           footer=footer, repeat_footer=rng.random() < 0.5)
+
+    for embed in embeds:
+        assert len(embed.fields) <= MAX_FIELDS_PER_EMBED
+        assert len(embed) <= MAX_EMBED_CHARS
+        for field in embed.fields:
+            assert len(field.name) <= MAX_FIELD_NAME
+            assert 0 < len(field.value) <= MAX_FIELD_VALUE
+
+    # The list commands send the embeds through pack_embeds: every message is within the limits
+    for message in pack_embeds(embeds):
+        assert len(message) <= MAX_EMBEDS_PER_MESSAGE
+        assert sum(len(embed) for embed in message) <= MAX_MESSAGE_CHARS
+
+    # Every entry appears once, in order, in a field of its own group
+    laid_out = [(field.name.split(" (cd.")[0], field.value) for embed in embeds for field in embed.fields]
+    expected = {}
+    for group, entry in rows:
+        expected.setdefault(group, []).append(entry[:MAX_FIELD_VALUE])
+    field_groups = [group for group, _ in laid_out]
+    assert [group for i, group in enumerate(field_groups) if i == 0 or field_groups[i - 1] != group] == list(expected)
+    for group, entries in expected.items():
+        assert "".join(value for name, value in laid_out if name == group) == "".join(entries)
@@ -0,0 +1,33 @@
+# tests/test_match_shortlist.py
+"""
+get_best_match with an NgramIndex shortlist must return what the full scan returns.
+The corpus (data/match_corpus.json) mixes strain names and cities with typos, substrings,
+queries shorter than a trigram and queries sharing no trigram with any option.
+"""
+import json
+import os
+
+import pytest
+
+from utils import NgramIndex, get_best_match
+
+with open(os.path.join(os.path.dirname(__file__), "data", "match_corpus.json"), encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+OPTIONS = CORPUS["options"]
+INDEX = NgramIndex(OPTIONS)
+
+@pytest.mark.parametrize("threshold", [0.8, 0.6])
+@pytest.mark.parametrize("query", CORPUS["queries"])
+def test_shortlist_matches_full_scan(query, threshold):
+    assert get_best_match(query, OPTIONS, threshold, ngram_index=INDEX) == get_best_match(query, OPTIONS, threshold)
+
+@pytest.mark.parametrize("top_k", [1, 5])
+@pytest.mark.parametrize("query", ["z", "og", "qqqq", "xyz123"])
+def test_small_shortlist_falls_back_to_full_scan(query, top_k):
+    # Queries shorter than a trigram or sharing none are scored against every option
+    assert (get_best_match(query, OPTIONS, ngram_index=INDEX, top_k=top_k)
+            == get_best_match(query, OPTIONS))
+
+def test_one_letter_query_finds_partial_match():
+    assert get_best_match("z", ["Gorilla Glue", "Zkittlez"], ngram_index=NgramIndex(["Gorilla Glue", "Zkittlez"]))[0] == "Zkittlez"
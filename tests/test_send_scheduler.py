@@ -0,0 +1,189 @@
+# tests/test_send_scheduler.py
+"""SendScheduler against the fake rate-limited HTTP layer in fake_http.py."""
+import asyncio
+import functools
+import time
+
+import discord
+import pytest
+
+from send_scheduler import SendScheduler, HIGH, MAX_RATE_LIMIT_RETRIES, merge_messages
+
+from fake_http import FakeHTTP, FakeResponse, rate_limited
+
+def test_scheduler_built_outside_the_loop_handles_contention():
+    # bot.py configures the scheduler at import, before client.run() starts the event loop
+    scheduler = SendScheduler(global_concurrency=1)
+    in_flight = []
+
+    async def deliver(**message):
+        in_flight.append(message["content"])
+        assert len(in_flight) == 1
+        await asyncio.sleep(0.01)
+        in_flight.remove(message["content"])
+        return message["content"]
+
+    async def run():
+        return await asyncio.gather(*(scheduler.submit(("channel", i), deliver, {"content": str(i)}) for i in range(3)))
+
+    assert asyncio.run(run()) == ["0", "1", "2"]
+
+def run_with(scheduler_factory, scenario):
+    """Runs scenario(scheduler) under asyncio.run and returns its result."""
+    async def run():
+        return await scenario(scheduler_factory())
+    return asyncio.run(run())
+
+def text(i):
+    return {"content": f"linia {i}"}
+
+def test_merge_messages_within_limits():
+    assert merge_messages({"content": "a"}, {"content": "b"}) == {"content": "a\nb"}
+    assert merge_messages({"content": "a" * 1500}, {"content": "b" * 600}) is None
+    assert merge_messages({"content": "a"}, {"embeds": [discord.Embed(title="x")]}) is None
+    embeds = [discord.Embed(title=f"{i}") for i in range(6)]
+    assert merge_messages({"embeds": embeds[:3]}, {"embeds": embeds[3:]}) == {"embeds": embeds}
+    assert merge_messages({"embeds": embeds}, {"embeds": embeds}) is None
+
+def test_waiting_messages_for_one_target_are_merged():
+    http = FakeHTTP(limit=50)
+
+    async def scenario(scheduler):
+        deliver = functools.partial(http.send, "kanał")
+        first = asyncio.ensure_future(scheduler.submit(("channel", 1), deliver, text(0), target="kanał"))
+        await asyncio.sleep(0.001)
+        rest = [scheduler.submit(("channel", 1), deliver, text(i), target="kanał") for i in range(1, 5)]
+        return await asyncio.gather(first, *rest)
+
+    results = run_with(SendScheduler, scenario)
+    # The first message is in flight at once, the four queued behind it go out as one
+    assert [content for _, content, _ in http.sent] == ["linia 0", "linia 1\nlinia 2\nlinia 3\nlinia 4"]
+    assert results[1] is results[4]
+
+def test_messages_without_target_are_not_merged():
+    http = FakeHTTP(limit=50)
+
+    async def scenario(scheduler):
+        deliver = functools.partial(http.send, "kanał")
+        await asyncio.gather(*(scheduler.submit(("channel", 1), deliver, text(i)) for i in range(4)))
+
+    run_with(SendScheduler, scenario)
+    assert len(http.sent) == 4
+
+def test_route_keeps_order():
+    http = FakeHTTP(limit=50, latency=0.001)
+
+    async def scenario(scheduler):
+        submits = []
+        for i in range(12):
+            # Alternating text and embeds can't be merged, each is its own request
+            message = text(i) if i % 2 else {"embeds": [discord.Embed(title=f"{i}")]}
+            submits.append(scheduler.submit(("channel", 1), functools.partial(http.send, "kanał"), message,
+                                            target="kanał"))
+        await asyncio.gather(*submits)
+
+    run_with(SendScheduler, scenario)
+    assert [content or "embed" for _, content, _ in http.sent] == [
+        text(i)["content"] if i % 2 else "embed" for i in range(12)]
+
+def test_exhausted_bucket_pauses_the_route_without_429s():
+    http = FakeHTTP(limit=2, window=0.1, latency=0.001)
+
+    async def scenario(scheduler):
+        deliver = functools.partial(http.send, "kanał")
+        start = time.perf_counter()
+        await asyncio.gather(*(scheduler.submit(("channel", 1), deliver, text(i)) for i in range(6)))
+        return time.perf_counter() - start
+
+    elapsed = run_with(SendScheduler, scenario)
+    assert [content for _, content, _ in http.sent] == [f"linia {i}" for i in range(6)]
+    assert http.rate_limited == 0
+    assert elapsed >= 0.2
+
+def test_429_pauses_the_route_and_retries_the_same_message_first():
+    attempts = []
+
+    async def deliver(**message):
+        now = time.perf_counter()
+        attempts.append((message["content"], now))
+        if len(attempts) == 1:
+            raise rate_limited(0.05)
+        return message["content"]
+
+    async def scenario(scheduler):
+        return await asyncio.gather(*(scheduler.submit(("channel", 1), deliver, text(i)) for i in range(3)))
+
+    assert run_with(SendScheduler, scenario) == ["linia 0", "linia 1", "linia 2"]
+    assert [content for content, _ in attempts] == ["linia 0", "linia 0", "linia 1", "linia 2"]
+    assert attempts[1][1] - attempts[0][1] >= 0.05
+
+def test_rate_limit_retries_are_bounded():
+    attempts = []
+
+    async def always_limited(**message):
+        attempts.append(message["content"])
+        if message["content"] == "linia 0":
+            raise rate_limited(0.001)
+        return message["content"]
+
+    async def scenario(scheduler):
+        first = asyncio.ensure_future(scheduler.submit(("channel", 1), always_limited, text(0)))
+        second = asyncio.ensure_future(scheduler.submit(("channel", 1), always_limited, text(1)))
+        with pytest.raises(discord.HTTPException):
+            await first
+        return await second
+
+    assert run_with(SendScheduler, scenario) == "linia 1"
+    assert attempts == ["linia 0"] * (MAX_RATE_LIMIT_RETRIES + 1) + ["linia 1"]
+
+def test_other_errors_reach_every_merged_caller():
+    async def failing(**message):
+        await asyncio.sleep(0.01)
+        if "linia 1" in message["content"]:
+            raise discord.HTTPException(FakeResponse(500, {}), "Internal Server Error")
+        return message["content"]
+
+    async def scenario(scheduler):
+        first = asyncio.ensure_future(scheduler.submit(("channel", 1), failing, text(0), target="kanał"))
+        await asyncio.sleep(0.001)
+        rest = [scheduler.submit(("channel", 1), failing, text(i), target="kanał") for i in range(1, 3)]
+        return await asyncio.gather(first, *rest, return_exceptions=True)
+
+    first, second, third = run_with(SendScheduler, scenario)
+    assert first == "linia 0"
+    assert isinstance(second, discord.HTTPException) and isinstance(third, discord.HTTPException)
+
+def test_high_priority_skips_the_global_limit():
+    release = None
+    order = []
+
+    async def blocking(**message):
+        order.append(message["content"])
+        await release.wait()
+        return message["content"]
+
+    async def quick(**message):
+        order.append(message["content"])
+        return message["content"]
+
+    async def scenario(scheduler):
+        nonlocal release
+        release = asyncio.Event()
+        held = asyncio.ensure_future(scheduler.submit(("channel", 1), blocking, text(0)))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.ensure_future(scheduler.submit(("channel", 2), quick, text(1)))
+        first_response = await asyncio.wait_for(
+            scheduler.submit(("interaction", 3), quick, text(2), priority=HIGH), 1)
+        release.set()
+        return first_response, await held, await waiting
+
+    assert run_with(lambda: SendScheduler(global_concurrency=1), scenario) == ("linia 2", "linia 0", "linia 1")
+    assert order == ["linia 0", "linia 2", "linia 1"]
+
+def test_idle_routes_are_forgotten():
+    async def scenario(scheduler):
+        await scheduler.submit(("channel", 1), FakeHTTP(latency=0).send, {"channel": 1, "content": "a"})
+        await asyncio.sleep(0)
+        return scheduler.depth(("channel", 1)), len(scheduler._routes)
+
+    assert run_with(SendScheduler, scenario) == (0, 0)
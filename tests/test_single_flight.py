@@ -0,0 +1,119 @@
+# tests/test_single_flight.py
+"""SingleFlight coalescing on its own and through run_within_budget, as the lookup commands use it."""
+import asyncio
+import threading
+
+import pytest
+
+from executor import configure_executor
+from responses import run_within_budget
+from send_scheduler import configure_send_scheduler
+from single_flight import SingleFlight
+
+from fakes import FakeInteraction, fake_context
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "wynik"
+
+    async def run():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.run("klucz", compute) for _ in range(20)))
+        return results, len(flight)
+
+    results, pending = asyncio.run(run())
+    assert results == ["wynik"] * 20
+    assert len(calls) == 1
+    assert pending == 0
+
+def test_different_keys_and_later_calls_compute_again():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def run():
+        flight = SingleFlight("test")
+        await asyncio.gather(flight.run("a", compute), flight.run("b", compute))
+        await flight.run("a", compute)
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+def test_leader_failure_reaches_every_follower():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("błąd")
+
+    async def run():
+        flight = SingleFlight("test")
+        return await asyncio.gather(*(flight.run("klucz", fail) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(results) == 5
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_cancelled_follower_does_not_cancel_the_shared_computation():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_lookup(query):
+        calls.append(query)
+        started.set()
+        release.wait(5)
+        return f"wynik {query}"
+
+    async def run():
+        configure_executor(max_workers=2, timeout=10.0)
+        configure_send_scheduler()
+        flight = SingleFlight("test")
+
+        def call():
+            return asyncio.ensure_future(run_within_budget(fake_context(), slow_lookup, "gelato",
+                                                           flight=flight, flight_key=("gelato", 1)))
+
+        leader, follower, other = call(), call(), call()
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        follower.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(leader, other)
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return results
+
+    assert asyncio.run(run()) == ["wynik gelato", "wynik gelato"]
+    assert calls == ["gelato"]
+
+def test_every_interaction_sharing_a_computation_is_deferred():
+    release = threading.Event()
+    calls = []
+
+    def slow_lookup(query):
+        calls.append(query)
+        release.wait(5)
+        return query
+
+    async def run():
+        configure_executor(max_workers=2, timeout=10.0)
+        configure_send_scheduler()
+        flight = SingleFlight("test")
+        interactions = [FakeInteraction() for _ in range(3)]
+        tasks = [asyncio.ensure_future(run_within_budget(interaction, slow_lookup, "gelato", budget=0.01,
+                                                         flight=flight, flight_key=("gelato", 1)))
+                 for interaction in interactions]
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.gather(*tasks), interactions
+
+    results, interactions = asyncio.run(run())
+    assert results == ["gelato"] * 3
+    assert calls == ["gelato"]
+    assert all(interaction.calls == [("defer", {})] for interaction in interactions)
@@ -0,0 +1,97 @@
+# tests/test_sqlite_store.py
+"""CatalogueStore imports, the unchanged-file skip, schema upgrades and the fallback to the last import."""
+import os
+import sqlite3
+
+import pytest
+
+import sqlite_store
+from data_loader import validate_strains_data, validate_clinics_data
+from data_manager import DataManager, _file_signature
+from records import StrainRecord, ClinicRecord
+from sqlite_store import CatalogueStore, SCHEMA_VERSION
+
+from sample_data import STRAINS, CLINICS, write_catalogue
+
+def store_and_files(tmp_path):
+    return CatalogueStore(str(tmp_path / "catalogue.sqlite")), write_catalogue(str(tmp_path))
+
+def test_import_round_trips_the_records(tmp_path):
+    store, (strains_path, clinics_path) = store_and_files(tmp_path)
+    strains = store.load("strains", strains_path, _file_signature(strains_path), validate_strains_data)
+    clinics = store.load("clinics", clinics_path, _file_signature(clinics_path), validate_clinics_data)
+
+    assert [strain.to_dict() for strain in strains] == [StrainRecord.from_dict(s).to_dict() for s in STRAINS]
+    assert [clinic.to_dict() for clinic in clinics] == [ClinicRecord.from_dict(c).to_dict() for c in CLINICS]
+    assert clinics[0]["doctors"] == ("dr Anna Nowak",)
+    assert clinics[1].get("doctors") == ()
+
+def test_unchanged_file_is_not_parsed_again(tmp_path, monkeypatch):
+    store, (strains_path, _) = store_and_files(tmp_path)
+    signature = _file_signature(strains_path)
+    store.load("strains", strains_path, signature, validate_strains_data)
+
+    def fail(filepath):
+        raise AssertionError("parsed an unchanged file")
+    monkeypatch.setattr(sqlite_store, "parse_data_file", fail)
+    reopened = CatalogueStore(store.path)
+    assert len(reopened.load("strains", strains_path, signature, validate_strains_data)) == len(STRAINS)
+
+def test_changed_file_is_imported_again(tmp_path):
+    store, (strains_path, _) = store_and_files(tmp_path)
+    store.load("strains", strains_path, _file_signature(strains_path), validate_strains_data)
+
+    write_catalogue(str(tmp_path), strains=STRAINS[:1])
+    os.utime(strains_path, ns=(1, 1))
+    strains = store.load("strains", strains_path, _file_signature(strains_path), validate_strains_data)
+    assert [strain["strain_name"] for strain in strains] == ["Gorilla Glue"]
+
+def test_failed_import_keeps_the_previous_rows(tmp_path):
+    store, (strains_path, _) = store_and_files(tmp_path)
+    store.load("strains", strains_path, _file_signature(strains_path), validate_strains_data)
+
+    def invalid(data):
+        raise ValueError("invalid")
+    with pytest.raises(ValueError):
+        store.load("strains", strains_path, None, invalid)
+    assert len(store.strains()) == len(STRAINS)
+
+def test_older_schema_is_dropped(tmp_path):
+    path = str(tmp_path / "catalogue.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE strains (position INTEGER PRIMARY KEY, name_key TEXT)")
+    connection.execute("CREATE TABLE strains_fts (name_key)")
+    connection.commit()
+    connection.close()
+
+    store = CatalogueStore(path)
+    tables = {row[0] for row in store._connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"sources", "strains", "clinics"}
+    assert store._connection().execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    store.import_strains(STRAINS)
+    assert len(store.strains()) == len(STRAINS)
+
+def test_startup_falls_back_to_the_last_import(tmp_path):
+    store, (strains_path, clinics_path) = store_and_files(tmp_path)
+    DataManager(strains_path, clinics_path, poll_interval=0, store=store).load()
+
+    with open(strains_path, "w", encoding="utf-8") as f:
+        f.write("[{broken")
+    os.utime(strains_path, ns=(1, 1))
+    snapshot = DataManager(strains_path, clinics_path, poll_interval=0, store=store).load()
+    assert len(snapshot.strains_data) == len(STRAINS)
+
+    # Without a store, or for a file never imported, a broken file still loads as empty
+    assert len(DataManager(strains_path, clinics_path, poll_interval=0).load().strains_data) == 0
+    other_store = CatalogueStore(str(tmp_path / "other.sqlite"))
+    assert len(DataManager(strains_path, clinics_path, poll_interval=0, store=other_store).load().strains_data) == 0
+
+def test_both_backends_build_the_same_indexes(tmp_path):
+    store, paths = store_and_files(tmp_path)
+    from_json = DataManager(*paths, poll_interval=0).load()
+    from_store = DataManager(*paths, poll_interval=0, store=store).load()
+
+    assert from_store.strain_index.choices == from_json.strain_index.choices
+    assert from_store.clinic_index.city_choices == from_json.clinic_index.city_choices
+    assert from_store.strain_list_pages == from_json.strain_list_pages
+    assert from_store.clinic_list_pages == from_json.clinic_list_pages
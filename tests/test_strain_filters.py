@@ -0,0 +1,28 @@
+# tests/test_strain_filters.py
+import pytest
+
+from strain_filters import parse_strain_filter, make_strain_filter
+
+@pytest.mark.parametrize("text, thc, cbd", [
+    ("thc 20-25", (20.0, 25.0), None),
+    ("thc od 20 do 25", (20.0, 25.0), None),
+    ("THC od 20% do 25% cbd <1", (20.0, 25.0), (None, 1.0)),
+    ("cbd od 0,5 do 1", None, (0.5, 1.0)),
+    ("thc od 25 do 20", (20.0, 25.0), None),
+    ("thc od 20", (20.0, None), None),
+    ("thc do 25", (None, 25.0), None),
+    ("thc 22", (22.0, 22.0), None),
+])
+def test_parse_ranges(text, thc, cbd):
+    strain_filter, unknown = parse_strain_filter(text)
+    assert (strain_filter.thc, strain_filter.cbd, unknown) == (thc, cbd, [])
+
+def test_parse_types_and_availability():
+    strain_filter, unknown = parse_strain_filter("thc od 20 do 25 indica dostępne xyz")
+    assert strain_filter.strain_types == ("indica",)
+    assert strain_filter.availability == ("dostepne",)
+    assert unknown == ["xyz"]
+
+def test_inverted_bounds_are_swapped():
+    assert make_strain_filter(thc=(25, 20), cbd=(2, 1)) == make_strain_filter(thc=(20, 25), cbd=(1, 2))
+    assert make_strain_filter(thc=(None, None)).thc is None
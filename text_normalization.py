@@ -0,0 +1,31 @@
+# text_normalization.py
+import re
+import unicodedata
+
+# Polish letters are folded with one translate; other diacritics through Unicode decomposition.
+# ł has no decomposition (it is not l + a combining mark), so it can only be folded by hand.
+_POLISH_FOLDS = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+# Apostrophes are dropped ("Girl Scout's" -> "girl scouts"), any other punctuation separates words
+_APOSTROPHES = re.compile(r"['’`]")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+def fold_diacritics(text):
+    """Replaces letters with diacritics by their base letters: "Łódź" -> "Lodz", "Kraków" -> "Krakow"."""
+    if text.isascii():
+        return text
+    text = text.translate(_POLISH_FOLDS)
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def fold_key(text):
+    """
+    Lookup key of a name or query: diacritics folded, case-folded, punctuation turned into
+    spaces and whitespace collapsed, so "Łódź", "lodz" and " ŁÓDŹ, " all give "lodz" and
+    "Bielsko-Biała" and "bielsko biala" give "bielsko biala".
+    """
+    if not text:
+        return ""
+    text = _APOSTROPHES.sub("", fold_diacritics(text).casefold())
+    return " ".join(_SEPARATORS.sub(" ", text).split())
@@ -3,20 +3,82 @@ import discord
 import asyncio
 from fuzzywuzzy import fuzz
 from fuzzywuzzy import process
+from fuzzywuzzy.utils import full_process
+from collections import Counter
+from responses import send_response
+import logging
 import os
 
+logger = logging.getLogger('cannabis_clinic_bot')
+
+# Liczba kandydatów przekazywanych do dokładnego dopasowania po wstępnym odsiewie n-gramami
+DEFAULT_SHORTLIST_SIZE = 50
+
 async def send_long_message(channel, text, chunk_size=1900, ephemeral=False):
-    """Breaks a long message into chunks and sends them."""
+    """Breaks a long message into chunks and sends them (an Interaction or a channel) through the send scheduler."""
     chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
     for chunk in chunks:
-        if hasattr(channel, 'followup') and hasattr(channel.followup, 'send'):
-            # This is an Interaction
-            await channel.followup.send(chunk, ephemeral=ephemeral)
+        await send_response(channel, ephemeral=ephemeral, content=chunk)
+
+class NgramIndex:
+    """
+    Inverted index from character n-grams to the options containing them.
+
+    Used by get_best_match to shortlist the options sharing the most n-grams
+    with the query before running the expensive fuzzy scorers.
+    """
+
+    def __init__(self, options, n=3):
+        self.n = n
+        self.options = list(options)
+        self.postings = {}
+        self.lowered = {}
+        # Options shorter than n partially match any text containing them, so they are always scored
+        self.short = []
+        for position, option in enumerate(self.options):
+            self.lowered.setdefault(option.lower(), option)
+            if len(full_process(option or "")) < n:
+                self.short.append(position)
+            for gram in self.ngrams(option):
+                self.postings.setdefault(gram, []).append(position)
+
+    def ngrams(self, text):
+        """Returns the set of n-grams of the processed text, padded so short words still count."""
+        processed = full_process(text or "")
+        if not processed:
+            return set()
+        padded = f" {processed} "
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def exact(self, text):
+        """Returns the option equal to text ignoring case, or None."""
+        return self.lowered.get(text.lower())
+
+    def shortlist(self, text, top_k=DEFAULT_SHORTLIST_SIZE):
+        """
+        Returns up to top_k options sharing the most n-grams with text, in their original order.
+        Falls back to all options when the text is shorter than n (a single padded n-gram would
+        miss options containing it inside a longer word) or shares no n-gram with any option.
+        """
+        processed = full_process(text or "")
+        if len(processed) < self.n:
+            return self.options
+
+        grams = self.ngrams(processed)
+
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        if not counts:
+            return self.options
+        if len(counts) <= top_k:
+            best = counts
         else:
-            # This is a regular channel
-            await channel.send(chunk)
+            best = sorted(counts, key=lambda position: (-counts[position], position))[:top_k]
+        # Keep the original order so ties resolve the same way as a full scan
+        return [self.options[position] for position in sorted(set(best).union(self.short))]
 
-def get_best_match(user_input, valid_options, threshold=0.8):
+def get_best_match(user_input, valid_options, threshold=0.8, ngram_index=None, top_k=DEFAULT_SHORTLIST_SIZE):
     """
     Finds the best match for the user input from a list of valid options using fuzzy matching.
     
@@ -24,6 +86,9 @@ def get_best_match(user_input, valid_options, threshold=0.8):
         user_input (str): The input provided by the user.
         valid_options (list): A list of valid strings to match against.
         threshold (float): The minimum similarity ratio to consider a match.
+        ngram_index (NgramIndex): Optional index built over valid_options. When given,
+            only the top_k options sharing the most n-grams with the input are scored.
+        top_k (int): Shortlist size used together with ngram_index.
     
     Returns:
         tuple: (best_match, similarity) - The best matching option and its similarity score if a match is found, 
@@ -35,14 +100,24 @@ def get_best_match(user_input, valid_options, threshold=0.8):
     user_input = user_input.lower()
     
     # First check for exact matches (case-insensitive)
-    for option in valid_options:
-        if user_input == option.lower():
+    if ngram_index is not None:
+        option = ngram_index.exact(user_input)
+        if option is not None:
             return option, 1.0
+        candidates = ngram_index.shortlist(user_input, top_k)
+        # No shared n-gram doesn't rule out a partial match, so score everything like the full scan
+        if not candidates:
+            candidates = valid_options
+    else:
+        for option in valid_options:
+            if user_input == option.lower():
+                return option, 1.0
+        candidates = valid_options
     
     # Use fuzzywuzzy for more robust matching
     best_match, score = process.extractOne(
         user_input, 
-        valid_options,
+        candidates,
         scorer=lambda x, y: max(
             fuzz.token_set_ratio(x, y),  # Handles word order differences
             fuzz.partial_ratio(x, y)     # Handles substring matches
@@ -63,6 +138,6 @@ def ensure_file_exists(filepath, default_content="[]"):
         default_content (str): The default content to write if the file is missing.
     """
     if not os.path.exists(filepath):
-        print(f"WARNING: File {filepath} does not exist. Creating it with default content.")
+        logger.warning(f"File {filepath} does not exist. Creating it with default content.")
         with open(filepath, 'w') as f:
             f.write(default_content)
\ No newline at end of file